@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+热点路径基准 (合成数据, 结果写 JSON 并与基线比对)
+
+    python3 benchmarks/bench_hot_paths.py                     # 100 / 10k / 100k 个代币
+    python3 benchmarks/bench_hot_paths.py --sizes 100,10000 --only diff,state
+    python3 benchmarks/bench_hot_paths.py --update-baseline   # 确认结果后更新基线
+
+覆盖的路径:
+  diff_ids      新旧 alphaId 集合求差 (只找新币)
+  diff          monitor_loop 的 ChangeDetector.diff (新增 / 下架 / 字段变化, 每轮都是新对象)
+  save_state    save_state (按列存储写入临时文件再替换)
+  load_state    load_state (读入并还原为 AlphaToken)
+  index         首页 HTML 渲染
+  api_state     /api/state 的序列化 (快照缓存已清空)
+  api_state_gzip  同上并 gzip 压缩
+  api_state_304   快照未变且 If-None-Match 命中 (只比较请求头)
+
+监控程序在临时目录中的 src/ 副本上导入, 不读写项目的 data/ 与 logs/。
+结果写入 benchmarks/results.json; 基线 benchmarks/baseline.json 不存在时以本次结果建立。
+中位数比基线慢超过 --threshold (默认 30%) 且绝对差超过 --min-delta 毫秒的用例记为退化, 退出码为 1。
+基线与机器相关, 应在部署机器 / CI 上建立。
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+RESULTS_PATH = os.path.join(HERE, 'results.json')
+BASELINE_PATH = os.path.join(HERE, 'baseline.json')
+
+from bench_token_memory import make_payload  # noqa: E402
+
+GROUPS = ('diff', 'state', 'index', 'api_state')
+
+
+def import_monitor(workdir: str):
+    """在临时目录的 src/ 副本上导入 app.py (ROOT 指向临时目录)"""
+    shutil.copytree(os.path.join(ROOT, 'src'), os.path.join(workdir, 'src'),
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    os.makedirs(os.path.join(workdir, 'config_files'))
+    with open(os.path.join(workdir, 'config_files', 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump({"notify_method": "none", "notify_targets": [], "logging": {"level": "ERROR"}}, f)
+    sys.path.insert(0, os.path.join(workdir, 'src'))
+    import app
+    return app
+
+
+def make_tokens(monitor, count: int) -> list:
+    """接口响应 -> 投影后的 AlphaToken 列表 (与 fetch_alpha_tokens 结果一致)"""
+    fields = monitor.alpha_projection({})
+    items = json.loads(make_payload(count))['data']
+    return [monitor.AlphaToken.from_dict({f: item[f] for f in fields if f in item}) for item in items]
+
+
+def next_poll(monitor, tokens: list, changes: int) -> list:
+    """下一轮的列表: 新增 / 下架 / 字段变化各 changes 个, 其余内容相同但都是新对象"""
+    current = [monitor.AlphaToken.from_row(t.to_row()) for t in tokens[changes:]]
+    for i in range(changes):
+        current[i] = monitor.AlphaToken.from_dict({**current[i].to_dict(), "name": current[i]['name'] + ' v2'})
+    for i in range(changes):
+        current.append(monitor.AlphaToken.from_dict({**tokens[0].to_dict(), "alphaId": f"NEW_{i}"}))
+    return current
+
+
+def make_state(monitor, tokens: list) -> dict:
+    """与 monitor_loop 保存的结构一致的状态"""
+    now = time.time()
+    traces = [{"token": f"ALPHA_{i}", "listed_at": now - 30, "fetch_start": now - 3, "fetch_end": now - 2,
+               "detected": now - 2, "enqueued": now - 2, "acks": {f"target-{j}": now - 1 for j in range(5)}}
+              for i in range(200)]
+    return {
+        "last_check": datetime.now(timezone.utc).isoformat(),
+        "tokens": tokens,
+        "token_count": len(tokens),
+        "new_count": 2,
+        "version": 42,
+        "change_fields": list(monitor.CHANGE_FIELDS),
+        "changes": {"added": tokens[:2], "removed": tokens[2:3], "changed": []},
+        "traces": traces,
+        "breakers": {"upstream": {}, "notify": {}},
+        "endpoints": {}
+    }
+
+
+def run_case(func: Callable[[], None], setup: Optional[Callable[[], None]] = None,
+             min_time: float = 0.3, min_samples: int = 5, max_samples: int = 200) -> dict:
+    """每次调用单独计时 (setup 不计时), 直到累计 min_time 秒且至少 min_samples 次"""
+    if setup:
+        setup()
+    func()  # 预热 (首次调用的导入 / 缓存不计入)
+    samples: List[float] = []
+    total = 0.0
+    while len(samples) < max_samples and (len(samples) < min_samples or total < min_time):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        total += elapsed
+    return {
+        "samples": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "min_ms": round(min(samples) * 1000, 4),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "stdev_ms": round(statistics.stdev(samples) * 1000, 4) if len(samples) > 1 else 0.0
+    }
+
+
+def bench_size(monitor, size: int, groups: List[str]) -> Dict[str, dict]:
+    results = {}
+    previous = make_tokens(monitor, size)
+    changes = max(1, size // 1000)
+
+    if 'diff' in groups:
+        current = next_poll(monitor, previous, changes)
+        previous_ids = {t.get('alphaId') for t in previous}
+        results[f"diff_ids/{size}"] = run_case(
+            lambda: {t.get('alphaId') for t in current} - previous_ids)
+
+        detector = monitor.change_detector({})
+        detector.diff([], previous)  # 上一轮的摘要已缓存
+
+        def reset():
+            for token in current:
+                token.digest = None
+        results[f"diff/{size}"] = run_case(lambda: detector.diff(previous, current), setup=reset)
+
+    state = make_state(monitor, previous)
+    if 'state' in groups:
+        results[f"save_state/{size}"] = run_case(lambda: monitor.save_state(state))
+        results[f"load_state/{size}"] = run_case(monitor.load_state)
+        results[f"save_state/{size}"]["bytes"] = os.path.getsize(monitor.STATE_PATH)
+
+    monitor.monitor_state = state
+    if 'index' in groups:
+        with monitor.app.test_request_context('/'):
+            results[f"index/{size}"] = run_case(monitor.index)
+    if 'api_state' in groups:
+        with monitor.app.test_request_context('/api/state'):
+            results[f"api_state/{size}"] = run_case(lambda: monitor.api_state().get_data(),
+                                                    setup=monitor.responder.invalidate)
+            etag = monitor.api_state().headers['ETag']
+        with monitor.app.test_request_context('/api/state', headers={'Accept-Encoding': 'gzip'}):
+            results[f"api_state_gzip/{size}"] = run_case(lambda: monitor.api_state().get_data(),
+                                                         setup=monitor.responder.invalidate)
+        with monitor.app.test_request_context('/api/state', headers={'If-None-Match': etag}):
+            results[f"api_state_304/{size}"] = run_case(lambda: monitor.api_state().get_data())
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float,
+            min_delta: float) -> List[str]:
+    """打印与基线的对比, 返回退化的用例"""
+    regressions = []
+    print(f"\n{'用例':<22}{'中位数':>12}{'基线':>12}{'变化':>9}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        median = result["median_ms"]
+        if not base:
+            print(f"{name:<22}{median:>10.3f}ms{'-':>12}{'新增':>9}")
+            continue
+        ratio = median / base["median_ms"] if base["median_ms"] else 1.0
+        regressed = ratio > 1 + threshold and median - base["median_ms"] > min_delta
+        mark = ' ⚠' if regressed else ''
+        print(f"{name:<22}{median:>10.3f}ms{base['median_ms']:>10.3f}ms{ratio - 1:>+9.1%}{mark}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='热点路径基准')
+    parser.add_argument('--sizes', default='100,10000,100000', help='代币数, 逗号分隔')
+    parser.add_argument('--only', default=','.join(GROUPS), help=f"只运行部分用例: {','.join(GROUPS)}")
+    parser.add_argument('--results', default=RESULTS_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='以本次结果作为新基线')
+    parser.add_argument('--threshold', type=float, default=0.3, help='中位数变慢超过该比例记为退化')
+    parser.add_argument('--min-delta', type=float, default=0.05, help='忽略小于该值的绝对差 (毫秒)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    groups = [g for g in args.only.split(',') if g]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"未知用例: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix='alpha-bench-')
+    try:
+        monitor = import_monitor(workdir)
+        results = {}
+        for size in sizes:
+            print(f"⏱ {size} 个代币...")
+            results.update(bench_size(monitor, size, groups))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "results": results
+    }
+    with open(args.results, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+    regressions = compare(results, baseline.get('results', {}), args.threshold, args.min_delta)
+    print(f"\n结果: {args.results}")
+
+    if args.update_baseline or not baseline:
+        merged = {"meta": report["meta"], "results": {**baseline.get('results', {}), **results}}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, indent=2, ensure_ascii=False)
+        print(f"已更新基线: {args.baseline}")
+        return 0
+    if regressions:
+        print(f"⚠ {len(regressions)} 个用例比基线 ({baseline.get('meta', {}).get('commit')}) "
+              f"慢 {args.threshold:.0%} 以上: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
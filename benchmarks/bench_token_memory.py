@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+代币记录内存基准
+
+    python3 benchmarks/bench_token_memory.py --count 10000
+
+对比每 10k 个代币的内存占用 (tracemalloc 统计):
+  dict 完整      - 接口原样返回的 dict
+  dict 投影      - 只保留 ALPHA_FIELDS 的 dict
+  AlphaToken    - __slots__ 记录 (chainId / symbol / alphaId intern)
+并测量状态文件的序列化大小与读写耗时 (dict 列表 vs 按列存储)。
+数据来自 json.loads, 与真实轮询一样每个字符串都是新对象。
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from records import AlphaToken, pack_records, unpack_records  # noqa: E402
+
+CHAINS = ['56', '1', '8453', 'CT_501', '42161']
+
+
+def make_payload(count: int) -> str:
+    """模拟 token/list 接口的响应体"""
+    rng = random.Random(42)
+    items = []
+    for i in range(count):
+        symbol = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(rng.randint(3, 6)))
+        items.append({
+            "tokenId": f"{i:032x}",
+            "chainId": rng.choice(CHAINS),
+            "chainIconUrl": "https://bin.bnbstatic.com/image/admin_mgs_image_upload/chain.png",
+            "chainName": "BSC",
+            "contractAddress": f"0x{rng.getrandbits(160):040x}",
+            "name": f"{symbol} Token",
+            "symbol": symbol,
+            "iconUrl": f"https://bin.bnbstatic.com/image/alpha/{symbol.lower()}.png",
+            "price": f"{rng.random():.8f}",
+            "percentChange24h": f"{rng.uniform(-50, 50):.2f}",
+            "volume24h": f"{rng.uniform(0, 1e7):.2f}",
+            "marketCap": f"{rng.uniform(0, 1e9):.2f}",
+            "fdv": f"{rng.uniform(0, 1e9):.2f}",
+            "liquidity": f"{rng.uniform(0, 1e7):.2f}",
+            "totalSupply": str(rng.randint(10 ** 6, 10 ** 12)),
+            "circulatingSupply": str(rng.randint(10 ** 6, 10 ** 12)),
+            "holders": str(rng.randint(10, 10 ** 6)),
+            "decimals": 18,
+            "listingCex": False,
+            "hotTag": False,
+            "cexCoinName": "",
+            "canTransfer": True,
+            "denomination": 1,
+            "offline": False,
+            "tradeDecimal": 8,
+            "alphaId": f"ALPHA_{i}",
+            "offsell": False,
+            "priceHigh24h": f"{rng.random():.8f}",
+            "priceLow24h": f"{rng.random():.8f}",
+            "count24h": str(rng.randint(0, 10 ** 5)),
+            "onlineTge": False,
+            "onlineAirdrop": False,
+            "score": rng.randint(0, 1000),
+            "cexOffDisplay": False,
+            "stockState": False,
+            "listingTime": 1700000000000 + i * 60000,
+            "onlineTime": 1700000000000 + i * 60000,
+        })
+    return json.dumps({"code": "000000", "data": items})
+
+
+def measure(build):
+    """返回 (结果, 占用字节)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(func, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='代币记录内存基准')
+    parser.add_argument('--count', type=int, default=10000)
+    args = parser.parse_args()
+
+    payload = make_payload(args.count)
+    fields = list(AlphaToken.FIELDS)
+    scale = 10000 / args.count
+
+    def project():
+        # 与 ArrayStream 一致: 解析时只保留 ALPHA_FIELDS
+        return [{f: item[f] for f in fields if f in item} for item in json.loads(payload)['data']]
+
+    # 上一轮的记录先驻留内存, 新一轮的 intern 字符串与之共用
+    previous = [AlphaToken.from_dict(item) for item in project()]
+
+    full, full_size = measure(lambda: json.loads(payload)['data'])
+    projected, projected_size = measure(project)
+    records, records_size = measure(lambda: [AlphaToken.from_dict(item) for item in project()])
+
+    print(f"代币数: {args.count}  (以下按每 10k 个折算)")
+    print(f"{'类型':<14}{'内存':>12}{'相对完整 dict':>16}")
+    for name, size in (('dict 完整', full_size), ('dict 投影', projected_size), ('AlphaToken', records_size)):
+        print(f"{name:<14}{size * scale / 1024 / 1024:>10.2f}MB{size / full_size:>15.1%}")
+
+    # 状态文件: dict 列表 (旧格式, indent=2) vs 按列存储
+    old_text = json.dumps(projected, indent=2, ensure_ascii=False)
+    packed = pack_records(records, AlphaToken)
+    new_text = json.dumps(packed, ensure_ascii=False, separators=(',', ':'))
+    print()
+    print(f"{'状态文件':<14}{'大小':>12}{'写入':>10}{'读取':>10}")
+    print(f"{'dict 列表':<14}{len(old_text.encode()) * scale / 1024:>10.0f}KB"
+          f"{timed(lambda: json.dumps(projected, indent=2, ensure_ascii=False)) * 1000 * scale:>8.1f}ms"
+          f"{timed(lambda: unpack_records(json.loads(old_text), AlphaToken)) * 1000 * scale:>8.1f}ms")
+    print(f"{'按列存储':<14}{len(new_text.encode()) * scale / 1024:>10.0f}KB"
+          f"{timed(lambda: json.dumps(pack_records(records, AlphaToken), ensure_ascii=False, separators=(',', ':'))) * 1000 * scale:>8.1f}ms"
+          f"{timed(lambda: unpack_records(json.loads(new_text), AlphaToken)) * 1000 * scale:>8.1f}ms")
+
+    assert unpack_records(json.loads(new_text), AlphaToken) == records
+    del full, previous
+
+
+if __name__ == '__main__':
+    main()
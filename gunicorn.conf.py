@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+"""
+生产模式 gunicorn 配置
+
+    gunicorn -c gunicorn.conf.py app:app         # Alpha 监控
+    gunicorn -c gunicorn.conf.py app_meme:app    # Meme Rush 监控
+
+多个 worker 通过 data/monitor.lock 租约选出唯一的监控进程, 其余 worker 跟随
+data/monitor_state.json。设置 MONITOR_ROLE=follower 时 worker 不参与竞选,
+监控由 sidecar 进程负责: python3 src/app.py --monitor-only
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 应用模块在 src/ 下
+chdir = os.path.join(ROOT, "src")
+
+
+def _webui_port():
+    try:
+        with open(os.path.join(ROOT, "config_files", "config.json"), 'r', encoding='utf-8') as f:
+            return json.load(f).get('webui_port', 5002)
+    except Exception:
+        return 5002
+
+
+bind = f"0.0.0.0:{_webui_port()}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# /api/changes 长轮询会占住线程, 用线程型 worker
+worker_class = "gthread"
+threads = int(os.environ.get('WEB_THREADS', 16))
+timeout = 90
+
+
+def post_worker_init(worker):
+    """worker 加载应用后启动状态跟随与租约竞选"""
+    module = sys.modules[worker.wsgi.import_name]
+    module.start_worker()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模拟币安 Alpha 代币列表接口 (压测用)
+任意 GET 路径返回 {"code": "000000", "data": [...]}, 可注入延迟与错误, 上新 / 下架由控制接口或脚本触发:
+
+    POST /_control/list?count=3       上新 3 个代币 (listingTime 为当前时间)
+    POST /_control/delist?count=1     下架最早的 1 个代币
+    POST /_control/modify?count=1     修改代币名称 (变更检测)
+    POST /_control/faults             JSON 请求体覆盖故障参数 (latency / error_rate 等)
+    GET  /_control/listings           {alphaId: {listed_at, first_served}}
+    GET  /_control/stats              请求数 / 注入的错误数
+
+    python3 harness/mock_alpha.py --tokens 5000 --latency 0.05 --error-rate 0.02
+    python3 harness/mock_alpha.py --script listings.json
+
+脚本为事件列表, at 为启动后的秒数:
+
+    [{"at": 10, "action": "list", "count": 2}, {"at": 30, "action": "faults", "error_rate": 1.0},
+     {"at": 40, "action": "faults", "error_rate": 0}, {"at": 50, "action": "delist", "count": 1}]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+CHAINS = ['56', '1', '8453', 'CT_501']
+
+# 可在运行中调整的故障参数
+FAULTS = {
+    "latency": 0.05,        # 基础延迟 (秒)
+    "jitter": 0.02,         # 延迟抖动 (秒)
+    "slow_rate": 0.0,       # 慢响应比例
+    "slow_latency": 5.0,    # 慢响应延迟 (秒)
+    "error_rate": 0.0,      # HTTP 错误比例
+    "error_status": 500,    # HTTP 错误状态码 (429 时带 Retry-After)
+    "bad_code_rate": 0.0,   # HTTP 200 但 code 不是 000000 的比例
+}
+
+
+def make_token(index: int, listed_at: float) -> dict:
+    """生成一个字段齐全的假代币 (字段与真实接口一致, 含监控不需要的字段)"""
+    seed = int(hashlib.md5(str(index).encode()).hexdigest()[:8], 16)
+    return {
+        "tokenId": hashlib.md5(f"token-{index}".encode()).hexdigest().upper(),
+        "chainId": CHAINS[seed % len(CHAINS)],
+        "chainIconUrl": "https://bin.bnbstatic.com/image/admin_mgs_image_upload/chain.png",
+        "chainName": "BSC",
+        "contractAddress": "0x" + hashlib.sha1(f"contract-{index}".encode()).hexdigest()[:40],
+        "name": f"Load Token {index}",
+        "symbol": f"LT{index}",
+        "iconUrl": f"https://bin.bnbstatic.com/images/web3-data/public/token/logos/{index}.png",
+        "price": f"{(seed % 100000) / 1e4:.8f}",
+        "percentChange24h": f"{(seed % 2000) / 100 - 10:.2f}",
+        "volume24h": f"{seed % 10000000}.{seed % 100:02d}",
+        "marketCap": f"{seed % 50000000}.{seed % 100:02d}",
+        "fdv": f"{seed % 90000000}.00",
+        "liquidity": f"{seed % 5000000}.00",
+        "totalSupply": "1000000000",
+        "circulatingSupply": f"{seed % 1000000000}",
+        "holders": str(seed % 20000),
+        "decimals": 18,
+        "listingCex": False,
+        "hotTag": seed % 7 == 0,
+        "cexCoinName": "",
+        "canTransfer": True,
+        "denomination": 1,
+        "offline": False,
+        "tradeDecimal": 8,
+        "alphaId": f"ALPHA_{index}",
+        "offsell": False,
+        "priceHigh24h": f"{(seed % 110000) / 1e4:.8f}",
+        "priceLow24h": f"{(seed % 90000) / 1e4:.8f}",
+        "count24h": str(seed % 50000),
+        "onlineTge": False,
+        "onlineAirdrop": seed % 3 == 0,
+        "score": seed % 1000,
+        "cexOffDisplay": False,
+        "stockState": False,
+        "listingTime": int(listed_at * 1000),
+        "onlineTime": int(listed_at * 1000),
+        "mulPoint": 1,
+        "bnExclusive": False,
+    }
+
+
+class AlphaMarket:
+    """模拟的代币列表 (线程安全); 列表变化时才重新序列化响应体"""
+
+    def __init__(self, tokens: int = 1000, faults: dict = None):
+        created = time.time() - 86400
+        self._tokens: List[dict] = [make_token(i, created - i * 60) for i in range(tokens)]
+        self._next = tokens
+        self._lock = threading.Lock()
+        self._body = None
+        self._unserved: Dict[str, float] = {}
+        self.faults = {**FAULTS, **(faults or {})}
+        self.listings: Dict[str, dict] = {}  # alphaId -> {listed_at, first_served}
+        self.stats = {"requests": 0, "errors": 0, "bad_code": 0, "slow": 0}
+
+    def list_tokens(self, count: int = 1) -> List[str]:
+        """上新 count 个代币, 返回 alphaId"""
+        now = time.time()
+        with self._lock:
+            new = [make_token(self._next + i, now) for i in range(count)]
+            self._next += count
+            self._tokens = new + self._tokens
+            self._body = None
+            for token in new:
+                self.listings[token['alphaId']] = {"listed_at": now, "first_served": None}
+                self._unserved[token['alphaId']] = now
+        return [token['alphaId'] for token in new]
+
+    def delist(self, count: int = 1) -> List[str]:
+        """下架最早的 count 个代币"""
+        with self._lock:
+            removed, self._tokens = self._tokens[-count:], self._tokens[:-count]
+            self._body = None
+        return [token['alphaId'] for token in removed]
+
+    def modify(self, count: int = 1) -> List[str]:
+        """随机修改 count 个代币的名称"""
+        with self._lock:
+            picked = random.sample(range(len(self._tokens)), min(count, len(self._tokens)))
+            for i in picked:
+                self._tokens[i] = {**self._tokens[i], "name": f"{self._tokens[i]['name']} v{int(time.time())}"}
+            self._body = None
+            return [self._tokens[i]['alphaId'] for i in picked]
+
+    def token_count(self) -> int:
+        with self._lock:
+            return len(self._tokens)
+
+    def body(self) -> bytes:
+        """当前列表的响应体, 同时记录新币第一次被返回的时间"""
+        with self._lock:
+            if self._body is None:
+                self._body = json.dumps({
+                    "code": "000000", "message": None, "messageDetail": None,
+                    "data": self._tokens, "success": True
+                }, separators=(',', ':')).encode()
+            body, unserved, self._unserved = self._body, self._unserved, {}
+        now = time.time()
+        for alpha_id in unserved:
+            self.listings[alpha_id]["first_served"] = now
+        return body
+
+    def apply(self, event: dict):
+        """执行一个脚本事件"""
+        action = event.get('action')
+        if action == 'list':
+            self.list_tokens(event.get('count', 1))
+        elif action == 'delist':
+            self.delist(event.get('count', 1))
+        elif action == 'modify':
+            self.modify(event.get('count', 1))
+        elif action == 'faults':
+            self.faults.update({k: v for k, v in event.items() if k in FAULTS})
+
+    def run_script(self, events: List[dict]):
+        """后台按时间执行脚本事件"""
+        def run():
+            start = time.time()
+            for event in sorted(events, key=lambda e: e.get('at', 0)):
+                time.sleep(max(0.0, start + event.get('at', 0) - time.time()))
+                self.apply(event)
+        threading.Thread(target=run, daemon=True).start()
+
+
+def make_handler(market: AlphaMarket):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status: int, body: bytes, headers: dict = None):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, data, status: int = 200):
+            self._send(status, json.dumps(data).encode())
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/_control/listings':
+                return self._json(market.listings)
+            if url.path == '/_control/stats':
+                return self._json({**market.stats, "tokens": market.token_count(), "faults": market.faults})
+            if url.path.startswith('/_control/'):
+                return self._json({"error": "not found"}, 404)
+
+            faults = market.faults
+            market.stats["requests"] += 1
+            delay = faults["latency"] + random.uniform(0, faults["jitter"])
+            if random.random() < faults["slow_rate"]:
+                market.stats["slow"] += 1
+                delay = faults["slow_latency"]
+            time.sleep(delay)
+
+            if random.random() < faults["error_rate"]:
+                market.stats["errors"] += 1
+                status = int(faults["error_status"])
+                headers = {'Retry-After': '5'} if status == 429 else None
+                return self._send(status, b'{"code":"error"}', headers)
+            if random.random() < faults["bad_code_rate"]:
+                market.stats["bad_code"] += 1
+                return self._json({"code": "100001", "message": "system busy", "data": None, "success": False})
+            self._send(200, market.body())
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            count = int(query.get('count', ['1'])[0])
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}') if length else {}
+            if url.path == '/_control/list':
+                return self._json({"listed": market.list_tokens(count)})
+            if url.path == '/_control/delist':
+                return self._json({"delisted": market.delist(count)})
+            if url.path == '/_control/modify':
+                return self._json({"modified": market.modify(count)})
+            if url.path == '/_control/faults':
+                market.apply({"action": "faults", **payload})
+                return self._json(market.faults)
+            self._json({"error": "not found"}, 404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(market: AlphaMarket, port: int = 0) -> ThreadingHTTPServer:
+    """在后台线程启动服务, port=0 时自动分配端口 (server.server_port)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(market))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模拟币安 Alpha 代币列表接口")
+    parser.add_argument('--port', type=int, default=5060)
+    parser.add_argument('--tokens', type=int, default=1000, help='初始代币数')
+    parser.add_argument('--script', help='上新 / 故障事件脚本 (JSON)')
+    for name, default in FAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+
+    market = AlphaMarket(args.tokens, {name: getattr(args, name) for name in FAULTS})
+    if args.script:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            market.run_script(json.load(f))
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(market))
+    print(f"🧪 模拟 Alpha 接口: http://127.0.0.1:{args.port}/bapi/defi/v1/public/wallet-direct/buw/wallet/cex/alpha/all/token/list")
+    print(f"   控制接口: http://127.0.0.1:{args.port}/_control/stats")
+    server.serve_forever()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地信息补充桩服务 (测试 enrichment 用)
+
+    python3 harness/mock_enrich.py --port 5055 --delay 0.2
+
+config.json 中配置:
+    "enrichment": {"enabled": true, "url": "http://127.0.0.1:5055/token?chain={chain}&contract={contract}"}
+
+--delay 为每个请求的固定延迟 (秒), --slow-ratio 为随机变慢的比例 (慢请求延迟 --slow-delay 秒),
+用于验证超出预算时降级为普通消息。
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_handler(args):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/token':
+                self.send_error(404)
+                return
+            query = parse_qs(url.query)
+            contract = query.get('contract', [''])[0]
+
+            delay = args.delay
+            if random.random() < args.slow_ratio:
+                delay = args.slow_delay
+            time.sleep(delay)
+
+            # 按合约生成稳定的假数据
+            seed = int(hashlib.md5(contract.encode()).hexdigest()[:8], 16)
+            body = json.dumps({
+                "code": "000000",
+                "data": {
+                    "chain": query.get('chain', [''])[0],
+                    "contract": contract,
+                    "price": round((seed % 100000) / 1e4, 4),
+                    "liquidity": seed % 5000000,
+                    "holders": seed % 20000,
+                    "marketCap": seed % 50000000
+                }
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="信息补充桩服务")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--delay', type=float, default=0.05)
+    parser.add_argument('--slow-ratio', type=float, default=0.0)
+    parser.add_argument('--slow-delay', type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(args))
+    print(f"🧪 信息补充桩服务: http://127.0.0.1:{args.port}/token?chain=56&contract=0x...")
+    server.serve_forever()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+最小的 Redis 兼容服务 (RESP 协议, 内存存储, 多节点测试用)
+支持 cluster.py 的 redis 后端用到的命令:
+
+    PING AUTH SELECT GET SET [NX|XX] [EX s|PX ms] DEL EXISTS INCR PEXPIRE PTTL
+    WATCH UNWATCH MULTI EXEC DISCARD
+
+    python3 harness/mock_redis.py --port 6390
+    # config.json: "cluster": {"backend": "redis", "url": "redis://127.0.0.1:6390/0"}
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class Store:
+    """键值与过期时间; 每个键有版本号, 供 WATCH 检测改写"""
+
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.versions: Dict[bytes, int] = {}
+        self.lock = threading.RLock()
+
+    def _touch(self, key: bytes):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            self._touch(key)
+            return None
+        return value
+
+    def set(self, key: bytes, value: bytes, expires_at: Optional[float] = None):
+        self.data[key] = (value, expires_at)
+        self._touch(key)
+
+    def delete(self, key: bytes) -> bool:
+        if self.get(key) is None:
+            return False
+        del self.data[key]
+        self._touch(key)
+        return True
+
+    def version(self, key: bytes) -> int:
+        self.get(key)  # 过期的键在此清除, 版本随之变化
+        return self.versions.get(key, 0)
+
+
+class Error(Exception):
+    pass
+
+
+def run_command(store: Store, args: list):
+    """执行一条普通命令 (调用方持有 store.lock), 返回 RESP 值"""
+    name = args[0].upper()
+    if name == b'PING':
+        return 'PONG'
+    if name in (b'AUTH', b'SELECT'):
+        return 'OK'
+    if name == b'GET':
+        return store.get(args[1])
+    if name == b'SET':
+        key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+        expires_at = None
+        for unit, scale in ((b'EX', 1), (b'PX', 0.001)):
+            if unit in options:
+                expires_at = time.time() + int(args[3 + options.index(unit) + 1]) * scale
+        exists = store.get(key) is not None
+        if (b'NX' in options and exists) or (b'XX' in options and not exists):
+            return None
+        store.set(key, value, expires_at)
+        return 'OK'
+    if name == b'DEL':
+        return sum(store.delete(key) for key in args[1:])
+    if name == b'EXISTS':
+        return sum(store.get(key) is not None for key in args[1:])
+    if name == b'INCR':
+        try:
+            value = int(store.get(args[1]) or 0) + 1
+        except ValueError:
+            raise Error("ERR value is not an integer or out of range")
+        store.set(args[1], str(value).encode(), store.data.get(args[1], (None, None))[1])
+        return value
+    if name == b'PEXPIRE':
+        value = store.get(args[1])
+        if value is None:
+            return 0
+        store.set(args[1], value, time.time() + int(args[2]) / 1000)
+        return 1
+    if name == b'PTTL':
+        if store.get(args[1]) is None:
+            return -2
+        expires_at = store.data[args[1]][1]
+        return -1 if expires_at is None else int((expires_at - time.time()) * 1000)
+    raise Error(f"ERR unknown command '{name.decode(errors='replace')}'")
+
+
+def encode(value) -> bytes:
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, Error):
+        return b'-%s\r\n' % str(value).encode()
+    if isinstance(value, str):
+        return b'+%s\r\n' % value.encode()
+    if isinstance(value, bool) or isinstance(value, int):
+        return b':%d\r\n' % int(value)
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    if isinstance(value, list):
+        return b'*%d\r\n' % len(value) + b''.join(encode(item) for item in value)
+    raise TypeError(type(value))
+
+
+def make_handler(store: Store):
+    class Handler(socketserver.StreamRequestHandler):
+
+        def read_command(self) -> Optional[list]:
+            line = self.rfile.readline()
+            if not line:
+                return None
+            if not line.startswith(b'*'):
+                return line.split()  # inline 命令 (telnet / redis-cli 调试)
+            args = []
+            for _ in range(int(line[1:-2])):
+                size = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(size + 2)[:-2])
+            return args
+
+        def handle(self):
+            watched: Dict[bytes, int] = {}
+            queued = None  # MULTI 之后排队的命令
+            while True:
+                try:
+                    args = self.read_command()
+                except (OSError, ValueError):
+                    return
+                if args is None:
+                    return
+                if not args:
+                    continue
+                name = args[0].upper()
+                with store.lock:
+                    if name == b'MULTI':
+                        reply = Error("ERR MULTI calls can not be nested") if queued is not None else 'OK'
+                        if queued is None:
+                            queued = []
+                    elif name == b'EXEC':
+                        if queued is None:
+                            reply = Error("ERR EXEC without MULTI")
+                        elif any(store.version(key) != version for key, version in watched.items()):
+                            reply = None
+                        else:
+                            reply = []
+                            for command in queued:
+                                try:
+                                    reply.append(run_command(store, command))
+                                except Error as e:
+                                    reply.append(e)
+                        queued = None
+                        watched.clear()
+                    elif name == b'DISCARD':
+                        reply = Error("ERR DISCARD without MULTI") if queued is None else 'OK'
+                        queued = None
+                        watched.clear()
+                    elif name == b'WATCH':
+                        for key in args[1:]:
+                            watched[key] = store.version(key)
+                        reply = 'OK'
+                    elif name == b'UNWATCH':
+                        watched.clear()
+                        reply = 'OK'
+                    elif queued is not None:
+                        queued.append(args)
+                        reply = 'QUEUED'
+                    else:
+                        try:
+                            reply = run_command(store, args)
+                        except (Error, IndexError, ValueError) as e:
+                            reply = e if isinstance(e, Error) else Error("ERR syntax error")
+                try:
+                    self.wfile.write(encode(reply))
+                except OSError:
+                    return
+
+    return Handler
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(store: Store = None, port: int = 0) -> Server:
+    """在后台线程启动服务, port=0 时自动分配端口 (server.server_address[1])"""
+    server = Server(('127.0.0.1', port), make_handler(store or Store()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="最小 Redis 兼容服务")
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+
+    server = Server(('127.0.0.1', args.port), make_handler(Store()))
+    print(f"🧪 模拟 Redis: redis://127.0.0.1:{args.port}/0")
+    server.serve_forever()
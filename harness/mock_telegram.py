@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模拟 Telegram Bot API (压测用)
+POST /bot<token>/sendMessage, 按 Telegram 的限制做频率控制, 超出时返回 429 与 parameters.retry_after:
+
+    同一私聊     约 1 条/秒
+    同一群组     20 条/分钟 (chat_id 以 - 开头)
+    同一 bot     约 30 条/秒 (所有会话合计)
+
+bot_token 含 invalid 时返回 401, chat_id 为 missing 时返回 400 (chat not found)。
+收到的消息按 "Alpha ID:</b> xxx" 解析出代币, 记录接收时间:
+
+    GET /_stats                      接收 / 限流 / 错误计数
+    GET /_received?since=0           接收记录 [[时间, bot id, chat_id, 代币], ...]
+
+    python3 harness/mock_telegram.py --port 5061
+    # 推送目标配置 "api_base": "http://127.0.0.1:5061"
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+TOKEN_PATTERN = re.compile(r'Alpha ID:</b> (\S+)')
+
+LIMITS = {
+    "chat_rate": 1.0,        # 私聊 条/秒
+    "chat_burst": 3,
+    "group_rate": 20 / 60,   # 群组 条/秒
+    "group_burst": 20,
+    "bot_rate": 30.0,        # 单个 bot 条/秒
+    "bot_burst": 30,
+}
+
+
+class Bucket:
+    """令牌桶"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """取一个令牌; 成功返回 0, 否则返回需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class TelegramMock:
+    """频率控制与接收记录"""
+
+    def __init__(self, limits: dict = None, latency: float = 0.02, error_rate: float = 0.0):
+        self.limits = {**LIMITS, **(limits or {})}
+        self.latency = latency
+        self.error_rate = error_rate
+        self._buckets: Dict[Tuple[str, str], Bucket] = {}
+        self._lock = threading.Lock()
+        self.received: List[tuple] = []  # (时间, bot id, chat_id, 代币)
+        self.stats = {"received": 0, "rate_limited": 0, "unauthorized": 0, "bad_request": 0, "errors": 0}
+
+    def _bucket(self, kind: str, key: str) -> Bucket:
+        bucket = self._buckets.get((kind, key))
+        if bucket is None:
+            bucket = self._buckets[(kind, key)] = Bucket(self.limits[f"{kind}_rate"], self.limits[f"{kind}_burst"])
+        return bucket
+
+    def admit(self, bot: str, chat: str) -> float:
+        """频率检查, 返回 0 表示放行, 否则为 retry_after 秒数 (被拒的请求不消耗令牌)"""
+        kind = 'group' if chat.startswith('-') else 'chat'
+        with self._lock:
+            chat_bucket, bot_bucket = self._bucket(kind, chat), self._bucket('bot', bot)
+            wait = chat_bucket.take()
+            if wait:
+                return wait
+            wait = bot_bucket.take()
+            if wait:
+                chat_bucket.tokens += 1
+            return wait
+
+    def handle(self, bot_token: str, payload: dict) -> Tuple[int, dict]:
+        """处理一次 sendMessage, 返回 (状态码, 响应体)"""
+        time.sleep(self.latency)
+        if 'invalid' in bot_token:
+            self.stats["unauthorized"] += 1
+            return 401, {"ok": False, "error_code": 401, "description": "Unauthorized"}
+        chat = str(payload.get('chat_id', ''))
+        if not chat or chat == 'missing' or not payload.get('text'):
+            self.stats["bad_request"] += 1
+            return 400, {"ok": False, "error_code": 400, "description": "Bad Request: chat not found"}
+        if random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return 502, {"ok": False, "error_code": 502, "description": "Bad Gateway"}
+        bot = bot_token.split(':')[0]
+        wait = self.admit(bot, chat)
+        if wait:
+            self.stats["rate_limited"] += 1
+            retry_after = max(1, math.ceil(wait))
+            return 429, {"ok": False, "error_code": 429,
+                         "description": f"Too Many Requests: retry after {retry_after}",
+                         "parameters": {"retry_after": retry_after}}
+        match = TOKEN_PATTERN.search(payload['text'])
+        with self._lock:
+            self.received.append((time.time(), bot, chat, match.group(1) if match else None))
+            self.stats["received"] += 1
+            message_id = len(self.received)
+        return 200, {"ok": True, "result": {"message_id": message_id, "chat": {"id": chat},
+                                            "date": int(time.time()), "text": payload['text']}}
+
+    def received_since(self, index: int = 0) -> List[tuple]:
+        with self._lock:
+            return self.received[index:]
+
+
+def make_handler(mock: TelegramMock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _json(self, data, status: int = 200):
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/_stats':
+                return self._json({**mock.stats, "limits": mock.limits})
+            if url.path == '/_received':
+                since = int(parse_qs(url.query).get('since', ['0'])[0])
+                return self._json(mock.received_since(since))
+            self._json({"ok": False, "error_code": 404, "description": "Not Found"}, 404)
+
+        def do_POST(self):
+            match = re.match(r'^/bot([^/]+)/sendMessage$', urlparse(self.path).path)
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            if not match:
+                return self._json({"ok": False, "error_code": 404, "description": "Not Found"}, 404)
+            payload = self._payload(raw)
+            if payload is None:
+                return self._json({"ok": False, "error_code": 400, "description": "Bad Request"}, 400)
+            status, body = mock.handle(match.group(1), payload)
+            self._json(body, status)
+
+        def _payload(self, raw: bytes) -> Optional[dict]:
+            """JSON 或表单请求体"""
+            if 'json' in (self.headers.get('Content-Type') or ''):
+                try:
+                    return json.loads(raw)
+                except ValueError:
+                    return None
+            return {key: values[0] for key, values in parse_qs(raw.decode('utf-8')).items()}
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(mock: TelegramMock, port: int = 0) -> ThreadingHTTPServer:
+    """在后台线程启动服务, port=0 时自动分配端口 (server.server_port)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模拟 Telegram Bot API")
+    parser.add_argument('--port', type=int, default=5061)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 502 的比例')
+    for name, default in LIMITS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=default)
+    args = parser.parse_args()
+
+    mock = TelegramMock({name: getattr(args, name) for name in LIMITS}, args.latency, args.error_rate)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(mock))
+    print(f"🧪 模拟 Telegram: api_base = http://127.0.0.1:{args.port}")
+    server.serve_forever()
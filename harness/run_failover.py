@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+主备切换演练: 两个监控节点共用租约后端, 上新过程中杀掉主节点
+两个节点各自使用独立的运行目录 (相当于两台主机), 只通过 cluster 后端协调;
+统计接管耗时, 并检查每个 (代币, 目标) 都收到了; 投递是至少一次, 主节点被杀时在途的消息
+会由新主节点再发一次, 所以允许每个目标最多重复一条, 超出即为异常。
+
+    python3 harness/run_failover.py                       # 共享 SQLite 文件
+    python3 harness/run_failover.py --backend redis       # harness/mock_redis.py
+    python3 harness/run_failover.py --signal term         # SIGTERM 停止
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import mock_alpha  # noqa: E402
+import mock_redis  # noqa: E402
+import mock_telegram  # noqa: E402
+from run_load import ALPHA_PATH, free_port, prepare, wait_for  # noqa: E402
+
+
+class Node:
+    """一个监控节点 (独立运行目录的 app.py 子进程)"""
+
+    def __init__(self, name: str, args, cluster: dict, alpha_url: str, telegram_url: str):
+        self.name = name
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.workdir = prepare(args, self.port, alpha_url, telegram_url)
+        config_path = os.path.join(self.workdir, 'config_files', 'config.json')
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        config["cluster"] = {**cluster, "node": name}
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+        self.log = open(os.path.join(self.workdir, 'monitor.out'), 'w')
+        self.process = subprocess.Popen([sys.executable, os.path.join(self.workdir, 'src', 'app.py')],
+                                        cwd=self.workdir, stdout=self.log, stderr=subprocess.STDOUT,
+                                        env={**os.environ, 'PYTHONUNBUFFERED': '1'})
+
+    def cluster(self) -> dict:
+        return requests.get(f"{self.base_url}/api/cluster", timeout=2).json()
+
+    def is_leader(self) -> bool:
+        return self.process.poll() is None and self.cluster().get('is_leader', False)
+
+    def stop(self, sig=signal.SIGTERM):
+        if self.process.poll() is None:
+            self.process.send_signal(sig)
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.log.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='主备切换演练')
+    parser.add_argument('--backend', choices=('sqlite', 'redis'), default='sqlite')
+    parser.add_argument('--signal', choices=('kill', 'term'), default='kill', help='kill 模拟崩溃 (SIGKILL), term 为 SIGTERM')
+    parser.add_argument('--tokens', type=int, default=500)
+    parser.add_argument('--targets', type=int, default=5)
+    parser.add_argument('--events', type=int, default=12, help='上新次数 (过半时切换)')
+    parser.add_argument('--every', type=float, default=2, help='上新间隔 (秒)')
+    parser.add_argument('--interval', type=float, default=5, help='监控轮询间隔 check_interval (秒)')
+    parser.add_argument('--ttl', type=float, default=3, help='租约 TTL (秒), 应小于轮询间隔')
+    parser.add_argument('--drain', type=float, default=60)
+    parser.add_argument('--keep', action='store_true', help='保留临时运行目录')
+    args = parser.parse_args(argv)
+    # make_config 需要的其余压测参数
+    args.bots, args.groups, args.send_interval, args.lanes = 1, False, 1, 16
+
+    market = mock_alpha.AlphaMarket(args.tokens, {"latency": 0.02})
+    telegram = mock_telegram.TelegramMock()
+    alpha_server = mock_alpha.serve(market)
+    telegram_server = mock_telegram.serve(telegram)
+    alpha_url = f"http://127.0.0.1:{alpha_server.server_port}{ALPHA_PATH}"
+    telegram_url = f"http://127.0.0.1:{telegram_server.server_port}"
+
+    shared = tempfile.mkdtemp(prefix='alpha-cluster-')
+    redis_server = None
+    if args.backend == 'redis':
+        redis_server = mock_redis.serve()
+        cluster = {"backend": "redis", "url": f"redis://127.0.0.1:{redis_server.server_address[1]}/0"}
+    else:
+        cluster = {"backend": "sqlite", "path": os.path.join(shared, 'cluster.db')}
+    cluster["ttl"] = args.ttl
+
+    nodes = []
+    try:
+        nodes.append(Node('node-a', args, cluster, alpha_url, telegram_url))
+        if not wait_for(nodes[0].is_leader, 60) or \
+                not wait_for(lambda: requests.get(f"{nodes[0].base_url}/api/state", timeout=2).json().get('token_count'), 60):
+            print(f"❌ node-a 未当选或未完成首轮检查, 见 {nodes[0].workdir}/monitor.out")
+            return 1
+        nodes.append(Node('node-b', args, cluster, alpha_url, telegram_url))
+        if not wait_for(lambda: requests.get(f"{nodes[1].base_url}/api/state", timeout=2).json().get('token_count'), 60):
+            print(f"❌ node-b 未同步到状态, 见 {nodes[1].workdir}/monitor.out")
+            return 1
+        print(f"✓ node-a 为主节点, node-b 已同步状态 ({args.backend}, ttl={args.ttl}s, 轮询 {args.interval}s)")
+
+        listed = []
+        took_over = {}
+
+        def watch_takeover(killed_at: float):
+            if wait_for(nodes[1].is_leader, args.drain, interval=0.1):
+                took_over["seconds"] = time.time() - killed_at
+                print(f"  ✓ node-b 已接管, 耗时 {took_over['seconds']:.1f}s")
+
+        watcher = None
+        for i in range(args.events):
+            listed += market.list_tokens(1)
+            if i == args.events // 2:
+                nodes[0].stop(signal.SIGKILL if args.signal == 'kill' else signal.SIGTERM)
+                print(f"  ✂ 已停止 node-a ({args.signal}), 等待 node-b 接管")
+                watcher = threading.Thread(target=watch_takeover, args=(time.time(),), daemon=True)
+                watcher.start()
+            time.sleep(args.every)
+        watcher.join()
+        failover = took_over.get("seconds")
+
+        expected = {(token, str(100000 + j)) for token in listed for j in range(args.targets)}
+        counts = lambda: Counter((r[3], r[2]) for r in telegram.received_since(0) if r[3] in set(listed))  # noqa: E731
+        wait_for(lambda: expected <= set(counts()), args.drain, interval=1)
+        received = counts()
+        missing = expected - set(received)
+        duplicated = {key: n for key, n in received.items() if n > 1}
+        # 切换时每个目标最多一条在途消息被重发
+        per_target = Counter(chat for _, chat in duplicated)
+        excess = any(n > 2 for n in duplicated.values()) or any(n > 1 for n in per_target.values())
+
+        print(f"\n接管耗时: {'未接管' if failover is None else f'{failover:.1f}s'} (轮询间隔 {args.interval}s)")
+        print(f"投递: 应收 {len(expected)}, 实收 {sum(received.values())}, 缺失 {len(missing)}, "
+              f"重复 {len(duplicated)}" + (f" ({'超出在途窗口' if excess else '均为切换时的在途消息'})" if duplicated else ''))
+        for token, chat in sorted(missing)[:10]:
+            print(f"  缺失 {token} -> {chat}")
+        for (token, chat), n in sorted(duplicated.items())[:10]:
+            print(f"  重复 {token} -> {chat}: {n} 次")
+        print(f"node-b: {json.dumps(nodes[1].cluster(), ensure_ascii=False)}")
+        return 0 if failover is not None and not missing and not excess else 2
+    finally:
+        for node in nodes:
+            node.stop()
+        alpha_server.shutdown()
+        telegram_server.shutdown()
+        if redis_server:
+            redis_server.shutdown()
+        if args.keep:
+            print(f"运行目录: {shared} {' '.join(node.workdir for node in nodes)}")
+        else:
+            for path in [shared] + [node.workdir for node in nodes]:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
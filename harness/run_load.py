@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+端到端压测: 模拟 Alpha 接口 + 模拟 Telegram + 真实的监控进程
+把 src/ 复制到临时目录, 写入指向两个模拟服务的配置 (数千代币、数百推送目标),
+启动 app.py 子进程, 待首轮建立基线后按节奏上新, 统计每条投递从上线 / 首次返回到
+Telegram 收到的延迟百分位与吞吐, 以及监控进程自己的分阶段延迟 (/api/latency)。
+
+    python3 harness/run_load.py --tokens 5000 --targets 200 --events 10 --burst 2
+    python3 harness/run_load.py --targets 300 --groups --error-rate 0.05 --out data/load_report.json
+
+指标:
+    listing_to_delivery   上线 (listingTime) -> Telegram 收到, 含轮询间隔的等待
+    served_to_delivery    接口首次返回该代币 -> Telegram 收到 (检测到投递)
+    fanout                每个代币第一个目标收到 -> 最后一个目标收到
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import mock_alpha  # noqa: E402
+import mock_telegram  # noqa: E402
+from tracing import percentile  # noqa: E402
+
+ALPHA_PATH = '/bapi/defi/v1/public/wallet-direct/buw/wallet/cex/alpha/all/token/list'
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def summarize(values: List[float]) -> dict:
+    """{count, p50, p90, p99, max} (秒)"""
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 3),
+        "p90": round(percentile(values, 90), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(values[-1], 3)
+    }
+
+
+def make_config(args, port: int, alpha_url: str, telegram_url: str) -> dict:
+    """压测用配置: 全部推送目标指向模拟 Telegram"""
+    targets = []
+    for i in range(args.targets):
+        chat = f"-100{1000000000 + i}" if args.groups else str(100000 + i)
+        targets.append({
+            "name": f"load-{i:04d}",
+            "type": "telegram",
+            "bot_token": f"{700000 + i % args.bots}:LOADTEST",
+            "chat_id": chat,
+            "api_base": telegram_url,
+            "enabled": True
+        })
+    return {
+        "webui_port": port,
+        "check_interval": args.interval,
+        "notify_method": "telegram",
+        "notify_targets": targets,
+        "alpha_endpoints": [alpha_url],
+        "outbox": {"send_interval": args.send_interval, "max_lanes": args.lanes},
+        "logging": {"level": "WARNING"}
+    }
+
+
+def prepare(args, port: int, alpha_url: str, telegram_url: str) -> str:
+    """临时运行目录: src/ 副本 + config_files/config.json"""
+    workdir = tempfile.mkdtemp(prefix='alpha-load-')
+    shutil.copytree(os.path.join(ROOT, 'src'), os.path.join(workdir, 'src'),
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    os.makedirs(os.path.join(workdir, 'config_files'))
+    with open(os.path.join(workdir, 'config_files', 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(make_config(args, port, alpha_url, telegram_url), f, indent=2)
+    return workdir
+
+
+def wait_for(predicate, timeout: float, interval: float = 0.5) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if predicate():
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(interval)
+    return False
+
+
+def report(market, telegram, listed: List[str], targets: int, base_url: str, elapsed: float) -> dict:
+    """汇总投递延迟与吞吐"""
+    listed_set = set(listed)
+    first: Dict[tuple, float] = {}  # (代币, chat) -> 第一次收到的时间 (重复投递只算一次)
+    for at, _, chat, token in telegram.received_since(0):
+        if token in listed_set and (token, chat) not in first:
+            first[(token, chat)] = at
+
+    since_listing, since_served = [], []
+    per_token: Dict[str, List[float]] = {}
+    for (token, _), at in first.items():
+        info = market.listings[token]
+        since_listing.append(at - info["listed_at"])
+        if info["first_served"] is not None:
+            since_served.append(at - info["first_served"])
+        per_token.setdefault(token, []).append(at)
+
+    times = sorted(first.values())
+    span = times[-1] - times[0] if len(times) > 1 else 0
+    expected = len(listed) * targets
+    result = {
+        "tokens_listed": len(listed),
+        "targets": targets,
+        "deliveries": {"expected": expected, "delivered": len(first),
+                       "duplicates": sum(1 for r in telegram.received_since(0) if r[3] in listed_set) - len(first)},
+        "listing_to_delivery": summarize(since_listing),
+        "served_to_delivery": summarize(since_served),
+        "first_target": summarize([min(v) - market.listings[t]["listed_at"] for t, v in per_token.items()]),
+        "fanout": summarize([max(v) - min(v) for v in per_token.values()]),
+        "throughput": {
+            "deliveries_per_second": round(len(first) / span, 2) if span else None,
+            "overall_per_second": round(len(first) / elapsed, 2) if elapsed else None
+        },
+        "telegram": dict(telegram.stats),
+        "alpha_api": dict(market.stats),
+    }
+    try:
+        result["monitor_latency"] = requests.get(f"{base_url}/api/latency?limit=1", timeout=5).json()["summary"]
+        result["outbox"] = requests.get(f"{base_url}/api/outbox?limit=0", timeout=5).json()["stats"]
+        result["breakers"] = requests.get(f"{base_url}/api/breakers", timeout=5).json()
+        result["startup"] = requests.get(f"{base_url}/api/startup", timeout=5).json()["phases"]
+    except (requests.RequestException, ValueError, KeyError) as e:
+        result["monitor_error"] = str(e)
+    for stage in list((result.get("monitor_latency") or {})):
+        if stage.startswith('ack:'):
+            del result["monitor_latency"][stage]
+    return result
+
+
+def print_report(result: dict):
+    def line(name, s):
+        if not s.get("count"):
+            print(f"  {name:<22} -")
+            return
+        print(f"  {name:<22} n={s['count']:<6} p50={s['p50']:<8} p90={s['p90']:<8} p99={s['p99']:<8} max={s['max']}")
+
+    d = result["deliveries"]
+    print(f"\n📊 投递: {d['delivered']}/{d['expected']} (重复 {d['duplicates']}), "
+          f"{result['tokens_listed']} 个新币 × {result['targets']} 个目标")
+    print("延迟 (秒):")
+    line("上线 -> 收到", result["listing_to_delivery"])
+    line("首次返回 -> 收到", result["served_to_delivery"])
+    line("上线 -> 第一个目标", result["first_target"])
+    line("扇出 (首个 -> 最后)", result["fanout"])
+    t = result["throughput"]
+    print(f"吞吐: {t['deliveries_per_second']} 条/秒 (投递期间), {t['overall_per_second']} 条/秒 (全程)")
+    tg = result["telegram"]
+    print(f"Telegram: 收到 {tg['received']}, 限流 429 {tg['rate_limited']}, 502 {tg['errors']}")
+    api = result["alpha_api"]
+    print(f"Alpha 接口: 请求 {api['requests']}, 注入错误 {api['errors']}, 错误码 {api['bad_code']}, 慢响应 {api['slow']}")
+    if result.get("monitor_latency"):
+        print("监控进程分阶段延迟 (秒):")
+        for stage, s in result["monitor_latency"].items():
+            line(stage, s)
+    if result.get("outbox"):
+        print(f"发件箱: {result['outbox']}")
+    if result.get("startup"):
+        print("启动耗时: " + ', '.join(f"{phase} {seconds}s" for phase, seconds in result["startup"].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="端到端压测 (模拟 Alpha + 模拟 Telegram)")
+    parser.add_argument('--tokens', type=int, default=5000, help='初始代币数')
+    parser.add_argument('--targets', type=int, default=200, help='推送目标数')
+    parser.add_argument('--bots', type=int, default=1, help='目标分摊到几个 bot (每个 bot 约 30 条/秒)')
+    parser.add_argument('--groups', action='store_true', help='目标为群组 (20 条/分钟)')
+    parser.add_argument('--events', type=int, default=10, help='上新次数')
+    parser.add_argument('--burst', type=int, default=2, help='每次上新的代币数')
+    parser.add_argument('--every', type=float, default=5, help='上新间隔 (秒)')
+    parser.add_argument('--interval', type=float, default=2, help='监控轮询间隔 check_interval (秒)')
+    parser.add_argument('--send-interval', type=float, default=2, help='发件箱同一目标的发送间隔 (秒)')
+    parser.add_argument('--lanes', type=int, default=64, help='发件箱并发发送通道数')
+    parser.add_argument('--latency', type=float, default=0.05, help='Alpha 接口延迟 (秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Alpha 接口 HTTP 500 比例')
+    parser.add_argument('--telegram-error-rate', type=float, default=0.0, help='Telegram 502 比例')
+    parser.add_argument('--drain', type=float, default=300, help='上新结束后等待投递完成的最长时间 (秒)')
+    parser.add_argument('--out', help='报告写入 JSON 文件')
+    parser.add_argument('--keep', action='store_true', help='保留临时运行目录 (日志 / 发件箱)')
+    args = parser.parse_args(argv)
+
+    market = mock_alpha.AlphaMarket(args.tokens, {"latency": args.latency, "error_rate": args.error_rate})
+    telegram = mock_telegram.TelegramMock(error_rate=args.telegram_error_rate)
+    alpha_server = mock_alpha.serve(market)
+    telegram_server = mock_telegram.serve(telegram)
+    alpha_url = f"http://127.0.0.1:{alpha_server.server_port}{ALPHA_PATH}"
+    telegram_url = f"http://127.0.0.1:{telegram_server.server_port}"
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    workdir = prepare(args, port, alpha_url, telegram_url)
+    print(f"🧪 运行目录: {workdir}")
+    print(f"   模拟 Alpha: {alpha_url} ({args.tokens} 个代币)")
+    print(f"   模拟 Telegram: {telegram_url} ({args.targets} 个目标, {args.bots} 个 bot)")
+
+    log = open(os.path.join(workdir, 'monitor.out'), 'w')
+    process = subprocess.Popen([sys.executable, os.path.join(workdir, 'src', 'app.py')], cwd=workdir,
+                               stdout=log, stderr=subprocess.STDOUT, env={**os.environ, 'PYTHONUNBUFFERED': '1'})
+    try:
+        # 首轮只建立基线, 之后再上新
+        if not wait_for(lambda: requests.get(f"{base_url}/api/state", timeout=2).json().get('token_count'), 120):
+            print(f"❌ 监控进程未完成首轮检查, 见 {workdir}/monitor.out")
+            return 1
+        print("✓ 监控进程已建立基线, 开始上新")
+
+        start = time.time()
+        listed: List[str] = []
+        for i in range(args.events):
+            listed += market.list_tokens(args.burst)
+            print(f"  上新 {i + 1}/{args.events}: 共 {len(listed)} 个, Telegram 已收到 {telegram.stats['received']}")
+            time.sleep(args.every)
+
+        expected = len(listed) * args.targets
+        listed_set = set(listed)
+        delivered = lambda: len({(r[3], r[2]) for r in telegram.received_since(0) if r[3] in listed_set})  # noqa: E731
+        deadline = time.time() + args.drain
+        while time.time() < deadline and delivered() < expected:
+            print(f"  等待投递: {delivered()}/{expected}, 429 {telegram.stats['rate_limited']}")
+            time.sleep(5)
+        elapsed = time.time() - start
+
+        result = report(market, telegram, listed, args.targets, base_url, elapsed)
+        result["config"] = {k: v for k, v in vars(args).items() if k not in ('out', 'keep')}
+        print_report(result)
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+            print(f"\n报告: {args.out}")
+        return 0 if result["deliveries"]["delivered"] >= expected else 2
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+        alpha_server.shutdown()
+        telegram_server.shutdown()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
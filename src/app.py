@@ -6,27 +6,72 @@ NTX Binance Alpha Monitor
 实时监控币安 Alpha 新增代币
 """
 
+import hashlib
 import json
 import os
+import sys
 import threading
 import time
 import logging
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import requests
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, send_from_directory
+from flask.json import JSONEncoder
+
+from changefeed import ChangeFeed
+from events import EventRing, options_from as event_options
+from httpcache import JSONResponder
+from cluster import StateMirror, get_cluster
+from changes import ChangeDetector, ChangeSet, describe
+from hedge import Cancelled, HedgedFetcher
+from history import HistoryStore, options_from as history_options
+from resilience import (
+    AUTH, RATE_LIMIT, SERVER, BreakerRegistry, Failure, RetryTracker, UpstreamError, classify_exception, classify_status,
+    retry_after_header
+)
+from logsetup import setup_logging
+from outbox import Outbox, SendResult, delivery_key, options_from as outbox_options
+from streamjson import ArrayStream
+from records import AlphaToken, pack_records, to_jsonable, unpack_records
+from leader import FileLease, LeaderElector, StateFollower
+from trigger import CheckTrigger
+from tracing import LatencyTracker, StartupTimer, ack, listing_time, mark, new_trace
+from enrich import get_enricher
+from filters import get_router, referenced_fields
+from notifiers import active_channels, get_notifier, notify_enabled
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
 
 # =============== 配置 ===============
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CONFIG_PATH = os.path.join(ROOT, "config_files", "config.json")
 STATE_PATH = os.path.join(ROOT, "data", "monitor_state.json")
+LOCK_PATH = os.path.join(ROOT, "data", "monitor.lock")
+METRICS_PATH = os.path.join(ROOT, "data", "metrics.prom")
+OUTBOX_PATH = os.path.join(ROOT, "data", "outbox.db")
+CHECK_PATH = os.path.join(ROOT, "data", "check_now.request")
+HISTORY_PATH = os.path.join(ROOT, "data", "history.db")
 LOGS_DIR = os.path.join(ROOT, "logs")
 
 # 币安 Alpha API
 BINANCE_ALPHA_API = "https://www.binance.com/bapi/defi/v1/public/wallet-direct/buw/wallet/cex/alpha/all/token/list"
 
+# 比对与推送用到的字段, 解析时只保留这些 (config.json 的 alpha_fields 可覆盖, ["*"] 表示保留全部)
+ALPHA_FIELDS = list(AlphaToken.FIELDS)
+
+# 变更检测关注的字段 (config.json 的 change_fields 可覆盖); 价格 / 市值每轮都在变, 不放进来
+CHANGE_FIELDS = [
+    'name', 'symbol', 'chainId', 'contractAddress', 'listingTime', 'onlineTime',
+    'offline', 'offsell', 'listingCex'
+]
+CHANGE_LABELS = {
+    'name': '名称', 'symbol': '代号', 'chainId': '链', 'contractAddress': '合约',
+    'listingTime': '上线时间', 'onlineTime': '开放时间',
+    'offline': '已下线', 'offsell': '停止交易', 'listingCex': '上架现货'
+}
+
 # 创建目录
 os.makedirs(os.path.join(ROOT, "config_files"), exist_ok=True)
 os.makedirs(os.path.join(ROOT, "data"), exist_ok=True)
@@ -34,28 +79,88 @@ os.makedirs(LOGS_DIR, exist_ok=True)
 
 # =============== 日志配置 ===============
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(LOGS_DIR, 'app.log')),
-        logging.StreamHandler()
-    ]
-)
+# 业务线程只入队, 后台线程写 JSON Lines 文件 (按大小 / 时间轮转)
+setup_logging(LOGS_DIR, source='alpha', config_path=CONFIG_PATH)
 logger = logging.getLogger(__name__)
 
 # =============== Flask 应用 ===============
 
 app = Flask(__name__, static_folder=os.path.join(ROOT, 'static'))
 
+
+class RecordJSONEncoder(JSONEncoder):
+    """jsonify 支持代币记录"""
+
+    def default(self, o):
+        if isinstance(o, AlphaToken):
+            return o.to_dict()
+        return super().default(o)
+
+
+app.json_encoder = RecordJSONEncoder
+
+# JSON 接口: 同一状态快照只序列化一次, 支持 gzip / br 压缩与 ETag (命中返回 304)
+responder = JSONResponder(lambda data: json.dumps(data, cls=RecordJSONEncoder, ensure_ascii=False,
+                                                  separators=(',', ':')).encode('utf-8'))
+
 # =============== 全局状态 ===============
 
 monitor_state = {
     "last_check": "",
     "tokens": [],
-    "token_count": 0
+    "token_count": 0,
+    "version": 0
 }
 
+# 变更流 (按 alphaId 标识代币)
+change_feed = ChangeFeed(key=lambda t: t.get('alphaId'))
+
+# 新币发现延迟 (最近 500 个)
+latency_tracker = LatencyTracker()
+
+# "立即检查": 唤醒监控循环, 并发的请求共用同一轮抓取
+check_trigger = CheckTrigger(CHECK_PATH)
+# 等待这一轮完成的最长时间 (秒)
+CHECK_TIMEOUT = 30
+
+# =============== 指标 ===============
+
+METRICS = Registry()
+FETCH_SECONDS = METRICS.histogram('monitor_fetch_seconds', '上游抓取耗时 (秒)', ['source'])
+FETCH_BYTES = METRICS.gauge('monitor_fetch_response_bytes', '最近一次上游响应大小 (字节)', ['source'])
+FETCH_ERRORS = METRICS.counter('monitor_fetch_errors_total', '上游抓取失败次数 (按错误类别)', ['source', 'kind'])
+FETCH_HEDGED = METRICS.counter('monitor_fetch_hedged_total', '发起对冲请求次数', ['endpoint'])
+FETCH_WINS = METRICS.counter('monitor_fetch_endpoint_wins_total', '各接口胜出次数', ['endpoint'])
+TOKEN_COUNT = METRICS.gauge('monitor_tokens', '最近一次获取的代币数', ['source'])
+DIFF_TOKENS = METRICS.counter('monitor_diff_tokens_total', '累计变更代币数', ['source', 'kind'])
+LAST_DIFF = METRICS.gauge('monitor_last_diff_tokens', '最近一轮变更代币数', ['source', 'kind'])
+NOTIFY_QUEUE = METRICS.gauge('notify_queue_depth', '发件箱中待发送的通知数')
+NOTIFY_SECONDS = METRICS.histogram('notify_send_seconds', '通知发送耗时 (秒)', ['target'])
+NOTIFY_SENT = METRICS.counter('notify_sent_total', '通知发送次数', ['target', 'status'])
+NOTIFY_429 = METRICS.counter('notify_rate_limited_total', '通知被限流 (429) 次数', ['target'])
+LOOP_SECONDS = METRICS.histogram('monitor_loop_seconds', '单轮监控耗时, 不含等待 (秒)')
+LAST_SUCCESS = METRICS.gauge('monitor_last_success_timestamp_seconds', '最近一次成功轮询的时间戳')
+SINCE_SUCCESS = METRICS.gauge('monitor_seconds_since_last_success', '距最近一次成功轮询的秒数')
+SINCE_SUCCESS.set_function(lambda: time.time() - last_success_time if last_success_time else -1)
+STARTUP_SECONDS = METRICS.gauge('monitor_startup_seconds', '进程启动到各阶段的耗时 (秒)', ['phase'])
+
+# 冷启动耗时: 恢复快照 / 第一个请求 / 第一轮轮询
+startup = StartupTimer(on_mark=lambda phase, seconds: STARTUP_SECONDS.set(seconds, phase=phase))
+
+last_success_time = 0.0
+
+
+def save_metrics():
+    """写出指标快照, 供多 worker 模式下的跟随进程输出"""
+    try:
+        tmp_path = METRICS_PATH + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(METRICS.render())
+        os.replace(tmp_path, METRICS_PATH)
+    except Exception as e:
+        logger.error(f"保存指标失败: {e}")
+
+
 # =============== 配置管理 ===============
 
 def ensure_config():
@@ -103,76 +208,171 @@ def load_state():
     try:
         if os.path.exists(STATE_PATH):
             with open(STATE_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                state = json.load(f)
+            state['tokens'] = unpack_records(state.get('tokens'), AlphaToken)
+            return state
     except Exception as e:
         logger.error(f"加载状态失败: {e}")
-    return {"last_check": "", "tokens": [], "token_count": 0}
+    return {"last_check": "", "tokens": [], "token_count": 0, "version": 0}
 
 
 def save_state(state: dict):
-    """保存状态"""
+    """保存状态 (先写临时文件再替换, 跟随进程不会读到半个文件)
+
+    代币列表按列存储 (字段名只写一次), 完整保存以便重启后比对
+    """
     try:
-        with open(STATE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(state, f, indent=2, ensure_ascii=False)
+        tmp_path = STATE_PATH + '.tmp'
+        state = {**state, "tokens": pack_records(state.get('tokens', []), AlphaToken)}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, separators=(',', ':'), default=to_jsonable)
+        os.replace(tmp_path, STATE_PATH)
     except Exception as e:
         logger.error(f"保存状态失败: {e}")
 
 
 # =============== 币安 Alpha API ===============
 
-def fetch_alpha_tokens():
-    """获取币安 Alpha 代币列表"""
+def alpha_projection(cfg: dict) -> Optional[List[str]]:
+    """解析时保留的字段, None 表示保留全部"""
+    fields = cfg.get('alpha_fields', ALPHA_FIELDS)
+    if '*' in fields:
+        return None
+    # 变更检测与订阅过滤引用的字段也要保留
+    extra = cfg.get('change_fields', CHANGE_FIELDS) + referenced_fields(cfg.get('notify_targets', []))
+    return list(dict.fromkeys(fields + extra))
+
+
+def alpha_endpoints(cfg: dict) -> List[str]:
+    """参与对冲的 Alpha 接口, 按优先级排列 (第一个为主接口)
+
+    只用 config.json 中明确配置的 alpha_endpoints: 结构相同的接口不一定返回同一份代币列表,
+    列表不同的接口胜出会让比对产生大量误报的上新 / 下架; 未配置时只用币安官方接口
+    """
+    return list(dict.fromkeys(cfg.get('alpha_endpoints') or [BINANCE_ALPHA_API]))
+
+
+# 超过该接口近期 p95 仍未返回时向下一个接口对冲, 连续失败的接口熔断
+alpha_fetcher = HedgedFetcher(on_hedge=lambda url: FETCH_HEDGED.inc(endpoint=url))
+
+# 抓取失败后按错误类别决定下次重试的等待时间
+fetch_retry = RetryTracker()
+
+
+def _fetch_alpha_from(url: str, cancelled: threading.Event, fields: Optional[List[str]]):
+    """从一个接口获取并解析代币列表, 失败时抛异常 (对冲落败后尽快放弃下载)"""
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
         'Accept': 'application/json',
     }
     
+    def chunks(response):
+        for chunk in response.iter_content(chunk_size=65536):
+            if cancelled.is_set():
+                raise Cancelled()
+            yield chunk
+    
+    with requests.get(url, headers=headers, timeout=15, stream=True) as response:
+        if response.status_code != 200:
+            raise UpstreamError(classify_status(response.status_code, f"API请求失败: {response.status_code}",
+                                                retry_after_header(response.headers)))
+        stream = ArrayStream(chunks(response), 'data', fields)
+        tokens = [AlphaToken.from_dict(item) for item in stream]
+        if stream.meta.get('code') != '000000':
+            raise UpstreamError(Failure(SERVER, f"API返回错误: {stream.meta.get('code')} {stream.meta.get('message')}"))
+        return url, tokens, stream.bytes_read
+
+
+def fetch_alpha_tokens():
+    """获取币安 Alpha 代币列表 (多个接口对冲请求, 边下载边解析, 只保留需要的字段)"""
+    cfg = load_config()
+    fields = alpha_projection(cfg)
+    
     try:
-        response = requests.get(BINANCE_ALPHA_API, headers=headers, timeout=15)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('code') == '000000':
-                return data.get('data', [])
-        logger.error(f"API请求失败: {response.status_code}")
+        url, tokens, size = alpha_fetcher.fetch(
+            alpha_endpoints(cfg), lambda u, cancelled: _fetch_alpha_from(u, cancelled, fields))
+        FETCH_BYTES.set(size, source='alpha')
+        FETCH_WINS.inc(endpoint=url)
+        fetch_retry.success()
+        return tokens
     except Exception as e:
-        logger.error(f"获取Alpha代币失败: {e}")
+        failure = classify_exception(e)
+        delay = fetch_retry.failure(failure)
+        FETCH_ERRORS.inc(source='alpha', kind=failure.kind)
+        logger.error(f"获取Alpha代币失败 ({failure.kind}, {delay:.0f}s 后重试): {e}")
     
     return []
 
 
-# =============== Telegram 推送 ===============
+# =============== 消息推送 ===============
 
-def send_telegram(bot_token: str, chat_id: str, text: str):
-    """发送Telegram消息"""
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    data = {
-        "chat_id": chat_id,
-        "text": text,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True
-    }
-    
+# 每个推送凭据 (bot / webhook) 一个熔断器, 熔断期间的投递直接延后, 不占用发送通道
+notify_breakers = BreakerRegistry()
+
+
+def breaker_snapshot() -> dict:
+    """熔断器状态 (API 与共享状态用)"""
+    return {"upstream": alpha_fetcher.breakers.snapshot(), "notify": notify_breakers.snapshot()}
+
+
+def send_notification(target: dict, message: str) -> SendResult:
+    """按目标配置的渠道 (telegram / webhook / discord / lark) 发送一条消息"""
+    name = target_name(target)
     try:
-        response = requests.post(url, json=data, timeout=10)
-        if response.status_code == 200:
-            logger.info(f"Telegram推送成功: {chat_id}")
-            return True
-        else:
-            logger.error(f"Telegram推送失败: {response.status_code}")
-    except Exception as e:
-        logger.error(f"Telegram推送异常: {e}")
+        notifier = get_notifier(target)
+    except ValueError as e:
+        logger.error(f"推送目标配置错误: {name}: {e}", extra={"target": name})
+        return SendResult(False, str(e), kind=AUTH)
+    
+    # 熔断按凭据计; 429 退避按 rate_limit_key 计 (Telegram 为每个会话, 其他渠道与熔断器相同)
+    breaker = notify_breakers.get(notifier.breaker_key())
+    limiter = notify_breakers.get(notifier.rate_limit_key())
+    if limiter is not breaker and limiter.retry_in() > 0:
+        return SendResult(False, f"限流中: {limiter.name}", retry_after=limiter.retry_in(), attempted=False)
+    if not breaker.allow():
+        return SendResult(False, f"熔断中: {breaker.name}", retry_after=breaker.retry_in(), attempted=False)
+    
+    with NOTIFY_SECONDS.time(target=name):
+        result = notifier.send(message)
+    
+    if result.ok:
+        breaker.record_success()
+        if limiter is not breaker:
+            limiter.record_success()
+        logger.info(f"{notifier.channel} 推送成功: {name}", extra={"target": name})
+        NOTIFY_SENT.inc(target=name, status='ok')
+        return SendResult(True)
     
-    return False
+    failure = Failure(result.kind, result.error, result.status, result.retry_after)
+    if result.kind == RATE_LIMIT and limiter is not breaker:
+        # 会话级限流: 凭据本身可用, 熔断器按成功处理 (同时释放半开探测名额)
+        breaker.record_success()
+        limiter.record_failure(failure)
+    else:
+        breaker.record_failure(failure)
+    logger.error(f"{notifier.channel} 推送失败 ({result.kind}): {name} [{result.status}] {result.error}",
+                 extra={"target": name})
+    if result.status == 429:
+        NOTIFY_429.inc(target=name)
+    NOTIFY_SENT.inc(target=name, status='error')
+    return SendResult(False, result.error, result.kind, result.retry_after)
 
 
-def notify_new_token(token: dict):
-    """通知新代币"""
+def notify_new_token(token: dict, trace: dict = None, token_key: str = None, targets: List[str] = None,
+                     details: str = ''):
+    """通知新代币: 写入发件箱后立即返回
+
+    trace: 用于记录入队与各目标确认时间
+    targets: 订阅过滤后的目标名, 缺省推送全部启用的目标
+    details: 信息补充阶段得到的附加行 (价格 / 流动性等)
+    """
     cfg = load_config()
     
-    if cfg.get('notify_method') not in ['telegram', 'both']:
+    if not notify_enabled(cfg):
         return
     
     # 构建消息
+    details_block = f"{details}\n" if details else ''
     message = f"""🚀 <b>币安 Alpha 新币上线!</b>
 
 📌 <b>名称:</b> {token.get('name')}
@@ -180,97 +380,425 @@ def notify_new_token(token: dict):
 🆔 <b>Alpha ID:</b> {token.get('alphaId')}
 ⛓ <b>链:</b> {token.get('chainId')}
 📜 <b>合约:</b> <code>{token.get('contractAddress', 'N/A')}</code>
-
+{details_block}
 ⏰ <b>发现时间:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 💡 由 NTX Quest Radar 提供"""
     
-    # 推送到所有启用的目标
-    for target in cfg.get('notify_targets', []):
-        if target.get('enabled', True):
-            send_telegram(
-                target.get('bot_token'),
-                target.get('chat_id'),
-                message
-            )
-            time.sleep(2)  # 增加间隔,避免429频率限制
+    # 写入发件箱, 由后台线程推送到所有启用的目标
+    enqueue_notification(
+        token_key or f"alpha:{token.get('alphaId')}",
+        message,
+        [trace] if trace is not None else [],
+        targets
+    )
+
+
+def notify_token_changes(changeset: ChangeSet, cfg: dict):
+    """下架 / 关注字段变化提醒 (config.json 的 change_alerts 选择推送哪些, 缺省不推送)"""
+    kinds = cfg.get('change_alerts', [])
+    if not notify_enabled(cfg) or not kinds:
+        return
+    
+    events = []
+    if 'removed' in kinds:
+        events += [(token, None) for token in changeset.removed]
+    if 'modified' in kinds:
+        events += changeset.modified
+    if not events:
+        return
+    
+    router = get_router(cfg.get('notify_targets', []))
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for token, diff in events:
+        targets = router.targets_for(token, 'alpha')
+        if not targets:
+            continue
+        if diff is None:
+            title, lines, payload = '⚠️ <b>币安 Alpha 代币下架</b>', [], token
+        else:
+            title, lines, payload = '🔄 <b>币安 Alpha 代币信息变化</b>', describe(diff, CHANGE_LABELS), diff
+        body = ''.join(f"• {line}\n" for line in lines)
+        message = f"""{title}
+
+📌 <b>名称:</b> {token.get('name')}
+🔤 <b>代号:</b> {token.get('symbol')}
+⛓ <b>链:</b> {token.get('chainId')}
+📜 <b>合约:</b> <code>{token.get('contractAddress', 'N/A')}</code>
+{body}
+⏰ <b>检测时间:</b> {now}
+
+💡 由 NTX Quest Radar 提供"""
+        # 同一事件重复检测 (如推送后进程崩溃) 得到相同的幂等键
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=to_jsonable)
+                              .encode('utf-8')).hexdigest()[:16]
+        kind = 'removed' if diff is None else 'modified'
+        enqueue_notification(f"alpha-{kind}:{token.get('alphaId')}:{digest}", message, targets=targets)
+
+
+# =============== 通知发件箱 ===============
+
+# 幂等键 -> (trace 列表, 目标名), 投递成功后记录确认时间
+pending_traces: Dict[str, tuple] = {}
+
+
+def target_name(target: dict) -> str:
+    """推送目标的标识 (发件箱与延迟 trace 使用)"""
+    return target.get('name') or str(target.get('chat_id'))
+
+
+def deliver(name: str, message: str) -> SendResult:
+    """发件箱回调: 按目标名查找当前配置并发送"""
+    if not still_leader():
+        # 已失去租约 (多节点主备): 由新主节点投递, 本节点重新当选后再查是否已发出
+        return SendResult(False, "非主节点, 暂停投递", retry_after=30, attempted=False)
+    for target in load_config().get('notify_targets', []):
+        if target_name(target) == name:
+            return send_notification(target, message)
+    logger.warning(f"推送目标不存在: {name}")
+    return SendResult(False, f"推送目标不存在: {name}")
+
+
+def on_delivered(key: str):
+    """发件箱回调: 投递成功"""
+    if cluster:
+        cluster.mark_sent(key)
+    entry = pending_traces.pop(key, None)
+    if entry:
+        traces, name = entry
+        for trace in traces:
+            ack(trace, name)
+
+
+def enqueue_notification(token_key: str, message: str, traces: List[dict] = (), targets: List[str] = None):
+    """把消息写入发件箱 (每个目标一条, 缺省为全部启用的目标), 由后台线程投递"""
+    if targets is None:
+        cfg = load_config()
+        names = [target_name(t) for t in cfg.get('notify_targets', []) if t.get('enabled', True)]
+    else:
+        names = list(targets)
+    if not names:
+        return
+    for trace in traces:
+        mark(trace, 'enqueued')
+    if traces:
+        for name in names:
+            pending_traces[delivery_key(token_key, name)] = (list(traces), name)
+        # 投递失败的记录不会回调, 只保留最近的条目
+        while len(pending_traces) > 1000:
+            pending_traces.pop(next(iter(pending_traces)))
+    outbox.enqueue(token_key, names, message)
+
+
+# 最近的发现事件 (config.json 的 events: capacity 条数 / max_age 秒数)
+event_ring = EventRing(**event_options(load_config()))
+
+
+def detection_event(kind: str, token: dict, trace: Optional[dict] = None, **extra) -> dict:
+    """写入事件环的发现事件; latency 为上线到发现的秒数 (只有新币有)"""
+    detected = trace['detected'] if trace else time.time()
+    listed_at = trace.get('listed_at') if trace else listing_time(token)
+    return {
+        "time": detected,
+        "source": "alpha",
+        "kind": kind,
+        "token": token.get('alphaId'),
+        "symbol": token.get('symbol'),
+        "name": token.get('name'),
+        "latency": round(detected - listed_at, 3) if kind == 'added' and listed_at else None,
+        **extra
+    }
+
+
+# 轮询历史 (config.json 的 history, enabled=false 关闭): 保留层级与后台维护
+history = HistoryStore(HISTORY_PATH, **history_options(load_config())) \
+    if (load_config().get('history') or {}).get('enabled', True) else None
+
+
+# 多节点主备 (config.json 的 cluster), 未配置时为单机模式
+cluster = get_cluster(load_config().get('cluster'), 'alpha')
+
+outbox = Outbox(OUTBOX_PATH, send=deliver, on_sent=on_delivered, **outbox_options(load_config()),
+                already_sent=cluster.was_sent if cluster else None)
+NOTIFY_QUEUE.set_function(outbox.pending_count)
 
 
 # =============== 监控循环 ===============
 
-def monitor_loop():
-    """监控循环"""
+_detector: Optional[ChangeDetector] = None
+
+
+def change_detector(cfg: dict) -> ChangeDetector:
+    """按配置的关注字段取变更检测器 (字段不变时复用)"""
+    global _detector
+    fields = tuple(cfg.get('change_fields', CHANGE_FIELDS))
+    if _detector is None or _detector.fields != fields:
+        _detector = ChangeDetector(key=lambda t: t.get('alphaId'), fields=fields)
+    return _detector
+
+
+def still_leader() -> bool:
+    """本进程是否应当轮询与推送 (单机模式总是; 选举模式下持有租约时)"""
+    return elector is None or elector.is_leader
+
+
+def restore_snapshot():
+    """载入上次持久化的状态: Web 立即提供重启前的数据, 不等第一轮轮询"""
     global monitor_state
+    monitor_state = load_state()
+    latency_tracker.load(monitor_state.get('traces'))
+    event_ring.load(monitor_state.get('events'))
+    if change_feed.version != monitor_state.get('version', 0):
+        change_feed.reset(monitor_state.get('version', 0))
+    startup.mark('snapshot')
+
+
+def monitor_loop(restored: bool = False):
+    """监控循环
+
+    restored: 启动时已调用 restore_snapshot (否则在这里载入, 如跟随者当选主节点)
+    """
+    global monitor_state, last_success_time
     
     logger.info("监控循环已启动")
     
-    # 加载上次状态
-    monitor_state = load_state()
+    # 发件箱投递线程 (只在运行监控的进程中), 重启前未完成的投递立即继续
+    outbox.start()
+    if history:
+        history.start()
+    
+    # 加载上次状态 (多节点时先拉取主节点最后发布的状态, 并接管其未完成的投递)
+    if cluster:
+        cluster.pull(STATE_PATH)
+    if not restored:
+        restore_snapshot()
+    if cluster:
+        outbox.adopt(monitor_state.get('outbox_pending'))
     is_first_run = not monitor_state.get('tokens')  # 判断是否首次运行
     
+    # 上一轮的完整代币列表
+    previous_tokens = monitor_state.get('tokens', [])
+    
     while True:
+        if not still_leader():
+            logger.warning("已失去监控租约, 停止轮询")
+            return
+        check_seq = check_trigger.begin()
         try:
             logger.info("检查币安 Alpha 新币...")
             
+            loop_start = time.perf_counter()
+            
             # 获取当前代币列表
-            current_tokens = fetch_alpha_tokens()
+            fetch_start = time.time()
+            with FETCH_SECONDS.time(source='alpha'):
+                current_tokens = fetch_alpha_tokens()
+            fetch_end = time.time()
             
             if not current_tokens:
-                logger.warning("未获取到代币数据")
-                time.sleep(60)
+                # 失败时按错误类别退避 (超时很快重试, 认证失败等很久)
+                delay = fetch_retry.next_delay if fetch_retry.attempts else 60
+                logger.warning(f"未获取到代币数据, {delay:.0f}s 后重试")
+                check_trigger.complete(check_seq, {"error": "无法获取代币数据"})
+                time.sleep(delay)
                 continue
             
-            # 提取 alphaId 作为唯一标识
-            current_ids = {t.get('alphaId') for t in current_tokens}
-            previous_ids = {t.get('alphaId') for t in monitor_state.get('tokens', [])}
-            
-            # 检测新增代币
-            new_ids = current_ids - previous_ids
+            # 按 alphaId 比对新增 / 下架 / 字段变化 (内容哈希相同的代币直接跳过)
+            cfg = load_config()
+            detector = change_detector(cfg)
+            changeset = detector.diff(previous_tokens, current_tokens)
+            if changeset.modified and monitor_state.get('change_fields') != list(detector.fields):
+                # 关注字段改了, 旧记录里没有新字段的值, 本轮只重建基线
+                logger.info("变更检测字段已更新, 本轮不报告字段变化")
+                changeset = changeset._replace(modified=[])
+            traced_tokens = {}
             
-            if new_ids:
+            if changeset.added:
                 if is_first_run:
-                    logger.info(f"首次运行: 发现 {len(current_ids)} 个代币,跳过推送")
+                    logger.info(f"首次运行: 发现 {len(current_tokens)} 个代币,跳过推送")
                     is_first_run = False
                 else:
-                    logger.info(f"🚀 发现 {len(new_ids)} 个新币!")
+                    logger.info(f"🚀 发现 {len(changeset.added)} 个新币!")
+                    
+                    # 按订阅过滤一次算出各自的推送目标
+                    new_tokens = changeset.added
+                    routes = get_router(cfg.get('notify_targets', [])).route(new_tokens, 'alpha')
                     
-                    # 找出新币详情并推送
-                    for token in current_tokens:
-                        if token.get('alphaId') in new_ids:
-                            logger.info(f"新币: {token.get('symbol')} ({token.get('name')})")
-                            notify_new_token(token)
+                    traces = [new_trace(token, fetch_start, fetch_end) for token in new_tokens]
+                    
+                    # 信息补充 (有时间预算, 超时的按普通消息推送)
+                    enricher = get_enricher(cfg.get('enrichment'))
+                    details = enricher.enrich_batch(new_tokens) if enricher else [None] * len(new_tokens)
+                    if enricher:
+                        for trace in traces:
+                            mark(trace, 'enriched')
+                    
+                    # 推送 (带延迟 trace 的副本进入变更流)
+                    for token, targets, trace, extra in zip(new_tokens, routes, traces, details):
+                        logger.info(f"新币: {token.get('symbol')} ({token.get('name')}) -> {len(targets)} 个目标",
+                                    extra={"token": token.get('alphaId')})
+                        traced_tokens[token.get('alphaId')] = {**token, "trace": trace, "details": extra}
+                        notify_new_token(token, trace, targets=targets,
+                                         details=enricher.format(extra) if enricher else '')
+                        latency_tracker.record(token.get('alphaId'), trace)
+                        event_ring.append(detection_event('added', token, trace))
             else:
                 logger.info("✓ 没有新币上线")
             
+            # 下架 / 字段变化 (首次运行没有基线)
+            if previous_tokens and (changeset.removed or changeset.modified):
+                logger.info(f"下架 {len(changeset.removed)} 个, 字段变化 {len(changeset.modified)} 个")
+                notify_token_changes(changeset, cfg)
+                for token in changeset.removed:
+                    event_ring.append(detection_event('removed', token))
+                for token, diff in changeset.modified:
+                    event_ring.append(detection_event('changed', token, fields=list(diff)))
+            
+            # 发布变更 (首次运行只建立基线; changed 附带变化的字段与新旧值)
+            version = monitor_state.get('version', 0)
+            changes = monitor_state.get('changes')
+            if previous_tokens and changeset:
+                changes = {
+                    "added": [traced_tokens.get(t.get('alphaId'), t) for t in changeset.added],
+                    "removed": changeset.removed,
+                    "changed": [{**token, "changes": diff} for token, diff in changeset.modified]
+                }
+                version = change_feed.publish(**changes)
+            previous_tokens = current_tokens
+            
             # 更新状态
             monitor_state = {
                 "last_check": datetime.now(timezone.utc).isoformat(),
-                "tokens": current_tokens[:100],  # 只保存最新100个
+                "tokens": current_tokens,
                 "token_count": len(current_tokens),
-                "new_count": len(new_ids) if not is_first_run else 0
+                "new_count": len(changeset.added) if not is_first_run else 0,
+                "version": version,
+                "change_fields": list(detector.fields),
+                "changes": changes,  # 本版本的变更, 供跟随进程复制
+                "traces": latency_tracker.recent(200),
+                "events": event_ring.dump(),
+                "breakers": breaker_snapshot(),
+                "endpoints": alpha_fetcher.snapshot(),
+                "check_seq": check_seq  # 本轮覆盖的立即检查请求, 供跟随进程应答
             }
+            if cluster:
+                monitor_state["outbox_pending"] = outbox.pending_rows()
             save_state(monitor_state)
+            if cluster:
+                cluster.publish(STATE_PATH)
+            check_trigger.complete(check_seq, check_result(monitor_state))
+            if history:
+                history.record('alpha', [
+                    ('token_count', len(current_tokens)),
+                    ('added', len(changeset.added)),
+                    ('removed', len(changeset.removed)),
+                    ('changed', len(changeset.modified)),
+                    ('fetch_seconds', fetch_end - fetch_start)
+                ])
+            
+            # 指标
+            TOKEN_COUNT.set(len(current_tokens), source='alpha')
+            for kind, items in zip(('added', 'removed', 'changed'), changeset):
+                DIFF_TOKENS.inc(len(items), source='alpha', kind=kind)
+                LAST_DIFF.set(len(items), source='alpha', kind=kind)
+            last_success_time = time.time()
+            LAST_SUCCESS.set(last_success_time)
+            LOOP_SECONDS.observe(time.perf_counter() - loop_start)
+            if startup.mark('first_poll') is not None:
+                logger.info(f"启动耗时: {startup.describe()}")
+            if elector:
+                save_metrics()
             
             # 等待下次检查
             cfg = load_config()
             interval = cfg.get('check_interval', 300)
             logger.info(f"等待 {interval} 秒后下次检查...")
-            time.sleep(interval)
+            if check_trigger.sleep(interval):
+                logger.info("收到立即检查请求, 提前开始下一轮")
             
         except Exception as e:
             logger.error(f"监控循环异常: {e}")
+            check_trigger.complete(check_seq, {"error": str(e)})
             time.sleep(60)
 
 
 def start_monitor():
-    """启动监控线程"""
-    thread = threading.Thread(target=monitor_loop, daemon=True)
+    """先同步恢复快照 (Web 启动后立即有数据), 再启动监控线程"""
+    restore_snapshot()
+    thread = threading.Thread(target=monitor_loop, kwargs={"restored": True}, daemon=True)
     thread.start()
     logger.info("监控线程已启动")
 
 
+# =============== 生产模式 (多 worker) ===============
+
+elector = None
+
+
+def apply_shared_state(path: str):
+    """跟随者: 载入主节点写入的共享状态并复制变更流"""
+    global monitor_state
+    
+    if elector and elector.is_leader:
+        return
+    
+    state = load_state()
+    changes = state.get('changes') or {}
+    change_feed.mirror(
+        state.get('version', 0),
+        changes.get('added', []),
+        changes.get('removed', []),
+        changes.get('changed', [])
+    )
+    latency_tracker.load(state.get('traces'))
+    event_ring.load(state.get('events'))
+    monitor_state = state
+    check_trigger.complete(state.get('check_seq', 0), check_result(state))
+
+
+def check_result(state: dict) -> dict:
+    """一轮检查的摘要 (/api/check_now 的返回内容)"""
+    return {"total": state.get('token_count', 0), "new": state.get('new_count', 0),
+            "last_check": state.get('last_check')}
+
+
+def start_worker():
+    """WSGI worker 启动入口 (见 gunicorn.conf.py)
+
+    MONITOR_ROLE=auto (默认): 参与租约竞选, 当选的 worker 运行监控循环
+    MONITOR_ROLE=follower: 只跟随共享状态, 监控由 sidecar 进程 (--monitor-only) 负责
+    """
+    ensure_config()
+    restore_snapshot()
+    
+    StateFollower(STATE_PATH, on_change=apply_shared_state).start()
+    
+    if os.environ.get('MONITOR_ROLE', 'auto') != 'follower':
+        start_election()
+    logger.info(f"Worker 已启动 (pid={os.getpid()})")
+
+
+def start_election(block: bool = False):
+    """参与监控租约竞选: 单机用文件锁, 配置了 cluster 时用跨主机租约, 并在备节点上同步主节点的状态"""
+    global elector
+    
+    elector = LeaderElector(cluster.lease() if cluster else FileLease(LOCK_PATH), on_elected=monitor_loop)
+    if cluster:
+        StateMirror(cluster, STATE_PATH, is_leader=lambda: elector.is_leader).start()
+        logger.info(f"多节点模式: {cluster.node} ({cluster.name}, ttl={cluster.ttl}s)")
+    if block:
+        elector.run()
+    else:
+        elector.start()
+
+
 # =============== Web 路由 ===============
 
+@app.before_request
+def mark_first_request():
+    startup.mark('first_request')
+
+
 @app.route('/')
 def index():
     """首页"""
@@ -278,6 +806,8 @@ def index():
     last_check = monitor_state.get('last_check', '')
     token_count = monitor_state.get('token_count', 0)
     new_count = monitor_state.get('new_count', 0)
+    events = event_ring.recent(20)
+    day_count = event_ring.count_since(time.time() - 86400, 'added')
     
     # 格式化时间
     check_time = "从未检查"
@@ -285,6 +815,8 @@ def index():
         try:
             dt = datetime.fromisoformat(last_check.replace('Z', '+00:00'))
             check_time = dt.strftime('%m-%d %H:%M')
+            if dt.timestamp() < startup.started_at:
+                check_time += " (重启前)"  # 恢复的快照, 本进程还没完成轮询
         except:
             pass
     
@@ -405,6 +937,28 @@ def index():
                 color: white;
                 margin-left: 10px;
             }}
+            .events {{
+                background: rgba(255,255,255,0.95);
+                border-radius: 16px;
+                padding: 20px 30px;
+                margin-bottom: 30px;
+                box-shadow: 0 8px 32px rgba(0,0,0,0.1);
+            }}
+            .events h2 {{
+                color: #667eea;
+                font-size: 20px;
+                margin-bottom: 10px;
+            }}
+            .events table {{
+                width: 100%;
+                border-collapse: collapse;
+                font-size: 14px;
+            }}
+            .events td {{
+                padding: 6px 8px;
+                border-bottom: 1px solid #eee;
+                color: #555;
+            }}
         </style>
     </head>
     <body>
@@ -425,6 +979,10 @@ def index():
                         <div class="stat-value">{new_count}</div>
                         <div class="stat-label">本次新增</div>
                     </div>
+                    <div class="stat-card">
+                        <div class="stat-value">{day_count}</div>
+                        <div class="stat-label">24 小时新增</div>
+                    </div>
                     <div class="stat-card">
                         <div class="stat-value">{len(tokens)}</div>
                         <div class="stat-label">显示数量</div>
@@ -437,7 +995,34 @@ def index():
                 
                 <a href="/manage" class="btn-manage">⚙️ 管理配置</a>
             </div>
-            
+    """
+    
+    if events:
+        html += """
+            <div class="events">
+                <h2>🕒 最近发现</h2>
+                <table>
+        """
+        labels = {"added": "🆕 上线", "removed": "⛔ 下架", "changed": "✏️ 变化"}
+        for event in events:
+            when = datetime.fromtimestamp(event['time']).strftime('%m-%d %H:%M:%S')
+            latency = f"{event['latency']:.0f}s 后发现" if event.get('latency') is not None else \
+                ', '.join(event.get('fields', []))
+            html += f"""
+                    <tr>
+                        <td>{when}</td>
+                        <td>{labels.get(event['kind'], event['kind'])}</td>
+                        <td><b>{event.get('symbol') or 'N/A'}</b></td>
+                        <td>{event.get('name') or ''}</td>
+                        <td>{latency}</td>
+                    </tr>
+            """
+        html += """
+                </table>
+            </div>
+        """
+    
+    html += """
             <div class="tokens">
     """
     
@@ -484,11 +1069,27 @@ def manage():
         targets_html += f"""
         <tr>
             <td>{target.get('name', 'N/A')}</td>
+            <td>{target.get('type', 'telegram')}</td>
             <td>{enabled}</td>
             <td>{target.get('chat_id', 'N/A')}</td>
         </tr>
         """
     
+    latency_html = ""
+    for stage, stats in latency_tracker.summary().items():
+        latency_html += f"""
+        <tr>
+            <td>{stage}</td>
+            <td>{stats['count']}</td>
+            <td>{stats['p50']}</td>
+            <td>{stats['p90']}</td>
+            <td>{stats['p99']}</td>
+            <td>{stats['max']}</td>
+        </tr>
+        """
+    if not latency_html:
+        latency_html = '<tr><td colspan="6">暂无数据</td></tr>'
+    
     html = f"""
     <!DOCTYPE html>
     <html>
@@ -549,19 +1150,33 @@ def manage():
             <h2>📊 当前配置</h2>
             <div>
                 <strong>检查间隔:</strong> {cfg.get('check_interval', 300)} 秒<br>
-                <strong>通知方式:</strong> {cfg.get('notify_method', 'none')}
+                <strong>通知方式:</strong> {', '.join(active_channels(cfg)) or '不推送'}
             </div>
             
-            <h2>📱 Telegram 推送目标</h2>
+            <h2>📱 推送目标</h2>
             <table>
                 <tr>
                     <th>名称</th>
+                    <th>渠道</th>
                     <th>状态</th>
                     <th>Chat ID</th>
                 </tr>
                 {targets_html}
             </table>
             
+            <h2>⏱ 发现延迟 (秒)</h2>
+            <table>
+                <tr>
+                    <th>阶段</th>
+                    <th>样本数</th>
+                    <th>P50</th>
+                    <th>P90</th>
+                    <th>P99</th>
+                    <th>最大</th>
+                </tr>
+                {latency_html}
+            </table>
+            
             <a href="/" class="btn">← 返回首页</a>
             <a href="/api/state" class="btn">📊 查看状态</a>
             <a href="/api/check_now" class="btn">🔍 立即检查</a>
@@ -589,8 +1204,139 @@ def manage():
 
 @app.route('/api/state')
 def api_state():
-    """API: 获取状态"""
-    return jsonify(monitor_state)
+    """API: 获取状态 (只返回最新 100 个代币; 状态未更新时复用上次的序列化结果)"""
+    state = monitor_state
+    return responder.respond(snapshot=responder.snapshot('state', state, lambda: public_state(state)))
+
+
+def public_state(state: dict) -> dict:
+    """/api/state 返回的内容 (不含给备节点的待投递记录)"""
+    return {**{k: v for k, v in state.items() if k != 'outbox_pending'}, "tokens": state.get('tokens', [])[:100]}
+
+
+@app.route('/api/changes')
+def api_changes():
+    """API: 长轮询变更流
+
+    since: 上次拿到的版本号 (缺省则立即返回当前版本)
+    timeout: 最长阻塞秒数 (0-60)
+    """
+    since = request.args.get('since', type=int)
+    timeout = min(max(request.args.get('timeout', 30, type=float), 0), 60)
+    
+    if since is None:
+        return responder.respond({"version": change_feed.version, "resync_required": True})
+    return responder.respond(change_feed.wait(since, timeout))
+
+
+@app.route('/api/events')
+def api_events():
+    """API: 最近的发现事件 (最新的在前)
+
+    since: 只返回 seq 大于它的事件; kind: added / removed / changed; limit: 最多返回条数
+    """
+    limit = min(request.args.get('limit', 50, type=int), event_ring.capacity)
+    since = request.args.get('since', 0, type=int)
+    kind = request.args.get('kind')
+    name = f"events:{limit}:{since}:{kind}"
+    return responder.respond(snapshot=responder.versioned(name, event_ring.version, lambda: {
+        "seq": event_ring.seq,
+        "events": event_ring.recent(limit, since=since, kind=kind),
+        "retention": event_ring.stats()
+    }))
+
+
+@app.route('/api/history')
+def api_history():
+    """API: 轮询历史
+
+    不带 series 时返回各层行数、文件大小与最近一次维护报告;
+    series (alpha) / key (token_count 等) / tier (raw / hour / day) / since (时间戳) / limit 查询数据点
+    """
+    if not history:
+        return responder.respond({"error": "历史记录未启用"}, 404)
+    series = request.args.get('series')
+    version = history.version()
+    if not series:
+        return responder.respond(snapshot=responder.versioned('history', version, history.stats))
+    tier = request.args.get('tier', 'raw')
+    if tier not in [t["name"] for t in history.tiers]:
+        return responder.respond({"error": f"未知层级: {tier}"}, 400)
+    key = request.args.get('key')
+    since = request.args.get('since', 0, type=float)
+    limit = min(request.args.get('limit', 1000, type=int), 10000)
+    name = f"history:{series}:{key}:{tier}:{since}:{limit}"
+    return responder.respond(snapshot=responder.versioned(name, version, lambda: {
+        "series": series,
+        "tier": tier,
+        "points": history.query(series, key, since=since, tier=tier, limit=limit)
+    }))
+
+
+@app.route('/api/latency')
+def api_latency():
+    """API: 新币发现延迟 (各阶段百分位 + 最近的 trace)"""
+    limit = request.args.get('limit', 50, type=int)
+    return responder.respond(snapshot=responder.versioned(f"latency:{limit}", latency_tracker.version, lambda: {
+        "summary": latency_tracker.summary(),
+        "recent": latency_tracker.recent(limit)
+    }))
+
+
+@app.route('/api/endpoints')
+def api_endpoints():
+    """API: Alpha 数据源 (优先级、近期 p95、失败次数与降级状态)"""
+    state = monitor_state
+    endpoints = alpha_endpoints(load_config())
+    # 跟随进程没有自己的统计, 用主进程写入状态的 (随状态文件更新)
+    version = (alpha_fetcher.version(), tuple(endpoints), state.get('last_check'))
+    return responder.respond(snapshot=responder.versioned('endpoints', version, lambda: {
+        "endpoints": endpoints,
+        "hedged": alpha_fetcher.hedged,
+        "stats": alpha_fetcher.snapshot() or state.get('endpoints', {})
+    }))
+
+
+@app.route('/api/startup')
+def api_startup():
+    """API: 冷启动耗时 (进程启动到恢复快照 / 第一个请求 / 第一轮轮询)"""
+    return responder.respond(startup.snapshot())
+
+
+@app.route('/api/cluster')
+def api_cluster():
+    """API: 多节点主备状态 (本节点角色与当前主节点)"""
+    if not cluster:
+        return responder.respond({"enabled": False})
+    return responder.respond({"enabled": True, "is_leader": still_leader(), "terms": elector.terms if elector else 0,
+                    **cluster.status()})
+
+
+@app.route('/api/breakers')
+def api_breakers():
+    """API: 熔断器状态 (多 worker 模式下跟随进程返回主节点写入的快照)"""
+    return responder.respond(breaker_snapshot() if not elector or elector.is_leader else monitor_state.get('breakers', {}))
+
+
+@app.route('/api/outbox')
+def api_outbox():
+    """API: 通知发件箱状态"""
+    return responder.respond({
+        "stats": outbox.stats(),
+        "recent": outbox.recent(request.args.get('status'), request.args.get('limit', 20, type=int))
+    })
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 指标 (多 worker 模式下跟随进程输出主节点的快照)"""
+    if elector and not elector.is_leader:
+        try:
+            with open(METRICS_PATH, 'r', encoding='utf-8') as f:
+                return f.read(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
+        except FileNotFoundError:
+            pass
+    return METRICS.render(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
 
 
 @app.route('/api/config')
@@ -599,9 +1345,10 @@ def api_config():
     cfg = load_config()
     # 隐藏敏感信息
     for target in cfg.get('notify_targets', []):
-        if 'bot_token' in target:
-            target['bot_token'] = target['bot_token'][:10] + '...'
-    return jsonify(cfg)
+        for key in ('bot_token', 'url', 'webhook_url', 'secret'):
+            if target.get(key):
+                target[key] = target[key][:10] + '...'
+    return responder.respond(cfg)
 
 
 @app.route('/api/test_push')
@@ -615,32 +1362,25 @@ def api_test_push():
             'chainId': 'ETH',
             'contractAddress': '0x1234567890abcdef'
         }
-        notify_new_token(test_token)
-        return jsonify({"status": "success", "message": "测试推送已发送"})
+        notify_new_token(test_token, token_key=f"test:{time.time()}")
+        return responder.respond({"status": "success", "message": "测试推送已加入发件箱"})
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return responder.respond({"status": "error", "message": str(e)}, 500)
 
 
 @app.route('/api/check_now')
 def api_check_now():
-    """API: 立即检查"""
-    try:
-        current_tokens = fetch_alpha_tokens()
-        if not current_tokens:
-            return jsonify({"status": "error", "message": "无法获取代币数据"}), 500
-        
-        current_ids = {t.get('alphaId') for t in current_tokens}
-        previous_ids = {t.get('alphaId') for t in monitor_state.get('tokens', [])}
-        new_ids = current_ids - previous_ids
-        
-        return jsonify({
-            "status": "success",
-            "total": len(current_tokens),
-            "new": len(new_ids),
-            "message": f"检查完成: 总共 {len(current_tokens)} 个代币, 新增 {len(new_ids)} 个"
-        })
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+    """API: 立即检查 (唤醒监控循环, 返回这一轮的结果; 同时点击的请求共用一次抓取)"""
+    result = check_trigger.wait(check_trigger.request(), CHECK_TIMEOUT)
+    if result is None:
+        return responder.respond({"status": "error", "message": f"监控循环 {CHECK_TIMEOUT} 秒内未完成检查"}, 504)
+    if result.get('error'):
+        return responder.respond({"status": "error", "message": result['error']}, 500)
+    return responder.respond({
+        "status": "success",
+        **result,
+        "message": f"检查完成: 总共 {result['total']} 个代币, 新增 {result['new']} 个"
+    })
 
 
 # =============== 主程序 ===============
@@ -653,12 +1393,22 @@ if __name__ == "__main__":
     # 确保配置存在
     ensure_config()
     
+    # sidecar 模式: 只运行监控循环 (持有租约), Web 由 gunicorn worker 提供
+    if '--monitor-only' in sys.argv:
+        start_election(block=True)
+        sys.exit(0)
+    
     # 加载配置
     cfg = load_config()
     port = cfg.get('webui_port', 5002)
     
-    # 启动监控线程
-    start_monitor()
+    # 启动监控线程 (多节点模式下竞选租约, 备节点只同步状态)
+    if cluster:
+        restore_snapshot()
+        StateFollower(STATE_PATH, on_change=apply_shared_state).start()
+        start_election()
+    else:
+        start_monitor()
     
     # 启动 Flask
     logger.info(f"Web UI: http://localhost:{port}")
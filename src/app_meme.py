@@ -6,33 +6,53 @@ NTX Binance Meme Rush Monitor
 实时监控币安 Meme Rush 排行榜
 """
 
+import hashlib
 import json
 import os
+import sys
 import threading
 import time
 import logging
 from datetime import datetime, timezone
-from typing import Dict, List
-
-import requests
-from flask import Flask, request, jsonify, send_from_directory
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from typing import Dict, List, Optional
+
+from flask import Flask, request, send_from_directory
+from flask.json import JSONEncoder
+
+from changefeed import ChangeFeed
+from events import EventRing, options_from as event_options
+from httpcache import JSONResponder
+from cluster import StateMirror, get_cluster
+from changes import ChangeDetector
+from history import HistoryStore, options_from as history_options
+from records import MemeToken, pack_records, to_jsonable, unpack_records
+from logsetup import setup_logging
+from outbox import Outbox, SendResult, delivery_key, options_from as outbox_options
+from leader import FileLease, LeaderElector, StateFollower
+from resilience import AUTH, RATE_LIMIT, BreakerRegistry, Failure
+from scraper import ScraperError, ScraperPool, options_from as scraper_options
+from trigger import CheckTrigger
+from tracing import LatencyTracker, StartupTimer, ack, mark, new_trace
+from filters import get_router, token_symbol
+from movement import RankTracker, alert_rules, classify
+from notifiers import active_channels, get_notifier, notify_enabled
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
 
 # =============== 配置 ===============
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CONFIG_PATH = os.path.join(ROOT, "config_files", "config.json")
 STATE_PATH = os.path.join(ROOT, "data", "monitor_state.json")
+LOCK_PATH = os.path.join(ROOT, "data", "monitor.lock")
+METRICS_PATH = os.path.join(ROOT, "data", "metrics.prom")
+OUTBOX_PATH = os.path.join(ROOT, "data", "outbox.db")
+CHECK_PATH = os.path.join(ROOT, "data", "check_now.request")
+HISTORY_PATH = os.path.join(ROOT, "data", "history.db")
 LOGS_DIR = os.path.join(ROOT, "logs")
 
 # Meme Rush URL
 MEME_RUSH_URL = "https://web3.binance.com/zh-CN/meme-rush/rank?chain=bsc"
+MEME_CHAIN = "bsc"
 
 # 创建目录
 os.makedirs(os.path.join(ROOT, "config_files"), exist_ok=True)
@@ -41,29 +61,92 @@ os.makedirs(LOGS_DIR, exist_ok=True)
 
 # =============== 日志配置 ===============
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(LOGS_DIR, 'app.log')),
-        logging.StreamHandler()
-    ]
-)
+# 业务线程只入队, 后台线程写 JSON Lines 文件 (按大小 / 时间轮转)
+setup_logging(LOGS_DIR, source='meme', config_path=CONFIG_PATH)
 logger = logging.getLogger(__name__)
 
 # =============== Flask 应用 ===============
 
 app = Flask(__name__, static_folder=os.path.join(ROOT, 'static'))
 
+
+class RecordJSONEncoder(JSONEncoder):
+    """jsonify 支持代币记录"""
+
+    def default(self, o):
+        if isinstance(o, MemeToken):
+            return o.to_dict()
+        return super().default(o)
+
+
+app.json_encoder = RecordJSONEncoder
+
+# JSON 接口: 同一状态快照只序列化一次, 支持 gzip / br 压缩与 ETag (命中返回 304)
+responder = JSONResponder(lambda data: json.dumps(data, cls=RecordJSONEncoder, ensure_ascii=False,
+                                                  separators=(',', ':')).encode('utf-8'))
+
 # =============== 全局状态 ===============
 
 monitor_state = {
     "last_check": "",
     "tokens": [],
-    "token_count": 0
+    "token_count": 0,
+    "version": 0
 }
 
-driver = None
+# 变更流 (按排行项文本标识代币)
+change_feed = ChangeFeed(key=lambda t: t.get('raw_text', ''))
+# 排行项以文本为标识, 只关注排名变化
+change_detector = ChangeDetector(key=lambda t: t.get('raw_text', ''), fields=('rank',))
+# 名次变动按代币标识 (排行项第一行, 即代号) 索引: 排行项文本里的价格等每轮都会变
+rank_tracker = RankTracker(key=lambda t: token_symbol(t) or t.get('raw_text', '')[:50], default_chain=MEME_CHAIN)
+
+# 新币发现延迟 (最近 500 个)
+latency_tracker = LatencyTracker()
+
+# "立即检查": 唤醒监控循环, 并发的请求共用同一轮抓取
+check_trigger = CheckTrigger(CHECK_PATH)
+# 等待这一轮完成的最长时间 (秒)
+CHECK_TIMEOUT = 60
+# 浏览器未就绪时每次等待的时间 (秒), 之后重新确认租约并应答已到达的立即检查请求
+BROWSER_WAIT = 10
+
+# =============== 指标 ===============
+
+METRICS = Registry()
+FETCH_SECONDS = METRICS.histogram('monitor_fetch_seconds', '上游抓取耗时 (秒)', ['source'])
+FETCH_BYTES = METRICS.gauge('monitor_fetch_response_bytes', '最近一次上游响应大小 (字节)', ['source'])
+TOKEN_COUNT = METRICS.gauge('monitor_tokens', '最近一次获取的代币数', ['source'])
+DIFF_TOKENS = METRICS.counter('monitor_diff_tokens_total', '累计变更代币数', ['source', 'kind'])
+LAST_DIFF = METRICS.gauge('monitor_last_diff_tokens', '最近一轮变更代币数', ['source', 'kind'])
+NOTIFY_QUEUE = METRICS.gauge('notify_queue_depth', '发件箱中待发送的通知数')
+NOTIFY_SECONDS = METRICS.histogram('notify_send_seconds', '通知发送耗时 (秒)', ['target'])
+NOTIFY_SENT = METRICS.counter('notify_sent_total', '通知发送次数', ['target', 'status'])
+NOTIFY_429 = METRICS.counter('notify_rate_limited_total', '通知被限流 (429) 次数', ['target'])
+LOOP_SECONDS = METRICS.histogram('monitor_loop_seconds', '单轮监控耗时, 不含等待 (秒)')
+LAST_SUCCESS = METRICS.gauge('monitor_last_success_timestamp_seconds', '最近一次成功轮询的时间戳')
+SINCE_SUCCESS = METRICS.gauge('monitor_seconds_since_last_success', '距最近一次成功轮询的秒数')
+SINCE_SUCCESS.set_function(lambda: time.time() - last_success_time if last_success_time else -1)
+CHROME_RSS = METRICS.gauge('chrome_rss_bytes', '抓取进程 (含 Chrome 及 chromedriver) 常驻内存 (字节)')
+CHROME_RSS.set_function(lambda: scraper.rss())
+STARTUP_SECONDS = METRICS.gauge('monitor_startup_seconds', '进程启动到各阶段的耗时 (秒)', ['phase'])
+
+# 冷启动耗时: 恢复快照 / 第一个请求 / 浏览器就绪 / 第一轮轮询
+startup = StartupTimer(on_mark=lambda phase, seconds: STARTUP_SECONDS.set(seconds, phase=phase))
+
+last_success_time = 0.0
+
+
+def save_metrics():
+    """写出指标快照, 供多 worker 模式下的跟随进程输出"""
+    try:
+        tmp_path = METRICS_PATH + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(METRICS.render())
+        os.replace(tmp_path, METRICS_PATH)
+    except Exception as e:
+        logger.error(f"保存指标失败: {e}")
+
 
 # =============== 配置管理 ===============
 
@@ -113,187 +196,132 @@ def load_state():
     try:
         if os.path.exists(STATE_PATH):
             with open(STATE_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                state = json.load(f)
+            state['tokens'] = unpack_records(state.get('tokens'), MemeToken)
+            return state
     except Exception as e:
         logger.error(f"加载状态失败: {e}")
-    return {"last_check": "", "tokens": [], "token_count": 0}
+    return {"last_check": "", "tokens": [], "token_count": 0, "version": 0}
 
 
 def save_state(state: dict):
-    """保存状态"""
+    """保存状态 (先写临时文件再替换, 跟随进程不会读到半个文件; 代币列表按列存储)"""
     try:
-        with open(STATE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(state, f, indent=2, ensure_ascii=False)
+        tmp_path = STATE_PATH + '.tmp'
+        state = {**state, "tokens": pack_records(state.get('tokens', []), MemeToken)}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, separators=(',', ':'), default=to_jsonable)
+        os.replace(tmp_path, STATE_PATH)
     except Exception as e:
         logger.error(f"保存状态失败: {e}")
 
 
-# =============== Selenium 浏览器 ===============
+# =============== Meme Rush 抓取 ===============
 
-def init_driver():
-    """初始化 Selenium WebDriver"""
-    global driver
-    
-    cfg = load_config()
-    headless = cfg.get('headless', True)
-    
-    try:
-        options = Options()
-        if headless:
-            options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)')
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        logger.info("✓ Selenium WebDriver 初始化成功")
-        return True
-        
-    except Exception as e:
-        logger.error(f"× Selenium WebDriver 初始化失败: {e}")
-        return False
+def scraper_command() -> List[str]:
+    """抓取进程的命令行 (每次启动抓取进程时读取最新的 headless 配置)"""
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scraper.py'),
+               '--worker', '--url', MEME_RUSH_URL, '--logs-dir', LOGS_DIR]
+    if not load_config().get('headless', True):
+        command.append('--no-headless')
+    return command
 
 
-def close_driver():
-    """关闭浏览器"""
-    global driver
-    if driver:
-        try:
-            driver.quit()
-            logger.info("✓ WebDriver 已关闭")
-        except:
-            pass
+def on_browser_ready():
+    seconds = startup.mark('browser')
+    logger.info(f"✓ 浏览器已就绪 (启动后 {seconds}s)")
 
 
-# =============== Meme Rush 抓取 ===============
+# Selenium 在独立的抓取进程中运行 (config.json 的 scraper), 卡死的 Chrome 不会拖住 Web 服务
+scraper = ScraperPool(scraper_command, on_ready=on_browser_ready, **scraper_options(load_config()))
+
+
+def start_browser():
+    """在后台启动抓取进程 (启动后预先打开排行榜页面; 已启动时不重复启动)"""
+    scraper.start()
+
+
+def stop_scraper():
+    """停止抓取进程 (关闭浏览器)"""
+    scraper.stop()
+    logger.info("✓ 抓取进程已停止")
+
 
 def fetch_meme_tokens():
-    """抓取 Meme Rush 代币列表"""
-    global driver
-    
-    if not driver:
-        if not init_driver():
-            return []
-    
+    """由抓取进程抓取 Meme Rush 代币列表"""
     try:
-        logger.info(f"访问页面: {MEME_RUSH_URL}")
-        driver.get(MEME_RUSH_URL)
-        
-        # 等待页面加载
-        wait = WebDriverWait(driver, 20)
-        
-        # 等待排行榜元素出现
-        time.sleep(5)  # 额外等待 JavaScript 渲染
-        
-        # 尝试获取代币列表 (需要根据实际页面结构调整选择器)
-        tokens = []
-        
-        # 方案1: 尝试获取表格行
-        try:
-            rows = driver.find_elements(By.CSS_SELECTOR, "tr[data-token], .token-row, [class*='rank-item']")
-            logger.info(f"找到 {len(rows)} 个排行项")
-            
-            for i, row in enumerate(rows[:50]):  # 只取前50
-                try:
-                    # 提取代币信息 (需要根据实际HTML调整)
-                    text = row.text
-                    if text:
-                        tokens.append({
-                            "rank": i + 1,
-                            "raw_text": text,
-                            "timestamp": datetime.now(timezone.utc).isoformat()
-                        })
-                except:
-                    continue
-                    
-        except Exception as e:
-            logger.warning(f"方案1失败: {e}")
-        
-        # 方案2: 如果方案1失败,获取整个页面文本分析
-        if not tokens:
-            try:
-                page_source = driver.page_source
-                # 保存页面源码用于调试
-                with open(os.path.join(LOGS_DIR, 'page_source.html'), 'w', encoding='utf-8') as f:
-                    f.write(page_source)
-                logger.info("已保存页面源码到 logs/page_source.html")
-                
-                # 尝试通过 JavaScript 获取数据
-                script = """
-                return Array.from(document.querySelectorAll('table tbody tr, [class*="rank"], [class*="token-item"]'))
-                    .slice(0, 50)
-                    .map((el, i) => ({
-                        rank: i + 1,
-                        text: el.innerText,
-                        html: el.outerHTML.substring(0, 200)
-                    }));
-                """
-                results = driver.execute_script(script)
-                
-                for item in results:
-                    if item.get('text'):
-                        tokens.append({
-                            "rank": item['rank'],
-                            "raw_text": item['text'],
-                            "html_preview": item.get('html', ''),
-                            "timestamp": datetime.now(timezone.utc).isoformat()
-                        })
-                        
-                logger.info(f"方案2找到 {len(tokens)} 个代币")
-                
-            except Exception as e:
-                logger.error(f"方案2失败: {e}")
-        
-        return tokens
-        
-    except Exception as e:
+        result = scraper.submit({"url": MEME_RUSH_URL, "chain": MEME_CHAIN})
+    except ScraperError as e:
         logger.error(f"抓取失败: {e}")
         return []
+    tokens = [MemeToken.from_dict(t) for t in result.get('tokens', [])]
+    FETCH_BYTES.set(sum(len(t.raw_text.encode('utf-8')) for t in tokens), source='meme')
+    return tokens
 
 
-# =============== Telegram 推送 ===============
+# =============== 消息推送 ===============
 
-def send_telegram(bot_token: str, chat_id: str, text: str):
-    """发送Telegram消息"""
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    data = {
-        "chat_id": chat_id,
-        "text": text,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True
-    }
-    
-    try:
-        response = requests.post(url, json=data, timeout=10)
-        if response.status_code == 200:
-            logger.info(f"Telegram推送成功: {chat_id}")
-            return True
-        else:
-            logger.error(f"Telegram推送失败: {response.status_code}")
-    except Exception as e:
-        logger.error(f"Telegram推送异常: {e}")
-    
-    return False
+# 每个推送凭据 (bot / webhook) 一个熔断器, 熔断期间的投递直接延后, 不占用发送通道
+notify_breakers = BreakerRegistry()
 
 
-def notify_new_tokens(new_tokens: List[dict]):
-    """通知新代币"""
-    cfg = load_config()
+def breaker_snapshot() -> dict:
+    """熔断器状态 (API 与共享状态用)"""
+    return {"notify": notify_breakers.snapshot()}
+
+
+def send_notification(target: dict, message: str) -> SendResult:
+    """按目标配置的渠道 (telegram / webhook / discord / lark) 发送一条消息"""
+    name = target_name(target)
+    try:
+        notifier = get_notifier(target)
+    except ValueError as e:
+        logger.error(f"推送目标配置错误: {name}: {e}", extra={"target": name})
+        return SendResult(False, str(e), kind=AUTH)
     
-    if cfg.get('notify_method') not in ['telegram', 'both']:
-        return
+    # 熔断按凭据计; 429 退避按 rate_limit_key 计 (Telegram 为每个会话, 其他渠道与熔断器相同)
+    breaker = notify_breakers.get(notifier.breaker_key())
+    limiter = notify_breakers.get(notifier.rate_limit_key())
+    if limiter is not breaker and limiter.retry_in() > 0:
+        return SendResult(False, f"限流中: {limiter.name}", retry_after=limiter.retry_in(), attempted=False)
+    if not breaker.allow():
+        return SendResult(False, f"熔断中: {breaker.name}", retry_after=breaker.retry_in(), attempted=False)
     
-    # 构建消息
+    with NOTIFY_SECONDS.time(target=name):
+        result = notifier.send(message)
+    
+    if result.ok:
+        breaker.record_success()
+        if limiter is not breaker:
+            limiter.record_success()
+        logger.info(f"{notifier.channel} 推送成功: {name}", extra={"target": name})
+        NOTIFY_SENT.inc(target=name, status='ok')
+        return SendResult(True)
+    
+    failure = Failure(result.kind, result.error, result.status, result.retry_after)
+    if result.kind == RATE_LIMIT and limiter is not breaker:
+        # 会话级限流: 凭据本身可用, 熔断器按成功处理 (同时释放半开探测名额)
+        breaker.record_success()
+        limiter.record_failure(failure)
+    else:
+        breaker.record_failure(failure)
+    logger.error(f"{notifier.channel} 推送失败 ({result.kind}): {name} [{result.status}] {result.error}",
+                 extra={"target": name})
+    if result.status == 429:
+        NOTIFY_429.inc(target=name)
+    NOTIFY_SENT.inc(target=name, status='error')
+    return SendResult(False, result.error, result.kind, result.retry_after)
+
+
+def format_meme_message(tokens: List[dict]) -> str:
+    """构建 Meme Rush 新币消息"""
     message = f"""🔥 <b>Binance Meme Rush 新币上榜!</b>
 
-发现 {len(new_tokens)} 个新币进入排行榜:
+发现 {len(tokens)} 个新币进入排行榜:
 
 """
     
-    for token in new_tokens[:10]:  # 最多显示10个
+    for token in tokens[:10]:  # 最多显示10个
         rank = token.get('rank', '?')
         text = token.get('raw_text', 'Unknown')[:100]
         message += f"#{rank}. {text}\n"
@@ -301,96 +329,470 @@ def notify_new_tokens(new_tokens: List[dict]):
     message += f"\n⏰ <b>检查时间:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
     message += f"🔗 <b>查看详情:</b> {MEME_RUSH_URL}\n\n"
     message += "💡 由 NTX Quest Radar 提供"
+    return message
+
+
+def notify_new_tokens(new_tokens: List[dict], traces: List[dict] = ()):
+    """通知新代币: 写入发件箱后立即返回 (traces 用于记录入队与各目标确认时间)
+
+    按订阅过滤把新币分配给各目标, 订阅到相同代币的目标共用一条消息。
+    """
+    cfg = load_config()
+    
+    if not notify_enabled(cfg):
+        return
+    
+    routes = get_router(cfg.get('notify_targets', [])).route(new_tokens, 'meme')
+    
+    # 目标 -> 订阅到的代币下标, 再按下标集合分组
+    per_target: Dict[str, List[int]] = {}
+    for i, names in enumerate(routes):
+        for name in names:
+            per_target.setdefault(name, []).append(i)
+    groups: Dict[tuple, List[str]] = {}
+    for name, indexes in per_target.items():
+        groups.setdefault(tuple(indexes), []).append(name)
+    
+    # 写入发件箱, 由后台线程推送
+    for indexes, names in groups.items():
+        subset = [new_tokens[i] for i in indexes]
+        batch_key = hashlib.sha1('\n'.join(sorted(t.get('raw_text', '') for t in subset)).encode('utf-8')).hexdigest()
+        enqueue_notification(
+            f"meme:{batch_key}",
+            format_meme_message(subset),
+            [traces[i] for i in indexes] if traces else [],
+            names
+        )
+
+
+# 首页事件表的类别名
+EVENT_LABELS = {'added': '新上榜', 'entered_top': '进入前列', 'jumped': '上升', 'fell': '下降', 'dropped': '掉榜'}
+
+RANK_ALERT_LABELS = {
+    'entered_top': '🏆 进入前 {top}',
+    'jumped': '🚀 上升 {delta} 名',
+    'fell': '📉 下降 {delta} 名',
+    'dropped': '❌ 掉出排行榜',
+}
+
+
+def format_rank_message(alerts: List[tuple], top: int) -> str:
+    """构建名次变动消息 (alerts: [(Movement, 类别)])"""
+    message = "📊 <b>Binance Meme Rush 名次变动</b>\n\n"
+    for movement, kind in alerts[:20]:
+        label = RANK_ALERT_LABELS[kind].format(top=top,
+                                               delta=abs((movement.old or 0) - (movement.new or 0)))
+        before = f"#{movement.old}" if movement.old else "新上榜"
+        after = f"#{movement.new}" if movement.new else "榜外"
+        message += f"{label}: <b>{movement.key}</b> ({before} → {after})\n"
+    if len(alerts) > 20:
+        message += f"... 另有 {len(alerts) - 20} 条\n"
     
-    # 推送到所有启用的目标
+    message += f"\n⏰ <b>检查时间:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+    message += f"🔗 <b>查看详情:</b> {MEME_RUSH_URL}\n\n"
+    message += "💡 由 NTX Quest Radar 提供"
+    return message
+
+
+def notify_rank_movements(movements: list, baseline: str) -> List[tuple]:
+    """名次变动提醒: 按各目标的 rank_alerts 阈值筛选、去抖后写入发件箱, 返回实际提醒的 (Movement, 类别)
+
+    baseline: 上一轮的检查时间, 与变动内容一起生成幂等键 (同一轮重复检测不会重复推送)
+    """
+    cfg = load_config()
+    if not notify_enabled(cfg):
+        return []
+    
+    router = get_router(cfg.get('notify_targets', []))
+    subscribed = {}  # 变动下标 -> 订阅该代币的目标 (按需计算)
+    groups: Dict[tuple, List[str]] = {}
+    fired: Dict[tuple, tuple] = {}
+    cooldowns = [0]
     for target in cfg.get('notify_targets', []):
-        if target.get('enabled', True):
-            send_telegram(
-                target.get('bot_token'),
-                target.get('chat_id'),
-                message
-            )
-            time.sleep(2)
+        rules = alert_rules(cfg, target)
+        if not target.get('enabled', True) or not rules:
+            continue
+        name = target_name(target)
+        cooldowns.append(rules['cooldown'])
+        alerts = []
+        for i, movement in enumerate(movements):
+            kind = classify(movement, rules)
+            if kind is None:
+                continue
+            if i not in subscribed:
+                subscribed[i] = router.targets_for(movement.token, 'meme')
+            if name in subscribed[i] and rank_tracker.debounce(name, movement, kind, rules['cooldown']):
+                alerts.append((i, kind))
+                fired.setdefault((movement.chain, movement.key, kind), (movement, kind))
+        if alerts:
+            groups.setdefault((rules['top'], tuple(alerts)), []).append(name)
+    rank_tracker.prune(max(cooldowns))
+    
+    # 提醒内容相同的目标共用一条消息
+    for (top, alerts), names in groups.items():
+        items = [(movements[i], kind) for i, kind in alerts]
+        payload = baseline + '\n' + '\n'.join(f"{m.chain}|{m.key}|{m.old}|{m.new}|{kind}" for m, kind in items)
+        logger.info(f"名次变动提醒 {len(items)} 条 -> {len(names)} 个目标")
+        enqueue_notification(
+            f"meme-rank:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}",
+            format_rank_message(items, top),
+            [],
+            names
+        )
+    return list(fired.values())
+
+
+# =============== 通知发件箱 ===============
+
+# 幂等键 -> (trace 列表, 目标名), 投递成功后记录确认时间
+pending_traces: Dict[str, tuple] = {}
+
+
+def target_name(target: dict) -> str:
+    """推送目标的标识 (发件箱与延迟 trace 使用)"""
+    return target.get('name') or str(target.get('chat_id'))
+
+
+def deliver(name: str, message: str) -> SendResult:
+    """发件箱回调: 按目标名查找当前配置并发送"""
+    if not still_leader():
+        # 已失去租约 (多节点主备): 由新主节点投递, 本节点重新当选后再查是否已发出
+        return SendResult(False, "非主节点, 暂停投递", retry_after=30, attempted=False)
+    for target in load_config().get('notify_targets', []):
+        if target_name(target) == name:
+            return send_notification(target, message)
+    logger.warning(f"推送目标不存在: {name}")
+    return SendResult(False, f"推送目标不存在: {name}")
+
+
+def on_delivered(key: str):
+    """发件箱回调: 投递成功"""
+    if cluster:
+        cluster.mark_sent(key)
+    entry = pending_traces.pop(key, None)
+    if entry:
+        traces, name = entry
+        for trace in traces:
+            ack(trace, name)
+
+
+def enqueue_notification(token_key: str, message: str, traces: List[dict] = (), targets: List[str] = None):
+    """把消息写入发件箱 (每个目标一条, 缺省为全部启用的目标), 由后台线程投递"""
+    if targets is None:
+        cfg = load_config()
+        names = [target_name(t) for t in cfg.get('notify_targets', []) if t.get('enabled', True)]
+    else:
+        names = list(targets)
+    if not names:
+        return
+    for trace in traces:
+        mark(trace, 'enqueued')
+    if traces:
+        for name in names:
+            pending_traces[delivery_key(token_key, name)] = (list(traces), name)
+        # 投递失败的记录不会回调, 只保留最近的条目
+        while len(pending_traces) > 1000:
+            pending_traces.pop(next(iter(pending_traces)))
+    outbox.enqueue(token_key, names, message)
+
+
+# 最近的发现事件 (config.json 的 events: capacity 条数 / max_age 秒数)
+event_ring = EventRing(**event_options(load_config()))
+
+
+def detection_event(kind: str, token: dict, trace: Optional[dict] = None, **extra) -> dict:
+    """写入事件环的发现事件 (排行榜没有上线时间, latency 为空)"""
+    text = token.get('raw_text', '')
+    return {
+        "time": trace['detected'] if trace else time.time(),
+        "source": "meme",
+        "kind": kind,
+        "token": text[:50],
+        "symbol": text.split('\n', 1)[0][:30],
+        "name": None,
+        "rank": token.get('rank'),
+        "latency": None,
+        **extra
+    }
+
+
+# 轮询历史 (config.json 的 history, enabled=false 关闭): 保留层级与后台维护
+history = HistoryStore(HISTORY_PATH, **history_options(load_config())) \
+    if (load_config().get('history') or {}).get('enabled', True) else None
+
+
+# 多节点主备 (config.json 的 cluster), 未配置时为单机模式
+cluster = get_cluster(load_config().get('cluster'), 'meme')
+
+outbox = Outbox(OUTBOX_PATH, send=deliver, on_sent=on_delivered, **outbox_options(load_config()),
+                already_sent=cluster.was_sent if cluster else None)
+NOTIFY_QUEUE.set_function(outbox.pending_count)
 
 
 # =============== 监控循环 ===============
 
-def monitor_loop():
-    """监控循环"""
+def still_leader() -> bool:
+    """本进程是否应当轮询与推送 (单机模式总是; 选举模式下持有租约时)"""
+    return elector is None or elector.is_leader
+
+
+def restore_snapshot():
+    """载入上次持久化的状态: Web 立即提供重启前的数据, 不等第一轮轮询"""
     global monitor_state
+    monitor_state = load_state()
+    latency_tracker.load(monitor_state.get('traces'))
+    event_ring.load(monitor_state.get('events'))
+    rank_tracker.load(monitor_state.get('rank_alerts'), monitor_state.get('tokens', []))
+    if change_feed.version != monitor_state.get('version', 0):
+        change_feed.reset(monitor_state.get('version', 0))
+    startup.mark('snapshot')
+
+
+def monitor_loop(restored: bool = False):
+    """监控循环
+
+    restored: 启动时已调用 restore_snapshot (否则在这里载入, 如跟随者当选主节点)
+    """
+    global monitor_state, last_success_time
     
     logger.info("监控循环已启动")
     
-    # 初始化浏览器
-    if not init_driver():
-        logger.error("无法初始化浏览器,监控终止")
-        return
+    # 发件箱投递线程 (只在运行监控的进程中), 重启前未完成的投递立即继续
+    outbox.start()
+    if history:
+        history.start()
     
-    # 加载上次状态
-    monitor_state = load_state()
+    # 加载上次状态 (多节点时先拉取主节点最后发布的状态, 并接管其未完成的投递)
+    if cluster:
+        cluster.pull(STATE_PATH)
+    if not restored:
+        restore_snapshot()
+    if cluster:
+        outbox.adopt(monitor_state.get('outbox_pending'))
     is_first_run = not monitor_state.get('tokens')
     
+    # 浏览器在后台启动, 就绪前 Web 与发件箱照常工作
+    if not scraper.ready:
+        start_browser()
+    
+    waiting_since = None
     while True:
+        if not still_leader():
+            logger.warning("已失去监控租约, 停止轮询")
+            return
+        if not scraper.ready:
+            # 分段等待: 抓取进程起不来时也不会一直卡住, 期间的立即检查请求得到错误结果
+            if waiting_since is None:
+                waiting_since = time.monotonic()
+                logger.info("等待浏览器就绪...")
+            slice_start = time.monotonic()
+            if not scraper.wait_ready(BROWSER_WAIT):
+                waited = time.monotonic() - waiting_since
+                check_trigger.complete(check_trigger.begin(), {"error": f"浏览器未就绪 (已等待 {waited:.0f}s)"})
+                # 抓取进程已停止时 wait_ready 立即返回, 补足等待时间
+                time.sleep(max(0.0, BROWSER_WAIT - (time.monotonic() - slice_start)))
+                continue
+        waiting_since = None
+        check_seq = check_trigger.begin()
         try:
             logger.info("检查 Meme Rush 排行榜...")
             
+            loop_start = time.perf_counter()
+            
             # 获取当前代币列表
-            current_tokens = fetch_meme_tokens()
+            fetch_start = time.time()
+            with FETCH_SECONDS.time(source='meme'):
+                current_tokens = fetch_meme_tokens()
+            fetch_end = time.time()
             
             if not current_tokens:
                 logger.warning("未获取到代币数据")
+                check_trigger.complete(check_seq, {"error": "无法获取数据"})
                 time.sleep(60)
                 continue
             
-            # 提取标识进行比对
-            current_texts = {t.get('raw_text', '') for t in current_tokens}
-            previous_texts = {t.get('raw_text', '') for t in monitor_state.get('tokens', [])}
-            
-            # 检测新增代币
-            new_texts = current_texts - previous_texts
+            # 检测新增 / 掉榜 / 排名变化
+            previous_tokens = monitor_state.get('tokens', [])
+            changeset = change_detector.diff(previous_tokens, current_tokens)
+            traced_tokens = {}
             
-            if new_texts:
+            if changeset.added:
                 if is_first_run:
                     logger.info(f"首次运行: 发现 {len(current_tokens)} 个代币,跳过推送")
                     is_first_run = False
                 else:
-                    logger.info(f"🚀 发现 {len(new_texts)} 个新币!")
+                    logger.info(f"🚀 发现 {len(changeset.added)} 个新币!")
                     
-                    # 找出新币详情并推送
-                    new_token_details = [t for t in current_tokens if t.get('raw_text') in new_texts]
-                    notify_new_tokens(new_token_details)
+                    # 新币详情并推送
+                    new_token_details = changeset.added
+                    traces = [new_trace(t, fetch_start, fetch_end) for t in new_token_details]
+                    for token, trace in zip(new_token_details, traces):
+                        traced_tokens[token.get('raw_text')] = {**token, "trace": trace}
+                    notify_new_tokens(new_token_details, traces)
+                    for token, trace in zip(new_token_details, traces):
+                        latency_tracker.record(token.get('raw_text', '')[:50], trace)
+                        event_ring.append(detection_event('added', token, trace))
             else:
                 logger.info("✓ 没有新币上榜")
             
+            # 名次变动 (每条链与上一轮的名次索引比对一次, 再按各目标阈值筛选)
+            by_chain: Dict[str, List[dict]] = {}
+            for token in current_tokens:
+                by_chain.setdefault(rank_tracker.chain_of(token), []).append(token)
+            movements = [m for chain, items in by_chain.items() for m in rank_tracker.update(chain, items)]
+            if movements:
+                for movement, kind in notify_rank_movements(movements, monitor_state.get('last_check', '')):
+                    event_ring.append(detection_event(kind, movement.token, rank=movement.new, old_rank=movement.old))
+            
+            # 发布变更 (首次运行只建立基线)
+            version = monitor_state.get('version', 0)
+            changes = monitor_state.get('changes')
+            if previous_tokens and changeset:
+                changes = {
+                    "added": [traced_tokens.get(t.get('raw_text'), t) for t in changeset.added],
+                    "removed": changeset.removed,
+                    "changed": [{**token, "changes": diff} for token, diff in changeset.modified]
+                }
+                version = change_feed.publish(**changes)
+            
             # 更新状态
             monitor_state = {
                 "last_check": datetime.now(timezone.utc).isoformat(),
                 "tokens": current_tokens[:100],
                 "token_count": len(current_tokens),
-                "new_count": len(new_texts) if not is_first_run else 0
+                "new_count": len(changeset.added) if not is_first_run else 0,
+                "version": version,
+                "changes": changes,  # 本版本的变更, 供跟随进程复制
+                "traces": latency_tracker.recent(200),
+                "events": event_ring.dump(),
+                "rank_alerts": rank_tracker.dump(),
+                "breakers": breaker_snapshot(),
+                "check_seq": check_seq  # 本轮覆盖的立即检查请求, 供跟随进程应答
             }
+            if cluster:
+                monitor_state["outbox_pending"] = outbox.pending_rows()
             save_state(monitor_state)
+            if cluster:
+                cluster.publish(STATE_PATH)
+            check_trigger.complete(check_seq, check_result(monitor_state))
+            if history:
+                history.record('meme', [
+                    ('token_count', len(current_tokens)),
+                    ('added', len(changeset.added)),
+                    ('removed', len(changeset.removed)),
+                    ('fetch_seconds', fetch_end - fetch_start)
+                ])
+                # 每个代币的名次 (与名次索引同一标识, 排行项文本里的价格每轮都变, 不能作键)
+                history.record(f'rank:{MEME_CHAIN}', [(rank_tracker.key(t), t.get('rank')) for t in current_tokens
+                                                      if t.get('rank') is not None])
+            
+            # 指标
+            TOKEN_COUNT.set(len(current_tokens), source='meme')
+            for kind, items in zip(('added', 'removed', 'changed'), changeset):
+                DIFF_TOKENS.inc(len(items), source='meme', kind=kind)
+                LAST_DIFF.set(len(items), source='meme', kind=kind)
+            last_success_time = time.time()
+            LAST_SUCCESS.set(last_success_time)
+            LOOP_SECONDS.observe(time.perf_counter() - loop_start)
+            if startup.mark('first_poll') is not None:
+                logger.info(f"启动耗时: {startup.describe()}")
+            if elector:
+                save_metrics()
             
             # 等待下次检查
             cfg = load_config()
             interval = cfg.get('check_interval', 300)
             logger.info(f"等待 {interval} 秒后下次检查...")
-            time.sleep(interval)
+            if check_trigger.sleep(interval):
+                logger.info("收到立即检查请求, 提前开始下一轮")
             
         except Exception as e:
             logger.error(f"监控循环异常: {e}")
+            check_trigger.complete(check_seq, {"error": str(e)})
             time.sleep(60)
 
 
 def start_monitor():
-    """启动监控线程"""
-    thread = threading.Thread(target=monitor_loop, daemon=True)
+    """先同步恢复快照 (Web 启动后立即有数据), 再启动监控线程"""
+    restore_snapshot()
+    thread = threading.Thread(target=monitor_loop, kwargs={"restored": True}, daemon=True)
     thread.start()
     logger.info("监控线程已启动")
 
 
+# =============== 生产模式 (多 worker) ===============
+
+elector = None
+
+
+def apply_shared_state(path: str):
+    """跟随者: 载入主节点写入的共享状态并复制变更流"""
+    global monitor_state
+    
+    if elector and elector.is_leader:
+        return
+    
+    state = load_state()
+    changes = state.get('changes') or {}
+    change_feed.mirror(
+        state.get('version', 0),
+        changes.get('added', []),
+        changes.get('removed', []),
+        changes.get('changed', [])
+    )
+    latency_tracker.load(state.get('traces'))
+    event_ring.load(state.get('events'))
+    monitor_state = state
+    check_trigger.complete(state.get('check_seq', 0), check_result(state))
+
+
+def check_result(state: dict) -> dict:
+    """一轮检查的摘要 (/api/check_now 的返回内容)"""
+    return {"total": state.get('token_count', 0), "new": state.get('new_count', 0),
+            "last_check": state.get('last_check')}
+
+
+def start_worker():
+    """WSGI worker 启动入口 (见 gunicorn.conf.py)
+
+    MONITOR_ROLE=auto (默认): 参与租约竞选, 当选的 worker 运行监控循环
+    MONITOR_ROLE=follower: 只跟随共享状态, 监控由 sidecar 进程 (--monitor-only) 负责
+    """
+    ensure_config()
+    restore_snapshot()
+    
+    StateFollower(STATE_PATH, on_change=apply_shared_state).start()
+    
+    if os.environ.get('MONITOR_ROLE', 'auto') != 'follower':
+        start_election()
+    logger.info(f"Worker 已启动 (pid={os.getpid()})")
+
+
+def start_election(block: bool = False):
+    """参与监控租约竞选: 单机用文件锁, 配置了 cluster 时用跨主机租约, 并在备节点上同步主节点的状态
+
+    多节点模式下备节点也预先启动浏览器 (热备), 接管后立即可以抓取
+    """
+    global elector
+    
+    elector = LeaderElector(cluster.lease() if cluster else FileLease(LOCK_PATH), on_elected=monitor_loop)
+    if cluster:
+        StateMirror(cluster, STATE_PATH, is_leader=lambda: elector.is_leader).start()
+        start_browser()
+        logger.info(f"多节点模式: {cluster.node} ({cluster.name}, ttl={cluster.ttl}s)")
+    if block:
+        elector.run()
+    else:
+        elector.start()
+
+
 # =============== Web 路由 ===============
 
+@app.before_request
+def mark_first_request():
+    startup.mark('first_request')
+
+
 @app.route('/')
 def index():
     """首页"""
@@ -398,12 +800,16 @@ def index():
     last_check = monitor_state.get('last_check', '')
     token_count = monitor_state.get('token_count', 0)
     new_count = monitor_state.get('new_count', 0)
+    events = event_ring.recent(20)
+    day_count = event_ring.count_since(time.time() - 86400, 'added')
     
     check_time = "从未检查"
     if last_check:
         try:
             dt = datetime.fromisoformat(last_check.replace('Z', '+00:00'))
             check_time = dt.strftime('%m-%d %H:%M')
+            if dt.timestamp() < startup.started_at:
+                check_time += " (重启前)"  # 恢复的快照, 本进程还没完成轮询
         except:
             pass
     
@@ -506,6 +912,28 @@ def index():
                 color: white;
                 margin-left: 10px;
             }}
+            .events {{
+                background: rgba(255,255,255,0.95);
+                border-radius: 16px;
+                padding: 20px 30px;
+                margin-bottom: 30px;
+                box-shadow: 0 8px 32px rgba(0,0,0,0.1);
+            }}
+            .events h2 {{
+                color: #f5576c;
+                font-size: 20px;
+                margin-bottom: 10px;
+            }}
+            .events table {{
+                width: 100%;
+                border-collapse: collapse;
+                font-size: 14px;
+            }}
+            .events td {{
+                padding: 6px 8px;
+                border-bottom: 1px solid #eee;
+                color: #555;
+            }}
         </style>
     </head>
     <body>
@@ -526,6 +954,10 @@ def index():
                         <div class="stat-value">{new_count}</div>
                         <div class="stat-label">本次新增</div>
                     </div>
+                    <div class="stat-card">
+                        <div class="stat-value">{day_count}</div>
+                        <div class="stat-label">24 小时新上榜</div>
+                    </div>
                     <div class="stat-card">
                         <div class="stat-value">{len(tokens)}</div>
                         <div class="stat-label">显示数量</div>
@@ -539,7 +971,33 @@ def index():
                 <a href="/manage" class="btn-manage">⚙️ 管理配置</a>
                 <a href="{MEME_RUSH_URL}" target="_blank" class="btn-manage">🔗 查看原页面</a>
             </div>
-            
+    """
+    
+    if events:
+        html += """
+            <div class="events">
+                <h2>🕒 最近上榜 / 名次变动</h2>
+                <table>
+        """
+        for event in events:
+            when = datetime.fromtimestamp(event['time']).strftime('%m-%d %H:%M:%S')
+            rank = f"#{event.get('rank') or '?'}" if event['kind'] != 'dropped' else '榜外'
+            if event.get('old_rank'):
+                rank = f"#{event['old_rank']} → {rank}"
+            html += f"""
+                    <tr>
+                        <td>{when}</td>
+                        <td>{EVENT_LABELS.get(event['kind'], event['kind'])}</td>
+                        <td>{rank}</td>
+                        <td><b>{event.get('symbol') or 'N/A'}</b></td>
+                    </tr>
+            """
+        html += """
+                </table>
+            </div>
+        """
+    
+    html += """
             <div class="tokens">
     """
     
@@ -573,6 +1031,21 @@ def manage():
     """管理页面"""
     cfg = load_config()
     
+    latency_html = ""
+    for stage, stats in latency_tracker.summary().items():
+        latency_html += f"""
+        <tr>
+            <td>{stage}</td>
+            <td>{stats['count']}</td>
+            <td>{stats['p50']}</td>
+            <td>{stats['p90']}</td>
+            <td>{stats['p99']}</td>
+            <td>{stats['max']}</td>
+        </tr>
+        """
+    if not latency_html:
+        latency_html = '<tr><td colspan="6">暂无数据</td></tr>'
+    
     html = f"""
     <!DOCTYPE html>
     <html>
@@ -597,6 +1070,9 @@ def manage():
             h1 {{ color: #f5576c; margin-bottom: 30px; }}
             h2 {{ color: #f093fb; margin: 30px 0 15px; }}
             .info {{ padding: 15px; background: #f0f0f0; border-radius: 8px; margin: 10px 0; }}
+            table {{ width: 100%; border-collapse: collapse; margin: 10px 0; }}
+            th, td {{ padding: 10px; text-align: left; border-bottom: 1px solid #ddd; }}
+            th {{ background: #f5f5f5; }}
             .btn {{ 
                 background: linear-gradient(135deg, #f093fb, #f5576c);
                 color: white;
@@ -617,15 +1093,28 @@ def manage():
             <h2>📊 当前配置</h2>
             <div class="info">
                 <strong>检查间隔:</strong> {cfg.get('check_interval', 300)} 秒<br>
-                <strong>通知方式:</strong> {cfg.get('notify_method', 'none')}<br>
+                <strong>通知方式:</strong> {', '.join(active_channels(cfg)) or '不推送'}<br>
                 <strong>无头模式:</strong> {'是' if cfg.get('headless', True) else '否'}
             </div>
             
-            <h2>📱 Telegram 推送</h2>
+            <h2>📱 推送目标</h2>
             <div class="info">
                 推送目标数: {len(cfg.get('notify_targets', []))}
             </div>
             
+            <h2>⏱ 发现延迟 (秒)</h2>
+            <table>
+                <tr>
+                    <th>阶段</th>
+                    <th>样本数</th>
+                    <th>P50</th>
+                    <th>P90</th>
+                    <th>P99</th>
+                    <th>最大</th>
+                </tr>
+                {latency_html}
+            </table>
+            
             <a href="/" class="btn">← 返回首页</a>
             <a href="/api/state" class="btn">📊 查看状态</a>
             <a href="/api/check_now" class="btn">🔍 立即检查</a>
@@ -639,8 +1128,131 @@ def manage():
 
 @app.route('/api/state')
 def api_state():
-    """API: 获取状态"""
-    return jsonify(monitor_state)
+    """API: 获取状态 (状态未更新时复用上次的序列化结果)"""
+    state = monitor_state
+    return responder.respond(snapshot=responder.snapshot('state', state, lambda: public_state(state)))
+
+
+def public_state(state: dict) -> dict:
+    """/api/state 返回的内容 (不含给备节点的待投递记录)"""
+    return {k: v for k, v in state.items() if k != 'outbox_pending'}
+
+
+@app.route('/api/changes')
+def api_changes():
+    """API: 长轮询变更流
+
+    since: 上次拿到的版本号 (缺省则立即返回当前版本)
+    timeout: 最长阻塞秒数 (0-60)
+    """
+    since = request.args.get('since', type=int)
+    timeout = min(max(request.args.get('timeout', 30, type=float), 0), 60)
+    
+    if since is None:
+        return responder.respond({"version": change_feed.version, "resync_required": True})
+    return responder.respond(change_feed.wait(since, timeout))
+
+
+@app.route('/api/events')
+def api_events():
+    """API: 最近的发现事件 (最新的在前)
+
+    since: 只返回 seq 大于它的事件; limit: 最多返回条数
+    """
+    limit = min(request.args.get('limit', 50, type=int), event_ring.capacity)
+    since = request.args.get('since', 0, type=int)
+    kind = request.args.get('kind')
+    name = f"events:{limit}:{since}:{kind}"
+    return responder.respond(snapshot=responder.versioned(name, event_ring.version, lambda: {
+        "seq": event_ring.seq,
+        "events": event_ring.recent(limit, since=since, kind=kind),
+        "retention": event_ring.stats()
+    }))
+
+
+@app.route('/api/history')
+def api_history():
+    """API: 轮询历史
+
+    不带 series 时返回各层行数、文件大小与最近一次维护报告;
+    series (meme / rank:bsc) / key / tier (raw / hour / day) / since (时间戳) / limit 查询数据点
+    """
+    if not history:
+        return responder.respond({"error": "历史记录未启用"}, 404)
+    series = request.args.get('series')
+    version = history.version()
+    if not series:
+        return responder.respond(snapshot=responder.versioned('history', version, history.stats))
+    tier = request.args.get('tier', 'raw')
+    if tier not in [t["name"] for t in history.tiers]:
+        return responder.respond({"error": f"未知层级: {tier}"}, 400)
+    key = request.args.get('key')
+    since = request.args.get('since', 0, type=float)
+    limit = min(request.args.get('limit', 1000, type=int), 10000)
+    name = f"history:{series}:{key}:{tier}:{since}:{limit}"
+    return responder.respond(snapshot=responder.versioned(name, version, lambda: {
+        "series": series,
+        "tier": tier,
+        "points": history.query(series, key, since=since, tier=tier, limit=limit)
+    }))
+
+
+@app.route('/api/latency')
+def api_latency():
+    """API: 新币发现延迟 (各阶段百分位 + 最近的 trace)"""
+    limit = request.args.get('limit', 50, type=int)
+    return responder.respond(snapshot=responder.versioned(f"latency:{limit}", latency_tracker.version, lambda: {
+        "summary": latency_tracker.summary(),
+        "recent": latency_tracker.recent(limit)
+    }))
+
+
+@app.route('/api/startup')
+def api_startup():
+    """API: 冷启动耗时 (进程启动到恢复快照 / 第一个请求 / 浏览器就绪 / 第一轮轮询)"""
+    return responder.respond({**startup.snapshot(), "browser_ready": scraper.ready})
+
+
+@app.route('/api/scraper')
+def api_scraper():
+    """API: 抓取进程状态 (各进程 pid / 状态 / 任务数 / 重启次数, 排队任务数, 超时与崩溃次数)"""
+    return responder.respond(scraper.stats())
+
+
+@app.route('/api/cluster')
+def api_cluster():
+    """API: 多节点主备状态 (本节点角色与当前主节点)"""
+    if not cluster:
+        return responder.respond({"enabled": False})
+    return responder.respond({"enabled": True, "is_leader": still_leader(), "terms": elector.terms if elector else 0,
+                    **cluster.status()})
+
+
+@app.route('/api/breakers')
+def api_breakers():
+    """API: 熔断器状态 (多 worker 模式下跟随进程返回主节点写入的快照)"""
+    return responder.respond(breaker_snapshot() if not elector or elector.is_leader else monitor_state.get('breakers', {}))
+
+
+@app.route('/api/outbox')
+def api_outbox():
+    """API: 通知发件箱状态"""
+    return responder.respond({
+        "stats": outbox.stats(),
+        "recent": outbox.recent(request.args.get('status'), request.args.get('limit', 20, type=int))
+    })
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 指标 (多 worker 模式下跟随进程输出主节点的快照)"""
+    if elector and not elector.is_leader:
+        try:
+            with open(METRICS_PATH, 'r', encoding='utf-8') as f:
+                return f.read(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
+        except FileNotFoundError:
+            pass
+    return METRICS.render(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
 
 
 @app.route('/api/config')
@@ -648,26 +1260,27 @@ def api_config():
     """API: 获取配置"""
     cfg = load_config()
     for target in cfg.get('notify_targets', []):
-        if 'bot_token' in target:
-            target['bot_token'] = target['bot_token'][:10] + '...'
-    return jsonify(cfg)
+        for key in ('bot_token', 'url', 'webhook_url', 'secret'):
+            if target.get(key):
+                target[key] = target[key][:10] + '...'
+    return responder.respond(cfg)
 
 
 @app.route('/api/check_now')
 def api_check_now():
-    """API: 立即检查"""
-    try:
-        tokens = fetch_meme_tokens()
-        if not tokens:
-            return jsonify({"status": "error", "message": "无法获取数据"}), 500
-        
-        return jsonify({
-            "status": "success",
-            "total": len(tokens),
-            "message": f"检查完成: 总共 {len(tokens)} 个代币"
-        })
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+    """API: 立即检查 (唤醒监控循环, 返回这一轮的结果; 同时点击的请求共用一次抓取)"""
+    if still_leader() and not scraper.ready:
+        return responder.respond({"status": "error", "message": "浏览器启动中, 请稍后再试"}, 503)
+    result = check_trigger.wait(check_trigger.request(), CHECK_TIMEOUT)
+    if result is None:
+        return responder.respond({"status": "error", "message": f"监控循环 {CHECK_TIMEOUT} 秒内未完成检查"}, 504)
+    if result.get('error'):
+        return responder.respond({"status": "error", "message": result['error']}, 500)
+    return responder.respond({
+        "status": "success",
+        **result,
+        "message": f"检查完成: 总共 {result['total']} 个代币, 新增 {result['new']} 个"
+    })
 
 
 # =============== 主程序 ===============
@@ -680,12 +1293,25 @@ if __name__ == "__main__":
     # 确保配置存在
     ensure_config()
     
+    # sidecar 模式: 只运行监控循环 (持有租约), Web 由 gunicorn worker 提供
+    if '--monitor-only' in sys.argv:
+        try:
+            start_election(block=True)
+        finally:
+            stop_scraper()
+        sys.exit(0)
+    
     # 加载配置
     cfg = load_config()
     port = cfg.get('webui_port', 5002)
     
-    # 启动监控线程
-    start_monitor()
+    # 启动监控线程 (多节点模式下竞选租约, 备节点只同步状态)
+    if cluster:
+        restore_snapshot()
+        StateFollower(STATE_PATH, on_change=apply_shared_state).start()
+        start_election()
+    else:
+        start_monitor()
     
     # 启动 Flask
     logger.info(f"Web UI: http://localhost:{port}")
@@ -699,4 +1325,4 @@ if __name__ == "__main__":
             threaded=True
         )
     finally:
-        close_driver()
+        stop_scraper()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+变更流 (Change Feed)
+按状态版本号记录新增 / 移除 / 变化的代币, 供 /api/changes 长轮询使用
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+
+class ChangeFeed:
+    """有界内存事件环 + 版本号
+
+    每次监控循环发布一个事件, 版本号 +1。客户端带着上次拿到的版本号来取,
+    拿到的是该版本之后合并后的增量; 版本太旧 (已被挤出事件环) 时要求全量同步。
+    """
+
+    def __init__(self, key: Callable[[dict], str], capacity: int = 256):
+        self._key = key
+        self._events = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self.version = 0
+
+    def reset(self, version: int):
+        """以持久化的版本号重新开始 (重启后事件环为空)"""
+        with self._cond:
+            self.version = int(version or 0)
+            self._events.clear()
+            self._cond.notify_all()
+
+    def publish(self, added: List[dict], removed: List[dict], changed: List[dict]) -> int:
+        """发布一次变更, 返回新版本号"""
+        with self._cond:
+            self.version += 1
+            self._events.append({
+                "version": self.version,
+                "time": datetime.now(timezone.utc).isoformat(),
+                "added": added,
+                "removed": removed,
+                "changed": changed,
+            })
+            self._cond.notify_all()
+            return self.version
+
+    def mirror(self, version: int, added: List[dict], removed: List[dict], changed: List[dict]):
+        """跟随者: 复制主节点发布的版本; 中间有缺口时清空事件环, 让客户端全量同步"""
+        with self._cond:
+            if version <= self.version:
+                return
+            if version != self.version + 1:
+                self._events.clear()
+            else:
+                self._events.append({
+                    "version": version,
+                    "time": datetime.now(timezone.utc).isoformat(),
+                    "added": added,
+                    "removed": removed,
+                    "changed": changed,
+                })
+            self.version = version
+            self._cond.notify_all()
+
+    def since(self, since: int) -> dict:
+        """取 since 之后的合并增量"""
+        with self._cond:
+            return self._collect(since)
+
+    def wait(self, since: int, timeout: float) -> dict:
+        """阻塞直到出现比 since 更新的版本或超时"""
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            while self.version <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._collect(since)
+
+    def _collect(self, since: int) -> dict:
+        """调用方需持有锁"""
+        if since > self.version or (since < self.version and not self._covers(since)):
+            return {"version": self.version, "resync_required": True}
+
+        # 按代币标识合并多次事件: 先增后删抵消, 先删后增视为变化
+        merged: Dict[str, tuple] = {}
+        for event in self._events:
+            if event["version"] <= since:
+                continue
+            for kind in ("added", "removed", "changed"):
+                for token in event[kind]:
+                    k = self._key(token)
+                    prev = merged.get(k)
+                    merged[k] = _merge_kind(prev[0] if prev else None, kind), token
+
+        result = {"version": self.version, "resync_required": False,
+                  "added": [], "removed": [], "changed": []}
+        for kind, token in merged.values():
+            if kind:
+                result[kind].append(token)
+        return result
+
+    def _covers(self, since: int) -> bool:
+        """事件环里是否还保留着 since 之后的全部事件"""
+        return bool(self._events) and self._events[0]["version"] <= since + 1
+
+
+def _merge_kind(prev: Optional[str], kind: str) -> Optional[str]:
+    """合并同一代币的两次事件"""
+    if prev is None:
+        return kind
+    if prev == "added":
+        return None if kind == "removed" else "added"
+    if prev == "removed":
+        return "changed" if kind == "added" else kind
+    return kind
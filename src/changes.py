@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+字段级变更检测
+每个代币按关注字段算一次内容哈希 (缓存在记录上), 比对时:
+  - 哈希相同的代币直接跳过 (O(1))
+  - 哈希不同的才逐字段比较, 得到变化的字段与新旧值
+输出 added / removed / modified 三类事件, 供变更流、推送与 API 使用。
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from records import TokenRecord
+
+
+class ChangeSet(NamedTuple):
+    added: list
+    removed: list
+    modified: List[Tuple[Any, Dict[str, dict]]]  # (当前代币, {字段: {"old", "new"}})
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+
+def _freeze(value):
+    """列表 / 字典等不可哈希的值转成字符串参与哈希"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return value
+
+
+class ChangeDetector:
+    """按标识与关注字段比对前后两轮代币列表
+
+    key: 代币 -> 唯一标识
+    fields: 参与比对的字段 (价格等频繁变化的字段不放进来, 否则每轮都是变化)
+    """
+
+    def __init__(self, key: Callable[[Any], str], fields: Sequence[str]):
+        self.key = key
+        self.fields = tuple(fields)
+
+    def digest(self, token) -> int:
+        """关注字段的内容哈希, 记录上缓存一次
+
+        关注字段配置变化后旧记录上的哈希会全部对不上, 只是多做一轮逐字段比较, 结果仍然正确
+        """
+        cached = token.digest if isinstance(token, TokenRecord) else None
+        if cached is not None:
+            return cached
+        get = token.get
+        try:
+            value = hash(tuple(get(f) for f in self.fields))
+        except TypeError:
+            value = hash(tuple(_freeze(get(f)) for f in self.fields))
+        if isinstance(token, TokenRecord):
+            token.digest = value
+        return value
+
+    def field_changes(self, old, new) -> Dict[str, dict]:
+        """逐字段比较, 只在哈希不同时调用"""
+        changes = {}
+        for field in self.fields:
+            before, after = old.get(field), new.get(field)
+            if before != after:
+                changes[field] = {"old": before, "new": after}
+        return changes
+
+    def diff(self, previous: Iterable, current: Iterable) -> ChangeSet:
+        key = self.key
+        previous_by_key = {key(t): t for t in previous}
+        added, modified = [], []
+        seen = set()
+        for token in current:
+            k = key(token)
+            seen.add(k)
+            old = previous_by_key.get(k)
+            if old is None:
+                added.append(token)
+            elif self.digest(old) != self.digest(token):
+                changes = self.field_changes(old, token)
+                # 哈希碰撞或关注字段配置变化时可能没有实际差异
+                if changes:
+                    modified.append((token, changes))
+        removed = [t for k, t in previous_by_key.items() if k not in seen]
+        return ChangeSet(added, removed, modified)
+
+
+def describe(changes: Dict[str, dict], labels: Optional[Dict[str, str]] = None) -> List[str]:
+    """字段变化 -> 可读的行 (推送消息用)"""
+    labels = labels or {}
+    return [f"{labels.get(field, field)}: {diff['old']} → {diff['new']}" for field, diff in changes.items()]
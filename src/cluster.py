@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多节点主备 (active / standby)
+两台以上的主机共用一个租约后端, 同一时刻只有持有租约的主节点轮询与推送:
+
+  - 租约带 TTL 与递增的任期号 (epoch), 主节点每 ttl/3 续约一次; 续约失败或超过 ttl*0.8 未续上
+    就视为失去租约, 立即停止轮询与投递 (早于后端上的过期时间, 不会与新主节点重叠)
+  - 主节点每轮把状态文件 (连同发件箱中未完成的投递) 压缩后发布到后端, 备节点每秒拉取写入本地状态文件,
+    Web 照常提供数据; 接管时以最后一次发布的列表为基线, 之后上线的代币会被重新检测到
+  - 投递成功的幂等键写入后端, 新主节点发送前先查询, 已由旧主节点发出的不再重发
+
+后端:
+    sqlite  共享文件 (NFS 等), 各主机时钟需同步 (NTP)
+    redis   Redis 或兼容服务 (内置最小 RESP 客户端, 不依赖 redis 包; 本地可用 harness/mock_redis.py)
+
+config.json:
+
+    "cluster": {"backend": "sqlite", "path": "/mnt/shared/monitor_cluster.db", "ttl": 15}
+    "cluster": {"backend": "redis", "url": "redis://10.0.0.5:6379/0", "ttl": 15, "node": "host-a"}
+
+ttl 应小于 check_interval, 主节点故障后备节点在一个轮询间隔内接管。
+"""
+
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 已投递幂等键的保留时间 (秒)
+SENT_RETENTION = 7 * 86400
+
+
+# =============== RESP 客户端 ===============
+
+class RespError(Exception):
+    """服务端返回的错误"""
+
+
+class RespClient:
+    """最小的 Redis 协议客户端 (单连接, 线程安全, 断线后下次调用自动重连)"""
+
+    def __init__(self, url: str, timeout: float = 5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.RLock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile('rb')
+        if self.password:
+            self._call('AUTH', self.password)
+        if self.db:
+            self._call('SELECT', self.db)
+
+    def close(self):
+        with self._lock:
+            if self._sock:
+                try:
+                    self._sock.close()
+                finally:
+                    self._sock = self._file = None
+
+    def _call(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        self._sock.sendall(b''.join(parts))
+        return self._read()
+
+    def _read(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("连接已关闭")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode('utf-8')
+        if kind == b'-':
+            raise RespError(rest.decode('utf-8'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            size = int(rest)
+            if size < 0:
+                return None
+            data = self._file.read(size + 2)
+            return data[:-2]
+        if kind == b'*':
+            size = int(rest)
+            return None if size < 0 else [self._read() for _ in range(size)]
+        raise RespError(f"无法解析的响应: {line[:50]!r}")
+
+    def execute(self, *args):
+        """发送一条命令并返回结果"""
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                return self._call(*args)
+            except (OSError, ConnectionError):
+                self.close()
+                raise
+
+    def multi(self, commands) -> list:
+        """MULTI / EXEC 执行一组命令, 返回各命令结果 (被 WATCH 的键改写时返回 None)"""
+        with self._lock:
+            try:
+                self.execute('MULTI')
+                for command in commands:
+                    self.execute(*command)
+                return self.execute('EXEC')
+            except RespError:
+                self.close()  # 断开连接即丢弃未完成的事务与 WATCH
+                raise
+
+    def transaction(self, watch: str, check, commands) -> Optional[list]:
+        """WATCH watch 后用 check(GET watch 的值) 判断, 通过则执行 commands
+
+        返回 EXEC 结果; check 不通过或键在期间被改写时返回 None
+        """
+        with self._lock:
+            self.execute('WATCH', watch)
+            if not check(self.execute('GET', watch)):
+                self.execute('UNWATCH')
+                return None
+            return self.multi(commands)
+
+
+# =============== 后端 ===============
+
+class SQLiteBackend:
+    """共享文件上的 SQLite 后端 (过期时间按各主机的本地时钟计算)"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS lease (name TEXT PRIMARY KEY, holder TEXT, epoch INTEGER NOT NULL, expires_at REAL NOT NULL);
+    CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, stamp INTEGER NOT NULL, data BLOB NOT NULL);
+    CREATE TABLE IF NOT EXISTS sent (name TEXT NOT NULL, key TEXT NOT NULL, at REAL NOT NULL, PRIMARY KEY (name, key));
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.executescript(self.SCHEMA)
+
+    def acquire(self, name: str, node: str, ttl: float) -> Optional[int]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT holder, epoch, expires_at FROM lease WHERE name = ?",
+                                         (name,)).fetchone()
+                if row and row[0] != node and row[2] > now:
+                    self._conn.execute("ROLLBACK")
+                    return None
+                epoch = (row[1] if row else 0) + 1
+                self._conn.execute("INSERT OR REPLACE INTO lease (name, holder, epoch, expires_at) VALUES (?, ?, ?, ?)",
+                                   (name, node, epoch, now + ttl))
+                self._conn.execute("COMMIT")
+                return epoch
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def renew(self, name: str, node: str, epoch: int, ttl: float) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE lease SET expires_at = ? WHERE name = ? AND holder = ? AND epoch = ? AND expires_at > ?",
+                (time.time() + ttl, name, node, epoch, time.time()))
+            return cursor.rowcount == 1
+
+    def release(self, name: str, node: str, epoch: int):
+        with self._lock:
+            self._conn.execute("UPDATE lease SET expires_at = 0 WHERE name = ? AND holder = ? AND epoch = ?",
+                               (name, node, epoch))
+
+    def holder(self, name: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT holder, epoch, expires_at FROM lease WHERE name = ?", (name,)).fetchone()
+        if not row or row[2] <= time.time():
+            return None
+        return {"node": row[0], "epoch": row[1], "expires_in": round(row[2] - time.time(), 1)}
+
+    def put_state(self, name: str, stamp: int, data: bytes):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO state (name, stamp, data) VALUES (?, ?, ?)", (name, stamp, data))
+            self._conn.execute("DELETE FROM sent WHERE name = ? AND at < ?", (name, time.time() - SENT_RETENTION))
+
+    def get_state(self, name: str, since: Optional[int] = None) -> Optional[Tuple[int, bytes]]:
+        with self._lock:
+            row = self._conn.execute("SELECT stamp FROM state WHERE name = ?", (name,)).fetchone()
+            if not row or row[0] == since:
+                return None
+            row = self._conn.execute("SELECT stamp, data FROM state WHERE name = ?", (name,)).fetchone()
+        return row[0], row[1]
+
+    def mark_sent(self, name: str, key: str):
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO sent (name, key, at) VALUES (?, ?, ?)", (name, key, time.time()))
+
+    def was_sent(self, name: str, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sent WHERE name = ? AND key = ?", (name, key)).fetchone() is not None
+
+
+class RedisBackend:
+    """Redis (或兼容服务) 后端, 过期由服务端计时, 不受主机时钟影响"""
+
+    def __init__(self, url: str, prefix: str = 'monitor'):
+        self.client = RespClient(url)
+        self.prefix = prefix
+
+    def _key(self, name: str, *parts: str) -> str:
+        return ':'.join((self.prefix, name) + parts)
+
+    def acquire(self, name: str, node: str, ttl: float) -> Optional[int]:
+        if self.client.execute('GET', self._key(name, 'lease')) is not None:
+            return None
+        epoch = self.client.execute('INCR', self._key(name, 'epoch'))
+        ok = self.client.execute('SET', self._key(name, 'lease'), f"{node}|{epoch}", 'NX', 'PX', int(ttl * 1000))
+        return epoch if ok else None
+
+    def renew(self, name: str, node: str, epoch: int, ttl: float) -> bool:
+        value = f"{node}|{epoch}".encode('utf-8')
+        result = self.client.transaction(self._key(name, 'lease'), lambda current: current == value,
+                                         [('PEXPIRE', self._key(name, 'lease'), int(ttl * 1000))])
+        return bool(result and result[0] == 1)
+
+    def release(self, name: str, node: str, epoch: int):
+        value = f"{node}|{epoch}".encode('utf-8')
+        self.client.transaction(self._key(name, 'lease'), lambda current: current == value,
+                                [('DEL', self._key(name, 'lease'))])
+
+    def holder(self, name: str) -> Optional[dict]:
+        value = self.client.execute('GET', self._key(name, 'lease'))
+        if value is None:
+            return None
+        node, _, epoch = value.decode('utf-8').rpartition('|')
+        ttl = self.client.execute('PTTL', self._key(name, 'lease'))
+        return {"node": node, "epoch": int(epoch), "expires_in": round(max(ttl, 0) / 1000, 1)}
+
+    def put_state(self, name: str, stamp: int, data: bytes):
+        self.client.multi([
+            ('SET', self._key(name, 'state'), data),
+            ('SET', self._key(name, 'state', 'stamp'), stamp),
+        ])
+
+    def get_state(self, name: str, since: Optional[int] = None) -> Optional[Tuple[int, bytes]]:
+        stamp = self.client.execute('GET', self._key(name, 'state', 'stamp'))
+        if stamp is None or int(stamp) == since:
+            return None
+        data = self.client.execute('GET', self._key(name, 'state'))
+        return (int(stamp), data) if data is not None else None
+
+    def mark_sent(self, name: str, key: str):
+        self.client.execute('SET', self._key(name, 'sent', key), 1, 'EX', SENT_RETENTION)
+
+    def was_sent(self, name: str, key: str) -> bool:
+        return bool(self.client.execute('EXISTS', self._key(name, 'sent', key)))
+
+
+# =============== 租约 / 状态同步 ===============
+
+class ClusterLease:
+    """带 TTL 的跨主机租约, 接口与 leader.FileLease 一致"""
+
+    def __init__(self, backend, name: str, node: str, ttl: float = 15):
+        self.backend = backend
+        self.name = name
+        self.node = node
+        self.ttl = ttl
+        self.renew_interval = ttl / 3
+        self.epoch: Optional[int] = None
+        self._valid_until = 0.0
+
+    @property
+    def held(self) -> bool:
+        # 按本地单调时钟提前判定过期, 早于后端上的过期时间
+        return self.epoch is not None and time.monotonic() < self._valid_until
+
+    def try_acquire(self) -> bool:
+        if self.held:
+            return True
+        start = time.monotonic()
+        try:
+            epoch = self.backend.acquire(self.name, self.node, self.ttl)
+        except Exception as e:
+            logger.warning(f"租约后端不可用: {e}")
+            return False
+        if epoch is None:
+            return False
+        self.epoch = epoch
+        self._valid_until = start + self.ttl * 0.8
+        return True
+
+    def renew(self) -> bool:
+        """续约, 失败 (或后端不可用且已超时) 时返回 False"""
+        if self.epoch is None:
+            return False
+        start = time.monotonic()
+        try:
+            ok = self.backend.renew(self.name, self.node, self.epoch, self.ttl)
+        except Exception as e:
+            logger.warning(f"续约失败: {e}")
+            return self.held
+        if ok:
+            self._valid_until = start + self.ttl * 0.8
+        else:
+            self.epoch = None
+        return ok
+
+    def release(self):
+        if self.epoch is not None:
+            try:
+                self.backend.release(self.name, self.node, self.epoch)
+            except Exception as e:
+                logger.warning(f"释放租约失败: {e}")
+            self.epoch = None
+
+
+class Cluster:
+    """一个监控来源 (alpha / meme) 在后端上的租约、共享状态与已投递记录"""
+
+    def __init__(self, backend, name: str, node: str, ttl: float = 15):
+        self.backend = backend
+        self.name = name
+        self.node = node
+        self.ttl = ttl
+        self._stamp: Optional[int] = None
+
+    def lease(self) -> ClusterLease:
+        return ClusterLease(self.backend, self.name, self.node, self.ttl)
+
+    def publish(self, path: str):
+        """主节点: 发布状态文件"""
+        try:
+            with open(path, 'rb') as f:
+                data = zlib.compress(f.read(), 1)
+            self.backend.put_state(self.name, time.time_ns(), data)
+        except Exception as e:
+            logger.error(f"发布共享状态失败: {e}")
+
+    def pull(self, path: str) -> bool:
+        """备节点: 有新状态时写入本地状态文件 (之后由 StateFollower 载入), 返回是否更新"""
+        result = self.backend.get_state(self.name, self._stamp)
+        if result is None:
+            return False
+        stamp, data = result
+        tmp_path = f"{path}.{os.getpid()}.mirror"
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.decompress(data))
+        os.replace(tmp_path, path)
+        self._stamp = stamp
+        return True
+
+    def mark_sent(self, key: str):
+        try:
+            self.backend.mark_sent(self.name, key)
+        except Exception as e:
+            logger.warning(f"记录已投递失败: {e}")
+
+    def was_sent(self, key: str) -> bool:
+        """该投递是否已由其他节点发出 (后端不可用时按未发送处理, 至少一次)"""
+        try:
+            return self.backend.was_sent(self.name, key)
+        except Exception as e:
+            logger.warning(f"查询已投递失败: {e}")
+            return False
+
+    def status(self) -> dict:
+        try:
+            holder = self.backend.holder(self.name)
+        except Exception as e:
+            holder = {"error": str(e)}
+        return {"name": self.name, "node": self.node, "ttl": self.ttl, "leader": holder}
+
+
+class StateMirror:
+    """备节点: 每秒从后端拉取主节点发布的状态 (自己是主节点时跳过)"""
+
+    def __init__(self, cluster: Cluster, path: str, is_leader, poll_interval: float = 1):
+        self.cluster = cluster
+        self.path = path
+        self.is_leader = is_leader
+        self.poll_interval = poll_interval
+
+    def run(self):
+        while True:
+            try:
+                if not self.is_leader():
+                    self.cluster.pull(self.path)
+            except Exception as e:
+                logger.error(f"拉取共享状态失败: {e}")
+            time.sleep(self.poll_interval)
+
+    def start(self):
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+
+
+def get_cluster(cfg: Optional[dict], name: str) -> Optional[Cluster]:
+    """按 config.json 的 cluster 配置创建, 未配置返回 None (单机模式)"""
+    if not cfg or not cfg.get('backend'):
+        return None
+    backend_type = cfg['backend']
+    if backend_type == 'sqlite':
+        backend = SQLiteBackend(cfg['path'])
+    elif backend_type == 'redis':
+        backend = RedisBackend(cfg.get('url', 'redis://127.0.0.1:6379/0'), cfg.get('prefix', 'monitor'))
+    else:
+        raise ValueError(f"未知的租约后端: {backend_type}")
+    node = f"{cfg.get('node') or socket.gethostname()}:{os.getpid()}"
+    return Cluster(backend, cfg.get('name', name), node, cfg.get('ttl', 15))
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+接口探测与结构指纹
+并发请求全部候选接口, 记录状态码 / 延迟 / 响应大小, 为 JSON 响应生成结构指纹
+(键路径 -> 类型), 与保存的基线比对, 输出按可用性和延迟排序的接口清单。
+监控程序读取清单, 选择最快的可用数据源 (find_api.py / find_meme_api.py 为命令行入口)。
+
+清单 data/endpoint_manifest.json:
+
+    {"generated_at": "...", "sources": {"alpha": [
+        {"url": "...", "ok": true, "status": 200, "latency": 0.21, "size": 123456,
+         "items": 830, "fingerprint": "3f2a...", "schema": {...}, "schema_diff": null}
+    ]}}
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
+
+# 数组只取前几项生成指纹
+SAMPLE_ITEMS = 5
+
+
+# =============== 结构指纹 ===============
+
+def _type_name(value) -> str:
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, list):
+        return 'array'
+    return 'object'
+
+
+def fingerprint(value, path: str = '$', schema: Dict[str, str] = None) -> Dict[str, str]:
+    """JSON 值 -> {键路径: 类型}, 数组元素合并到 path[] 下, 类型不一致时用 | 连接"""
+    if schema is None:
+        schema = {}
+    kind = _type_name(value)
+    old = schema.get(path)
+    if old is None:
+        schema[path] = kind
+    elif kind not in old.split('|'):
+        schema[path] = '|'.join(sorted(old.split('|') + [kind]))
+    if kind == 'object':
+        for key, item in value.items():
+            fingerprint(item, f"{path}.{key}", schema)
+    elif kind == 'array':
+        for item in value[:SAMPLE_ITEMS]:
+            fingerprint(item, f"{path}[]", schema)
+    return schema
+
+
+def fingerprint_id(schema: Dict[str, str]) -> str:
+    return hashlib.sha1(json.dumps(schema, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def diff_fingerprints(old: Dict[str, str], new: Dict[str, str]) -> Optional[dict]:
+    """两份指纹的差异, 相同返回 None"""
+    added = sorted(set(new) - set(old))
+    removed = sorted(set(old) - set(new))
+    changed = {p: [old[p], new[p]] for p in sorted(set(old) & set(new)) if old[p] != new[p]}
+    if not (added or removed or changed):
+        return None
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def item_count(data) -> Optional[int]:
+    """响应中主列表的长度 (data 或 data.list 等)"""
+    payload = data.get('data') if isinstance(data, dict) else data
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict):
+        for key in ('list', 'items', 'ranks', 'tokens', 'rows'):
+            if isinstance(payload.get(key), list):
+                return len(payload[key])
+    return None
+
+
+# =============== 探测 ===============
+
+def probe(session: requests.Session, url: str, headers: dict, timeout: float) -> dict:
+    """请求一个候选接口"""
+    result = {"url": url, "ok": False, "status": 0, "latency": None, "size": 0,
+              "items": None, "fingerprint": None, "schema": None, "error": None}
+    start = time.perf_counter()
+    try:
+        response = session.get(url, headers=headers, timeout=timeout)
+        result["latency"] = round(time.perf_counter() - start, 4)
+        result["status"] = response.status_code
+        result["size"] = len(response.content)
+        if response.status_code != 200:
+            result["error"] = f"HTTP {response.status_code}"
+            return result
+        data = response.json()
+    except requests.exceptions.Timeout:
+        result["error"] = "timeout"
+        return result
+    except ValueError:
+        result["error"] = "JSON 解析失败"
+        return result
+    except requests.RequestException as e:
+        result["error"] = str(e)
+        return result
+
+    schema = fingerprint(data)
+    result.update(schema=schema, fingerprint=fingerprint_id(schema), items=item_count(data))
+    # 币安接口出错时 HTTP 仍为 200, 以 code / success 判断
+    if isinstance(data, dict) and ('code' in data or 'success' in data):
+        result["ok"] = data.get('code') == '000000' or data.get('success') is True
+        if not result["ok"]:
+            result["error"] = f"code={data.get('code')} {data.get('message') or ''}".strip()
+    else:
+        result["ok"] = True
+    return result
+
+
+def discover(urls: Sequence[str], headers: dict = None, timeout: float = 10,
+             concurrency: int = 16) -> List[dict]:
+    """并发探测全部候选接口, 总耗时约等于最慢的一个"""
+    headers = {**DEFAULT_HEADERS, **(headers or {})}
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    with ThreadPoolExecutor(max_workers=min(concurrency, max(len(urls), 1))) as pool:
+        return list(pool.map(lambda url: probe(session, url, headers, timeout), urls))
+
+
+def rank(results: List[dict]) -> List[dict]:
+    """可用的在前, 其次按延迟"""
+    return sorted(results, key=lambda r: (not r["ok"], r["latency"] if r["latency"] is not None else float('inf')))
+
+
+# =============== 清单 ===============
+
+def load_json(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json(path: str, data: dict):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def build_manifest(manifest: dict, source: str, results: List[dict], baseline: dict) -> dict:
+    """把一个来源的探测结果 (与基线比对后) 写入清单, 其他来源保持不变"""
+    fingerprints = baseline.get(source, {})
+    entries = []
+    for result in rank(results):
+        old = fingerprints.get(result["url"])
+        result["schema_diff"] = diff_fingerprints(old, result["schema"]) if old and result["schema"] else None
+        entries.append(result)
+    sources = dict(manifest.get('sources', {}))
+    sources[source] = entries
+    return {"generated_at": datetime.now(timezone.utc).isoformat(), "sources": sources}
+
+
+def update_baseline(baseline: dict, source: str, results: List[dict]) -> dict:
+    """以本次可用接口的指纹作为新基线"""
+    fingerprints = dict(baseline.get(source, {}))
+    for result in results:
+        if result["ok"] and result["schema"]:
+            fingerprints[result["url"]] = result["schema"]
+    return {**baseline, source: fingerprints}
+
+
+def ranked_endpoints(manifest: dict, source: str, required: Sequence[str] = ()) -> List[str]:
+    """清单中该来源的可用接口 (按延迟排序); required 为必须存在的键路径 (如 $.data[].alphaId)"""
+    return [
+        entry['url'] for entry in manifest.get('sources', {}).get(source, [])
+        if entry.get('ok') and all(path in (entry.get('schema') or {}) for path in required)
+    ]
+
+
+def pick_endpoint(manifest: dict, source: str, required: Sequence[str] = ()) -> Optional[str]:
+    """清单中该来源最快的可用接口"""
+    urls = ranked_endpoints(manifest, source, required)
+    return urls[0] if urls else None
+
+
+# =============== 命令行 ===============
+
+def run_cli(source: str, candidates: Sequence[str], title: str, headers: dict = None, argv=None):
+    """find_api.py / find_meme_api.py 共用的命令行入口"""
+    import argparse
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = os.path.join(root, 'data')
+    parser = argparse.ArgumentParser(description=title)
+    parser.add_argument('urls', nargs='*', help='额外的候选接口')
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--manifest', default=os.path.join(data_dir, 'endpoint_manifest.json'))
+    parser.add_argument('--baseline', default=os.path.join(data_dir, 'endpoint_baseline.json'))
+    parser.add_argument('--update-baseline', action='store_true', help='以本次结果作为新的指纹基线')
+    args = parser.parse_args(argv)
+
+    urls = list(dict.fromkeys(list(candidates) + args.urls))
+    print(f"🔍 {title}: 并发探测 {len(urls)} 个候选接口...\n")
+    start = time.perf_counter()
+    results = discover(urls, headers, args.timeout, args.concurrency)
+    elapsed = time.perf_counter() - start
+
+    baseline = load_json(args.baseline)
+    manifest = build_manifest(load_json(args.manifest), source, results, baseline)
+
+    for i, entry in enumerate(manifest['sources'][source], 1):
+        mark = '✓' if entry['ok'] else '×'
+        latency = f"{entry['latency'] * 1000:.0f}ms" if entry['latency'] is not None else '-'
+        print(f"{i:>2}. {mark} [{entry['status'] or '---'}] {latency:>7} {entry['size']:>9}B  {entry['url']}")
+        if entry['items'] is not None:
+            print(f"       列表长度: {entry['items']}  指纹: {entry['fingerprint']}")
+        if entry['error']:
+            print(f"       错误: {entry['error']}")
+        diff = entry['schema_diff']
+        if diff:
+            print(f"       ⚠ 结构变化: +{len(diff['added'])} -{len(diff['removed'])} ~{len(diff['changed'])}")
+            for path in diff['removed'][:5]:
+                print(f"         - {path}")
+            for path in diff['added'][:5]:
+                print(f"         + {path}")
+            for path, (old, new) in list(diff['changed'].items())[:5]:
+                print(f"         ~ {path}: {old} -> {new}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.manifest)), exist_ok=True)
+    save_json(args.manifest, manifest)
+    if args.update_baseline or not baseline.get(source):
+        save_json(args.baseline, update_baseline(baseline, source, results))
+        print(f"\n已更新指纹基线: {args.baseline}")
+    print(f"\n完成: {sum(r['ok'] for r in results)}/{len(results)} 可用, 耗时 {elapsed:.2f}s")
+    print(f"接口清单: {args.manifest}")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+新币信息补充 (价格 / 流动性 / 持有人等)
+位于比对与推送之间: 并发请求补充接口, 结果按 (链, 合约) 缓存 (TTL + LRU)。
+整批有严格的时间预算, 超时的代币直接按普通消息推送, 不等待补充结果
+(后台请求仍会完成并写入缓存)。
+
+config.json:
+
+    "enrichment": {
+        "enabled": true,
+        "url": "http://127.0.0.1:5055/token?chain={chain}&contract={contract}",
+        "budget": 1.5,          # 整批等待上限 (秒)
+        "timeout": 3,           # 单个请求超时 (秒)
+        "concurrency": 8,
+        "cache_ttl": 300,
+        "cache_size": 2048,
+        "fields": {"price": "💵 价格", "liquidity": "💧 流动性", "holders": "👥 持有人"}
+    }
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIELDS = {"price": "💵 价格", "liquidity": "💧 流动性", "holders": "👥 持有人"}
+
+_MISSING = object()
+
+
+class TTLLRUCache:
+    """带过期时间的 LRU 缓存"""
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING or item[0] < now:
+                if item is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class Enricher:
+    """并发补充代币信息, 超出预算的部分放弃等待"""
+
+    def __init__(self, options: dict):
+        self.url = options['url']
+        self.budget = options.get('budget', 1.5)
+        self.timeout = options.get('timeout', 3)
+        self.fields = options.get('fields', DEFAULT_FIELDS)
+        concurrency = options.get('concurrency', 8)
+        self.cache = TTLLRUCache(options.get('cache_size', 2048), options.get('cache_ttl', 300))
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='enrich')
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._inflight: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(token: dict) -> Optional[tuple]:
+        contract = token.get('contractAddress')
+        if not contract:
+            return None
+        return str(token.get('chainId', token.get('chain', ''))).lower(), str(contract).lower()
+
+    def _fetch(self, key: tuple) -> Optional[dict]:
+        chain, contract = key
+        url = self.url.format(chain=quote(chain), contract=quote(contract))
+        try:
+            response = self._session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                logger.warning(f"信息补充失败: {response.status_code} {contract}")
+                return None
+            data = response.json()
+            if isinstance(data, dict) and isinstance(data.get('data'), dict):
+                data = data['data']
+            details = {field: data.get(field) for field in self.fields if data.get(field) is not None}
+            self.cache.put(key, details)
+            return details
+        except Exception as e:
+            logger.warning(f"信息补充异常: {contract}: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _submit(self, key: tuple):
+        """同一合约同时只发一个请求; 已被 close 时返回 None"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                try:
+                    future = self._inflight[key] = self._pool.submit(self._fetch, key)
+                except RuntimeError:  # 配置变更后被替换, 线程池已停止
+                    return None
+            return future
+
+    def enrich_batch(self, tokens: List[dict]) -> List[Optional[dict]]:
+        """返回与 tokens 对应的补充信息, 未命中缓存且超出预算的为 None"""
+        results: List[Optional[dict]] = [None] * len(tokens)
+        pending = {}
+        for i, token in enumerate(tokens):
+            key = self.cache_key(token)
+            if key is None:
+                continue
+            cached = self.cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                results[i] = cached
+            else:
+                future = self._submit(key)
+                if future is not None:
+                    pending[i] = future
+
+        if pending:
+            done, not_done = wait(pending.values(), timeout=self.budget)
+            for i, future in pending.items():
+                if future in done:
+                    results[i] = future.result()
+            if not_done:
+                logger.info(f"信息补充超出预算 {self.budget}s: {len(not_done)}/{len(pending)} 个按普通消息推送")
+        return results
+
+    def close(self):
+        """停止线程池 (配置变更被替换时调用; 进行中的请求完成后线程退出)"""
+        self._pool.shutdown(wait=False)
+
+    def format(self, details: Optional[dict]) -> str:
+        """补充信息 -> 消息行"""
+        if not details:
+            return ''
+        lines = [f"{label}: {details[field]}" for field, label in self.fields.items() if field in details]
+        return '\n'.join(lines)
+
+
+_cache = ('', None)
+_cache_lock = threading.Lock()
+
+
+def get_enricher(options: dict) -> Optional[Enricher]:
+    """按配置取补充器 (配置不变时复用, 保留缓存); 未启用返回 None
+
+    配置变更或关闭时停止旧补充器的线程池, 重新加载配置不会累积线程
+    """
+    global _cache
+    enabled = bool(options and options.get('enabled') and options.get('url'))
+    key = json.dumps(options, sort_keys=True, ensure_ascii=False) if enabled else ''
+    with _cache_lock:
+        if _cache[0] != key:
+            previous = _cache[1]
+            _cache = (key, Enricher(options) if enabled else None)
+            if previous is not None:
+                previous.close()
+        return _cache[1]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+最近的发现事件 (新币上线 / 下架 / 字段变化)
+固定容量的环形缓冲, 追加 O(1), 按条数与时间两种方式淘汰; 随状态文件持久化,
+跟随进程与重启后都能看到两次刷新之间发现的代币
+"""
+
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+# config.json 中 events 段可配置的参数
+OPTIONS = ('capacity', 'max_age')
+
+
+def options_from(cfg: dict) -> dict:
+    """从配置中取出 EventRing 参数 (未配置的用默认值)"""
+    section = cfg.get('events') or {}
+    return {key: section[key] for key in OPTIONS if key in section}
+
+
+class EventRing:
+    """最近 capacity 个事件, max_age 秒 (>0 时) 之前的事件淘汰
+
+    每个事件带递增的 seq, 客户端可以带上次拿到的 seq 只取之后的事件。
+    version 在内容变化 (追加 / 恢复 / 过期淘汰) 时递增, 供接口缓存序列化结果。
+    """
+
+    def __init__(self, capacity: int = 500, max_age: float = 7 * 86400):
+        self.max_age = max_age
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.seq = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._events.maxlen
+
+    def _expire(self, now: float):
+        """调用方需持有锁; 从最旧一端淘汰, 均摊 O(1)"""
+        if self.max_age > 0:
+            cutoff = now - self.max_age
+            while self._events and self._events[0]["time"] < cutoff:
+                self._events.popleft()
+                self._generation += 1
+
+    def append(self, event: dict) -> dict:
+        """追加一个事件 (需含 time), 返回带 seq 的事件"""
+        with self._lock:
+            self.seq += 1
+            self._generation += 1
+            event = {"seq": self.seq, **event}
+            self._events.append(event)
+            self._expire(time.time())
+            return event
+
+    @property
+    def version(self) -> int:
+        """内容版本 (先淘汰过期事件)"""
+        with self._lock:
+            self._expire(time.time())
+            return self._generation
+
+    def recent(self, limit: int = 50, since: int = 0, kind: Optional[str] = None,
+               source: Optional[str] = None) -> List[dict]:
+        """seq 大于 since 的事件, 最新的在前, 最多 limit 个"""
+        result = []
+        with self._lock:
+            self._expire(time.time())
+            for event in reversed(self._events):
+                if event["seq"] <= since or len(result) >= limit:
+                    break
+                if (kind is None or event.get("kind") == kind) and (source is None or event.get("source") == source):
+                    result.append(event)
+        return result
+
+    def count_since(self, timestamp: float, kind: Optional[str] = None) -> int:
+        """timestamp 之后的事件数"""
+        with self._lock:
+            count = 0
+            for event in reversed(self._events):
+                if event["time"] < timestamp:
+                    break
+                if kind is None or event.get("kind") == kind:
+                    count += 1
+            return count
+
+    def dump(self) -> List[dict]:
+        """全部事件 (最旧的在前), 写入状态文件"""
+        with self._lock:
+            return list(self._events)
+
+    def load(self, events: Optional[List[dict]]):
+        """从持久化状态 / 主节点的状态恢复"""
+        with self._lock:
+            self._events.clear()
+            self._events.extend(events or [])
+            self._generation += 1
+            if self._events:
+                self.seq = max(self.seq, self._events[-1]["seq"])
+            self._expire(time.time())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "max_age": self.max_age,
+                "size": len(self._events),
+                "seq": self.seq,
+                "oldest": self._events[0]["time"] if self._events else None
+            }
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+推送目标订阅过滤
+每个 notify_target 可声明 filters, 未声明的目标接收全部新币:
+
+    "filters": {
+        "sources": ["alpha"],                 # alpha / meme
+        "chains": ["bsc", "56"],              # 链名或 chainId, 不区分大小写
+        "symbol_regex": "^[A-Z]{2,6}$",
+        "contract_allow": ["0xabc..."],       # 只推这些合约
+        "contract_deny": ["0xdef..."],        # 不推这些合约
+        "ranges": {"marketCap": [1000000, null]}   # 数值字段区间, null 表示不限
+    }
+
+配置编译一次 (集合 / 预编译正则 / 数值区间), 目标按 (来源, 链) 建索引,
+一批新币一次遍历即可得到每个代币应推送的目标。
+"""
+
+import json
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# 常用链名 -> chainId
+CHAIN_ALIASES = {
+    'eth': '1', 'ethereum': '1',
+    'bsc': '56', 'bnb': '56',
+    'polygon': '137', 'matic': '137',
+    'arbitrum': '42161', 'arb': '42161',
+    'base': '8453',
+    'optimism': '10', 'op': '10',
+    'avax': '43114', 'avalanche': '43114',
+    'sol': 'CT_501', 'solana': 'CT_501',
+}
+
+_ANY = '*'
+
+
+def normalize_chain(value) -> str:
+    if value is None:
+        return ''
+    text = str(value).strip()
+    return CHAIN_ALIASES.get(text.lower(), text).lower()
+
+
+def token_chain(token: dict) -> str:
+    return normalize_chain(token.get('chainId', token.get('chain')))
+
+
+def token_symbol(token: dict) -> str:
+    symbol = token.get('symbol')
+    if symbol:
+        return str(symbol)
+    # Meme Rush 排行项只有文本, 取第一行
+    return (token.get('raw_text') or '').split('\n', 1)[0].strip()
+
+
+def token_contract(token: dict) -> str:
+    return str(token.get('contractAddress') or '').lower()
+
+
+class CompiledFilter:
+    """单个目标的过滤条件 (链和来源已由索引处理)"""
+
+    def __init__(self, name: str, spec: dict):
+        self.name = name
+        self.sources = frozenset(s.lower() for s in spec.get('sources', [])) or None
+        self.chains = frozenset(normalize_chain(c) for c in spec.get('chains', [])) or None
+        regex = spec.get('symbol_regex')
+        self.symbol_regex = re.compile(regex) if regex else None
+        self.contract_allow = frozenset(c.lower() for c in spec.get('contract_allow', [])) or None
+        self.contract_deny = frozenset(c.lower() for c in spec.get('contract_deny', []))
+        self.ranges: List[Tuple[str, Optional[float], Optional[float]]] = [
+            (field, bounds[0], bounds[1]) for field, bounds in spec.get('ranges', {}).items()
+        ]
+
+    def matches(self, token: dict, contract: str) -> bool:
+        if self.contract_allow is not None and contract not in self.contract_allow:
+            return False
+        if contract and contract in self.contract_deny:
+            return False
+        if self.symbol_regex is not None and not self.symbol_regex.search(token_symbol(token)):
+            return False
+        for field, low, high in self.ranges:
+            try:
+                value = float(token.get(field))
+            except (TypeError, ValueError):
+                return False
+            if (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+
+class Router:
+    """编译后的路由表: (来源, 链) -> [过滤条件]"""
+
+    def __init__(self, targets: List[dict]):
+        self._index: Dict[Tuple[str, str], List[CompiledFilter]] = {}
+        for target in targets:
+            if not target.get('enabled', True):
+                continue
+            name = target.get('name') or str(target.get('chat_id'))
+            compiled = CompiledFilter(name, target.get('filters') or {})
+            for source in compiled.sources or (_ANY,):
+                for chain in compiled.chains or (_ANY,):
+                    self._index.setdefault((source, chain), []).append(compiled)
+
+    def targets_for(self, token: dict, source: str) -> List[str]:
+        """单个代币应推送的目标名"""
+        chain = token_chain(token)
+        contract = token_contract(token)
+        names = []
+        for key in ((source, chain), (source, _ANY), (_ANY, chain), (_ANY, _ANY)):
+            for compiled in self._index.get(key, ()):
+                if compiled.matches(token, contract):
+                    names.append(compiled.name)
+        return names
+
+    def route(self, tokens: List[dict], source: str) -> List[List[str]]:
+        """一批代币 -> 与之对应的目标名列表"""
+        return [self.targets_for(token, source) for token in tokens]
+
+
+def referenced_fields(targets: List[dict]) -> List[str]:
+    """过滤条件用到的代币字段 (解析时需保留)"""
+    fields = []
+    for target in targets:
+        for field in (target.get('filters') or {}).get('ranges', {}):
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+_cache: Tuple[str, Optional[Router]] = ('', None)
+_cache_lock = threading.Lock()
+
+
+def get_router(targets: List[dict]) -> Router:
+    """按配置取编译好的路由表 (配置不变时复用)"""
+    global _cache
+    key = json.dumps(targets, sort_keys=True, ensure_ascii=False)
+    with _cache_lock:
+        if _cache[0] != key:
+            _cache = (key, Router(targets))
+        return _cache[1]
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+对冲请求与故障转移
+多个等价接口 (镜像) 按顺序排列:
+  - 先请求第一个健康的接口, 超过它近期的 p95 延迟仍未返回时, 再向下一个接口发起对冲请求
+  - 某个请求失败时立即转向下一个接口, 不等超时
+  - 第一个成功的响应胜出, 其余请求收到取消信号后尽快放弃
+  - 每个接口一个熔断器 (见 resilience.py): 连续失败或总被对冲超过的接口熔断, 冷却后再试探
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+from resilience import CIRCUIT_OPEN, TIMEOUT, BreakerRegistry, Failure, UpstreamError, classify_exception
+from tracing import percentile
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class Cancelled(Exception):
+    """对冲中落败的请求被取消"""
+
+
+class EndpointStats:
+    """单个接口的近期延迟"""
+
+    def __init__(self, window: int = 50):
+        self.latencies = deque(maxlen=window)
+        self.wins = 0
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < 5:
+            return None
+        return percentile(sorted(self.latencies), 95)
+
+    def snapshot(self) -> dict:
+        p95 = self.p95()
+        return {
+            "samples": len(self.latencies),
+            "p95": round(p95, 4) if p95 is not None else None,
+            "wins": self.wins,
+        }
+
+
+class HedgedFetcher:
+    """对一组等价接口发起对冲请求
+
+    hedge_delay: 没有足够延迟样本时的对冲等待 (秒); 有样本时用该接口的 p95,
+                 并限制在 [min_hedge_delay, hedge_delay * 4] 之间
+    breakers: 各接口的熔断器, 打开的接口不参与请求
+    on_hedge: 每次发起对冲请求时回调 (指标用)
+    """
+
+    def __init__(self, hedge_delay: float = 2.0, min_hedge_delay: float = 0.2,
+                 breakers: BreakerRegistry = None, on_hedge: Callable[[str], None] = None):
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.breakers = breakers or BreakerRegistry(failure_threshold=3, reset_timeout=60, max_reset=900)
+        self.on_hedge = on_hedge
+        self._stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge')
+        self._generation = 0
+        self.hedged = 0
+
+    def stats(self, url: str) -> EndpointStats:
+        with self._lock:
+            stats = self._stats.get(url)
+            if stats is None:
+                stats = self._stats[url] = EndpointStats()
+            return stats
+
+    def order(self, urls: Sequence[str]) -> List[str]:
+        """未熔断的接口, 保持配置顺序"""
+        return [u for u in urls if self.breakers.get(u).available()]
+
+    def delay_for(self, url: str) -> float:
+        p95 = self.stats(url).p95()
+        if p95 is None:
+            return self.hedge_delay
+        return min(max(p95, self.min_hedge_delay), self.hedge_delay * 4)
+
+    def _record_success(self, url: str, latency: float):
+        stats = self.stats(url)
+        with self._lock:
+            stats.latencies.append(latency)
+            stats.wins += 1
+            self._generation += 1
+        self.breakers.get(url).record_success()
+
+    def _record_failure(self, url: str, failure: Failure):
+        breaker = self.breakers.get(url)
+        breaker.record_failure(failure)
+        with self._lock:
+            self._generation += 1
+        if not breaker.available():
+            logger.warning(f"接口熔断 {breaker.retry_in():.0f}s ({failure.kind}): {url}: {failure.error}")
+
+    def _run(self, attempt: Callable[[str, threading.Event], T], url: str, cancelled: threading.Event):
+        start = time.perf_counter()
+        try:
+            result = attempt(url, cancelled)
+        except Cancelled:
+            raise
+        except Exception as e:
+            if not cancelled.is_set():
+                self._record_failure(url, classify_exception(e))
+            raise
+        if not cancelled.is_set():
+            # 落败请求的耗时不计入 (已被取消, 不代表接口真实延迟)
+            self._record_success(url, time.perf_counter() - start)
+        return result
+
+    def fetch(self, urls: Sequence[str], attempt: Callable[[str, threading.Event], T]) -> T:
+        """返回第一个成功的结果; 全部失败时抛出最后一个异常
+
+        attempt(url, cancelled): 完成一次请求并返回结果, 失败时抛异常;
+        应在读取响应的间隙检查 cancelled, 已设置时抛出 Cancelled
+        """
+        queue = self.order(urls)
+        cancelled = threading.Event()
+        running = {}
+        deadlines = {}  # 请求 -> 对冲期限 (发起时间 + 该接口的 p95)
+        last_error: Optional[Exception] = None
+
+        def launch() -> Optional[str]:
+            while queue:
+                url = queue.pop(0)
+                if self.breakers.get(url).allow():
+                    future = self._pool.submit(self._run, attempt, url, cancelled)
+                    running[future] = url
+                    deadlines[future] = time.monotonic() + self.delay_for(url)
+                    return url
+            return None
+
+        current = launch()
+        if current is None:
+            retry_in = min((self.breakers.get(u).retry_in() for u in urls), default=0)
+            raise UpstreamError(Failure(CIRCUIT_OPEN, f"全部接口熔断中, {retry_in:.0f}s 后重试",
+                                        retry_after=retry_in))
+        try:
+            while running:
+                timeout = self.delay_for(current) if queue else None
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # 超过 p95 仍未返回: 对冲
+                    previous, hedge = current, launch()
+                    if hedge is not None:
+                        current = hedge
+                        self.hedged += 1
+                        logger.info(f"对冲请求: {previous} 超过 {timeout:.2f}s 未返回, 追加 {current}")
+                        if self.on_hedge:
+                            self.on_hedge(current)
+                    continue
+                for future in done:
+                    url = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        last_error = e
+                        logger.warning(f"接口请求失败: {url}: {e}")
+                        continue
+                    # 胜出时已超过自身对冲期限的请求记一次失败, 总是落败的慢接口会被降级;
+                    # 还在期限内的 (如刚发起的对冲请求) 不算, 健康的备用接口不会因此熔断
+                    now = time.monotonic()
+                    for loser, loser_url in running.items():
+                        if now >= deadlines[loser]:
+                            self._record_failure(loser_url, Failure(TIMEOUT, "对冲落败"))
+                    return result
+                if queue:
+                    # 失败立即转移到下一个接口
+                    current = launch() or current
+        finally:
+            cancelled.set()
+        raise last_error
+
+    def version(self) -> tuple:
+        """snapshot() 的版本: 记录结果或对冲时变化; 有接口熔断时 retry_in 每秒变化"""
+        with self._lock:
+            generation = self._generation
+        return generation, self.hedged, int(time.time()) if self.breakers.degraded() else 0
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            items = list(self._stats.items())
+        stats = dict(items)
+        breakers = self.breakers.snapshot()
+        return {
+            url: {**(stats[url].snapshot() if url in stats else EndpointStats().snapshot()),
+                  "breaker": breakers.get(url)}
+            for url in list(dict.fromkeys(list(stats) + list(breakers)))
+        }
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+轮询历史 (SQLite) 与后台维护
+每轮轮询的观测值 (代币总数 / 变更数 / 抓取耗时, Meme 的每个排行项名次) 按 (序列, 键, 时间) 写入 raw 层;
+后台维护任务按保留层级逐级降采样并回收空间:
+
+    raw   保留 7 天, 过期后汇总进 hour
+    hour  1 小时一个桶 (count / sum / min / max / last), 保留 90 天, 过期后汇总进 day
+    day   1 天一个桶, 永久保留 (keep=0)
+
+维护每 interval 秒 (默认 1 小时) 一次, 每批最多处理 batch_rows 行、批间休眠 pause 秒, 单次维护最多 max_seconds 秒 (未完成的下次继续),
+事务都很短, 监控循环写入不会被长时间阻塞; 删除后按 vacuum_pages 页一批做增量 vacuum。
+每次维护的报告 (各层汇总 / 删除行数、回收字节、耗时) 写入 meta 表, 跟随进程也能读到。
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+TIERS = [
+    {"name": "raw", "keep": 7 * DAY},
+    {"name": "hour", "bucket": 3600, "keep": 90 * DAY},
+    {"name": "day", "bucket": DAY, "keep": 0},
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS raw (
+    series TEXT NOT NULL,
+    key TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_raw_ts ON raw (ts);
+CREATE INDEX IF NOT EXISTS idx_raw_series ON raw (series, key, ts);
+CREATE TABLE IF NOT EXISTS rollup (
+    tier TEXT NOT NULL,
+    series TEXT NOT NULL,
+    key TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    last REAL NOT NULL,
+    PRIMARY KEY (tier, series, key, bucket)
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_bucket ON rollup (tier, bucket);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# 汇总进下一层 (同一桶分多批处理时合并; 批次按时间先后, last 取后一批的)
+MERGE = """
+WHERE true ON CONFLICT (tier, series, key, bucket) DO UPDATE SET
+    count = count + excluded.count, sum = sum + excluded.sum,
+    min = MIN(min, excluded.min), max = MAX(max, excluded.max), last = excluded.last
+"""
+
+# config.json 的 history 中可以覆盖的参数
+OPTIONS = ('tiers', 'interval', 'batch_rows', 'pause', 'max_seconds', 'vacuum_pages')
+
+
+def options_from(cfg: dict) -> dict:
+    """config.json 的 history 配置 -> HistoryStore 参数 (忽略未知项)"""
+    section = cfg.get('history') or {}
+    return {key: section[key] for key in OPTIONS if key in section}
+
+
+class HistoryStore:
+    """轮询历史; record 由监控循环调用, maintain 由后台线程调用 (各用一个连接)"""
+
+    def __init__(self, path: str, tiers: Optional[List[dict]] = None, interval: float = 3600,
+                 batch_rows: int = 2000, pause: float = 0.05, max_seconds: float = 30, vacuum_pages: int = 256):
+        self.path = path
+        self.tiers = tiers or TIERS
+        if self.tiers[0]["name"] != "raw":
+            raise ValueError("第一个保留层级必须是 raw")
+        self.interval = interval
+        self.batch_rows = batch_rows
+        self.pause = pause
+        self.max_seconds = max_seconds
+        self.vacuum_pages = vacuum_pages
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._thread: Optional[threading.Thread] = None
+        self._conn = self._connect()
+        self._conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        # 新库启用增量 vacuum, 必须在建表与切换 WAL 之前 (已有的库见 _vacuum)
+        if not conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA journal_size_limit=4194304")  # 检查点后 WAL 截断到 4MB 以内
+        return conn
+
+    # ---------- 写入 / 查询 ----------
+
+    def record(self, series: str, points: Iterable[Tuple[str, float]], ts: Optional[float] = None):
+        """写入一轮的观测值 [(键, 值), ...]; 失败只记日志, 不影响监控循环"""
+        ts = int(ts or time.time())
+        try:
+            with self._lock:
+                self._conn.executemany("INSERT INTO raw (series, key, ts, value) VALUES (?, ?, ?, ?)",
+                                       [(series, key, ts, value) for key, value in points])
+                self._writes += 1
+        except sqlite3.Error as e:
+            logger.warning(f"写入历史失败: {e}")
+
+    def version(self) -> tuple:
+        """数据版本: 本连接的写入次数 + data_version (其他连接 / 进程提交时变化, 如维护任务与监控进程)"""
+        with self._lock:
+            return self._writes, self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def query(self, series: str, key: Optional[str] = None, since: float = 0, tier: str = 'raw',
+              limit: int = 1000) -> List[dict]:
+        """按层级查询 (raw 为原始值, 其余为汇总桶), 时间升序"""
+        args = [series, int(since)]
+        where = " AND key = ?" if key is not None else ""
+        if key is not None:
+            args.append(key)
+        with self._lock:
+            if tier == 'raw':
+                rows = self._conn.execute(
+                    f"SELECT key, ts, value FROM raw WHERE series = ? AND ts >= ?{where} ORDER BY ts DESC LIMIT ?",
+                    args + [limit]).fetchall()
+                return [{"key": k, "ts": ts, "value": v} for k, ts, v in reversed(rows)]
+            rows = self._conn.execute(
+                f"SELECT key, bucket, count, sum, min, max, last FROM rollup "
+                f"WHERE tier = ? AND series = ? AND bucket >= ?{where} ORDER BY bucket DESC LIMIT ?",
+                [tier] + args + [limit]).fetchall()
+        return [{"key": k, "ts": bucket, "count": n, "avg": round(total / n, 6), "min": lo, "max": hi, "last": last}
+                for k, bucket, n, total, lo, hi, last in reversed(rows)]
+
+    def stats(self) -> dict:
+        """各层行数、文件大小与最近一次维护报告"""
+        with self._lock:
+            counts = {"raw": self._conn.execute("SELECT COUNT(*) FROM raw").fetchone()[0]}
+            for tier, count in self._conn.execute("SELECT tier, COUNT(*) FROM rollup GROUP BY tier"):
+                counts[tier] = count
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'maintenance'").fetchone()
+        return {
+            "rows": counts,
+            "tiers": self.tiers,
+            "file_bytes": _file_size(self.path),
+            "free_bytes": free_pages * page_size,
+            "last_maintenance": json.loads(row[0]) if row else None
+        }
+
+    # ---------- 维护 ----------
+
+    def maintain(self) -> dict:
+        """降采样 + 过期删除 + 增量 vacuum, 返回报告"""
+        start = time.monotonic()
+        deadline = start + self.max_seconds
+        conn = self._connect()  # 维护用独立连接, 批次之间让出写锁
+        report = {"started_at": time.time(), "rolled_up": {}, "deleted": {}, "batches": 0, "complete": True}
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            before = conn.execute("PRAGMA page_count").fetchone()[0]
+            now = int(time.time())
+            for tier, next_tier in zip(self.tiers, self.tiers[1:] + [None]):
+                if not tier.get("keep"):
+                    continue
+                cutoff = now - tier["keep"]
+                moved = self._expire(conn, tier, next_tier, cutoff, deadline, report)
+                if moved is None:
+                    report["complete"] = False
+                    break
+            report["vacuum_pages"] = self._vacuum(conn, deadline)
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()  # 不阻塞写入
+            report["reclaimed_bytes"] = max(0, before - conn.execute("PRAGMA page_count").fetchone()[0]) * page_size
+            report["file_bytes"] = _file_size(self.path)
+        finally:
+            report["seconds"] = round(time.monotonic() - start, 3)
+            try:
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('maintenance', ?)",
+                             (json.dumps(report),))
+            finally:
+                conn.close()
+        return report
+
+    def _expire(self, conn: sqlite3.Connection, tier: dict, next_tier: Optional[dict], cutoff: int,
+                deadline: float, report: dict) -> Optional[int]:
+        """把 tier 中早于 cutoff 的行分批汇总进 next_tier 后删除; 超时返回 None"""
+        name = tier["name"]
+        table, ts_col, tier_filter = ("raw", "ts", "") if name == "raw" else ("rollup", "bucket", " AND tier = ?")
+        tier_args = [] if name == "raw" else [name]
+        rollup_sql = None
+        if next_tier:
+            size = next_tier["bucket"]
+            if name == "raw":
+                rows = (f"SELECT series, key, (ts / {size}) * {size} AS b, 1 AS n, value AS total, "
+                        f"value AS lo, value AS hi, value AS v, ts AS t FROM raw WHERE ts < ?")
+            else:
+                rows = (f"SELECT series, key, (bucket / {size}) * {size} AS b, count AS n, sum AS total, "
+                        f"min AS lo, max AS hi, last AS v, bucket AS t FROM rollup WHERE bucket < ? AND tier = ?")
+            # last: 桶内时间最晚的一行
+            select = (f"SELECT ?, series, key, b, SUM(n), SUM(total), MIN(lo), MAX(hi), "
+                      f"MAX(CASE WHEN rn = 1 THEN v END) FROM ("
+                      f"SELECT *, ROW_NUMBER() OVER (PARTITION BY series, key, b ORDER BY t DESC) AS rn "
+                      f"FROM ({rows})) GROUP BY series, key, b")
+            rollup_sql = (f"INSERT INTO rollup (tier, series, key, bucket, count, sum, min, max, last) "
+                          f"SELECT * FROM ({select}) {MERGE}")
+        total = 0
+        while True:
+            if time.monotonic() > deadline:
+                return None
+            # 本批的上界: 第 batch_rows 行的时间 (同一时间的行不拆到两批)
+            row = conn.execute(
+                f"SELECT {ts_col} FROM {table} WHERE {ts_col} < ?{tier_filter} ORDER BY {ts_col} LIMIT 1 OFFSET ?",
+                [cutoff] + tier_args + [self.batch_rows]).fetchone()
+            upper = min(row[0], cutoff) if row else cutoff
+            if row and upper == conn.execute(
+                    f"SELECT MIN({ts_col}) FROM {table} WHERE {ts_col} < ?{tier_filter}",
+                    [cutoff] + tier_args).fetchone()[0]:
+                upper += 1  # 这一批全是同一时间
+            # 与 record 共用进程内的锁: 写入最多等一批, 不走 SQLite 忙等的退避休眠
+            with self._lock:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if rollup_sql:
+                        cursor = conn.execute(rollup_sql, [next_tier["name"], upper] + tier_args)
+                        report["rolled_up"][next_tier["name"]] = report["rolled_up"].get(next_tier["name"], 0) + \
+                            cursor.rowcount
+                    cursor = conn.execute(f"DELETE FROM {table} WHERE {ts_col} < ?{tier_filter}", [upper] + tier_args)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            deleted = cursor.rowcount
+            total += deleted
+            report["deleted"][name] = report["deleted"].get(name, 0) + deleted
+            report["batches"] += 1
+            if upper >= cutoff or not deleted:
+                return total
+            time.sleep(self.pause)
+
+    def _vacuum(self, conn: sqlite3.Connection, deadline: float) -> int:
+        """增量 vacuum: 每批 vacuum_pages 页, 返回回收的页数"""
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # 旧库未启用增量模式: 空闲页多于一半时做一次完整 VACUUM 并切换
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free * 2 > pages:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+                return free
+            return 0
+        reclaimed = 0
+        while time.monotonic() < deadline:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                break
+            with self._lock:
+                conn.execute(f"PRAGMA incremental_vacuum({min(free, self.vacuum_pages)})").fetchall()  # 逐页执行
+            reclaimed += free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            time.sleep(self.pause)
+        return reclaimed
+
+    def start(self):
+        """后台线程每 interval 秒维护一次 (重复调用不会启动多个)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name='history-maintenance')
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                report = self.maintain()
+                logger.info(f"历史维护完成: 汇总 {report['rolled_up']}, 删除 {report['deleted']}, "
+                            f"回收 {report.get('reclaimed_bytes', 0)} 字节, 耗时 {report['seconds']}s")
+            except Exception as e:
+                logger.error(f"历史维护失败: {e}")
+
+
+def _file_size(path: str) -> int:
+    """数据库文件 + WAL 的字节数"""
+    total = 0
+    for suffix in ('', '-wal'):
+        try:
+            total += os.path.getsize(path + suffix)
+        except OSError:
+            pass
+    return total
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+JSON 接口的预序列化 / 压缩 / 条件请求
+同一份数据 (如同一个状态快照, 或同一版本号下的事件 / 延迟 / 历史) 只序列化一次, gzip / br 压缩结果按需生成后缓存;
+响应带 ETag 与 Cache-Control, 客户端带 If-None-Match 命中时只比较请求头并返回 304。
+
+br 需要安装 brotli 包 (可选), 未安装时只提供 gzip。
+"""
+
+import gzip
+import hashlib
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 小于该字节数的响应不压缩
+MIN_COMPRESS_SIZE = 512
+# 按版本号缓存的条目上限 (名字含查询参数, 超出时淘汰最早的)
+MAX_VERSIONED = 256
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+class Snapshot:
+    """一次序列化的结果: 原始字节、ETag 与各编码的压缩结果"""
+
+    __slots__ = ('body', 'etag', '_encoded')
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        """压缩结果 (首次用到时生成; 并发时可能重复压缩一次, 结果相同)"""
+        data = self._encoded.get(encoding)
+        if data is None:
+            if encoding == 'br':
+                data = brotli.compress(self.body, quality=5)
+            else:
+                data = gzip.compress(self.body, compresslevel=6, mtime=0)
+            self._encoded[encoding] = data
+        return data
+
+
+class JSONResponder:
+    """生成 JSON 响应; 带 source 的按数据源对象缓存序列化结果
+
+    source 按对象身份比较 (并持有引用, 不会因 id 复用误命中), 适合每轮整体替换的状态字典。
+    """
+
+    def __init__(self, dumps: Callable[[object], bytes], cache_control: str = 'no-cache'):
+        self.dumps = dumps
+        self.cache_control = cache_control
+        self._cache: Dict[str, Tuple[object, Snapshot]] = {}
+        self._versioned: Dict[str, Tuple[object, Snapshot]] = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self, name: str, source: object, build: Callable[[], object]) -> Snapshot:
+        """name 对应的 source 未变时复用上次的序列化结果, 否则用 build() 重新生成"""
+        entry = self._cache.get(name)
+        if entry is not None and entry[0] is source:
+            return entry[1]
+        snapshot = Snapshot(self.dumps(build()))
+        with self._lock:
+            self._cache[name] = (source, snapshot)
+        return snapshot
+
+    def versioned(self, name: str, version: object, build: Callable[[], object]) -> Snapshot:
+        """name 的 version 未变时复用上次的序列化结果 (version 按相等比较, 如计数器或其元组)
+
+        name 应包含影响结果的查询参数
+        """
+        entry = self._versioned.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        snapshot = Snapshot(self.dumps(build()))
+        with self._lock:
+            self._versioned.pop(name, None)
+            self._versioned[name] = (version, snapshot)
+            while len(self._versioned) > MAX_VERSIONED:
+                del self._versioned[next(iter(self._versioned))]
+        return snapshot
+
+    def invalidate(self, name: Optional[str] = None):
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+                self._versioned.clear()
+            else:
+                self._cache.pop(name, None)
+                self._versioned.pop(name, None)
+
+    def respond(self, data=None, status: int = 200, snapshot: Optional[Snapshot] = None) -> Response:
+        """按请求头返回 304 / 压缩 / 原始响应 (传入 snapshot 时不再序列化 data)"""
+        if snapshot is None:
+            snapshot = Snapshot(self.dumps(data))
+        headers = {'Cache-Control': self.cache_control, 'Vary': 'Accept-Encoding'}
+        if status == 200 and request.if_none_match.contains_weak(snapshot.etag):
+            response = Response(status=304, headers=headers)
+            response.set_etag(snapshot.etag, weak=True)
+            return response
+
+        body = snapshot.body
+        encoding = None
+        if len(body) >= MIN_COMPRESS_SIZE:
+            encoding = request.accept_encodings.best_match(ENCODINGS)
+        if encoding:
+            body = snapshot.encoded(encoding)
+            headers['Content-Encoding'] = encoding
+        response = Response(body, status=status, mimetype='application/json', headers=headers)
+        if status == 200:
+            response.set_etag(snapshot.etag, weak=True)
+        return response
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+生产模式下的监控主节点选举
+多个 WSGI worker (或独立 sidecar 进程) 通过文件锁租约选出唯一运行监控循环的进程,
+其余进程跟随共享状态文件; 多台主机之间用 cluster.py 的带 TTL 租约 (接口相同)
+"""
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class FileLease:
+    """基于 flock 的独占租约
+
+    持锁进程退出 (包括崩溃) 时内核自动释放锁, 其他进程即可接管。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """非阻塞尝试获取租约"""
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # 记录持有者, 便于排查
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def renew(self) -> bool:
+        """flock 不会过期, 持有即有效"""
+        return self.held
+
+    def release(self):
+        """释放租约"""
+        if self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+
+class LeaderElector:
+    """后台线程反复尝试获取租约, 当选后调用 on_elected
+
+    带 TTL 的租约 (有 renew_interval 属性) 由心跳线程续约; 续约失败即失去主节点身份,
+    on_elected 应检查 is_leader 并尽快返回, 之后重新参与竞选。
+    """
+
+    def __init__(self, lease, on_elected: Callable[[], None], retry_interval: float = 5):
+        self.lease = lease
+        self.on_elected = on_elected
+        self.retry_interval = min(retry_interval, getattr(lease, 'renew_interval', retry_interval))
+        self._elected = False
+        self.terms = 0
+
+    @property
+    def is_leader(self) -> bool:
+        return self._elected and self.lease.held
+
+    def _heartbeat(self, term: int):
+        while self._elected and self.terms == term:
+            time.sleep(self.lease.renew_interval)
+            if self.terms == term and not self.lease.renew():
+                logger.warning("租约续约失败, 已失去主节点身份")
+                return
+
+    def run(self):
+        """阻塞竞选; 当选后运行 on_elected, 返回 (失去租约) 后重新竞选"""
+        while True:
+            while not self.lease.try_acquire():
+                time.sleep(self.retry_interval)
+            self._elected = True
+            self.terms += 1
+            logger.info(f"已获得监控租约 (pid={os.getpid()}, 第 {self.terms} 个任期)")
+            if hasattr(self.lease, 'renew_interval'):
+                threading.Thread(target=self._heartbeat, args=(self.terms,), daemon=True).start()
+            try:
+                self.on_elected()
+            finally:
+                self._elected = False
+                self.lease.release()
+            logger.info("已退出主节点, 重新参与竞选")
+
+    def start(self):
+        """在后台线程中竞选"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+
+
+class StateFollower:
+    """跟随者: 轮询共享状态文件, 文件更新后回调 on_change(path)"""
+
+    def __init__(self, path: str, on_change: Callable[[str], None], poll_interval: float = 1):
+        self.path = path
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._mtime = None
+
+    def poll(self):
+        """检查一次文件是否更新"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self.on_change(self.path)
+
+    def run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"同步共享状态失败: {e}")
+            time.sleep(self.poll_interval)
+
+    def start(self):
+        """在后台线程中跟随"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
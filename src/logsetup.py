@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+非阻塞日志
+业务线程只把日志记录放进队列 (QueueHandler), 由后台 QueueListener 线程写控制台和文件。
+文件为 JSON Lines, 按大小和时间轮转, 可选 gzip 压缩旧文件; 多个进程 (gunicorn worker / sidecar) 可以写同一个文件。
+
+config.json 中的可选配置:
+
+    "logging": {
+        "level": "INFO",
+        "json": true,
+        "max_bytes": 10485760,      # 单个文件上限, 0 表示不按大小轮转
+        "rotate_interval": 86400,   # 按时间轮转的间隔 (秒), 0 表示不按时间轮转
+        "backup_count": 14,
+        "compress": true
+    }
+"""
+
+import atexit
+import fcntl
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+from datetime import datetime, timezone
+
+# LogRecord 自带属性, 其余属性视为 extra 上下文字段
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+DEFAULT_OPTIONS = {
+    "level": "INFO",
+    "json": True,
+    "max_bytes": 10 * 1024 * 1024,
+    "rotate_interval": 86400,
+    "backup_count": 14,
+    "compress": True
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """一行一个 JSON 对象, 附带 source 等上下文字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """给每条记录补上固定的上下文字段 (如 source)"""
+
+    def __init__(self, **context):
+        super().__init__()
+        self.context = context
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in self.context.items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SizeTimeRotatingFileHandler(logging.handlers.WatchedFileHandler):
+    """文件超过 max_bytes 或距上次轮转超过 interval 秒时轮转, 多进程共用同一个文件
+
+    gunicorn 的多个 worker 与 sidecar 都写 logs/app.log: 大小取文件的实际大小, 上次轮转时间记在
+    app.log.lock 的 mtime 上, 轮转在该文件的 flock 下进行 (拿到锁后重新判断, 只有一个进程真正轮转);
+    其他进程写入前发现 app.log 已被换掉 (inode 变化) 就重新打开。
+    压缩推迟一轮 (app.log.1 保持原样, 下次轮转时压缩成 app.log.2.gz): 刚轮转时可能还有进程
+    正在写旧文件, 压缩的是已经没有人写的文件, 不会丢日志。
+    """
+
+    def __init__(self, filename: str, max_bytes: int, interval: float, backup_count: int, compress: bool):
+        super().__init__(filename, encoding='utf-8')
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.lock_path = self.baseFilename + '.lock'
+        if not os.path.exists(self.lock_path):
+            open(self.lock_path, 'a').close()
+
+    def _due(self) -> bool:
+        """按共享文件的实际大小与上次轮转时间判断"""
+        try:
+            if self.max_bytes and os.stat(self.baseFilename).st_size >= self.max_bytes:
+                return True
+            return bool(self.interval) and time.time() - os.stat(self.lock_path).st_mtime >= self.interval
+        except OSError:
+            return False
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self._due():
+                self.doRollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+    def _backup(self, index: int) -> str:
+        name = f"{self.baseFilename}.{index}"
+        return name + '.gz' if self.compress and index > 1 else name
+
+    def doRollover(self):
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if not self._due():
+                    return  # 其他进程刚刚轮转过
+                if self.backup_count > 0:
+                    for index in range(self.backup_count - 1, 0, -1):
+                        source, dest = self._backup(index), self._backup(index + 1)
+                        if index == 1 and self.compress:
+                            source = f"{self.baseFilename}.1"
+                            if os.path.exists(source):
+                                _gzip(source, dest)
+                            continue
+                        if os.path.exists(source):
+                            os.replace(source, dest)
+                    if os.path.exists(self.baseFilename):
+                        os.replace(self.baseFilename, f"{self.baseFilename}.1")
+                else:
+                    open(self.baseFilename, 'w').close()
+                os.utime(self.lock_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self.reopenIfNeeded()
+
+
+def _gzip(source: str, dest: str):
+    tmp_path = dest + '.tmp'
+    with open(source, 'rb') as f_in, gzip.open(tmp_path, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.replace(tmp_path, dest)
+    os.remove(source)
+
+
+def _load_options(config_path: str) -> dict:
+    options = dict(DEFAULT_OPTIONS)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            options.update(json.load(f).get('logging', {}))
+    except Exception:
+        pass
+    return options
+
+
+def setup_logging(logs_dir: str, source: str, config_path: str) -> logging.handlers.QueueListener:
+    """配置根日志: 根 logger 只挂 QueueHandler, 控制台与文件输出在后台线程完成"""
+    options = _load_options(config_path)
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+
+    file_handler = SizeTimeRotatingFileHandler(
+        os.path.join(logs_dir, 'app.log'),
+        max_bytes=options['max_bytes'],
+        interval=options['rotate_interval'],
+        backup_count=options['backup_count'],
+        compress=options['compress']
+    )
+    if options['json']:
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] [%(source)s] %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter(source=source))
+
+    root = logging.getLogger()
+    root.setLevel(options['level'])
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, console, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+排行榜名次变动提醒 (Meme Rush)
+每条链保留上一轮的 {代币标识: 名次} 字典, 本轮一次遍历得到名次变动, 再按各推送目标的阈值筛选:
+
+    "rank_alerts": {
+        "top": 10,          # 进入前 10 名
+        "jump": 15,         # 一轮内上升至少 15 名
+        "fall": 0,          # 一轮内下降至少 N 名 (0 不提醒)
+        "dropped": true,    # 掉出排行榜
+        "cooldown": 1800    # 同一代币同一类提醒的最短间隔 (秒), 防止在阈值附近反复横跳刷屏
+    }
+
+config.json 顶层的 rank_alerts 为默认值, notify_targets 中的目标可以用自己的 rank_alerts 覆盖
+(设为 false 关闭该目标, true 沿用默认值); 两处都未配置时不推送名次变动。
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+# 提醒类别
+ENTERED_TOP = 'entered_top'
+JUMPED = 'jumped'
+FELL = 'fell'
+DROPPED = 'dropped'
+
+DEFAULTS = {"top": 0, "jump": 0, "fall": 0, "dropped": False, "cooldown": 1800}
+
+
+class Movement(NamedTuple):
+    chain: str
+    key: str
+    token: dict             # 本轮的排行项 (掉榜时为上一轮的)
+    old: Optional[int]      # 上一轮名次, 新上榜为 None
+    new: Optional[int]      # 本轮名次, 掉榜为 None
+
+
+def alert_rules(cfg: dict, target: dict) -> Optional[dict]:
+    """目标的提醒阈值 (目标配置覆盖全局默认); 未启用时返回 None"""
+    base = cfg.get('rank_alerts')
+    own = target.get('rank_alerts', base)
+    if not own:
+        return None
+    rules = {**DEFAULTS, **(base or {}), **(own if isinstance(own, dict) else {})}
+    if not (rules['top'] or rules['jump'] or rules['fall'] or rules['dropped']):
+        return None
+    return rules
+
+
+def classify(movement: Movement, rules: dict) -> Optional[str]:
+    """按阈值判断一次名次变动属于哪类提醒 (不满足任何阈值时为 None)"""
+    old, new = movement.old, movement.new
+    if new is None:
+        return DROPPED if rules['dropped'] else None
+    top = rules['top']
+    if top and new <= top and (old is None or old > top):
+        return ENTERED_TOP
+    if old is None:
+        return None
+    if rules['jump'] and old - new >= rules['jump']:
+        return JUMPED
+    if rules['fall'] and new - old >= rules['fall']:
+        return FELL
+    return None
+
+
+class RankTracker:
+    """各链上一轮的名次索引与提醒去抖
+
+    key: 排行项 -> 代币标识 (同一代币跨轮次不变)
+    default_chain: 排行项没有 chain 字段时归入的链 (调用方按链分组与恢复状态时用同一个值)
+    """
+
+    def __init__(self, key: Callable[[dict], str], default_chain: str = ''):
+        self.key = key
+        self.default_chain = default_chain
+        self._ranks: Dict[str, Dict[str, int]] = {}
+        self._tokens: Dict[str, Dict[str, dict]] = {}
+        self._alerted: Dict[str, float] = {}  # "目标|链|标识|类别" -> 上次提醒时间
+        self._lock = threading.Lock()
+
+    def chain_of(self, token: dict) -> str:
+        return token.get('chain') or self.default_chain
+
+    def update(self, chain: str, tokens: Iterable[dict]) -> List[Movement]:
+        """记录本轮名次, 返回名次变化的代币 (该链首轮只建立基线, 返回空)"""
+        key = self.key
+        ranks: Dict[str, int] = {}
+        by_key: Dict[str, dict] = {}
+        for token in tokens:
+            k = key(token)
+            if k and k not in ranks:
+                ranks[k] = token.get('rank')
+                by_key[k] = token
+        with self._lock:
+            previous = self._ranks.get(chain)
+            previous_tokens = self._tokens.get(chain, {})
+            self._ranks[chain] = ranks
+            self._tokens[chain] = by_key
+        if previous is None:
+            return []
+
+        movements = []
+        for k, rank in ranks.items():
+            old = previous.get(k)
+            if old != rank:
+                movements.append(Movement(chain, k, by_key[k], old, rank))
+        for k, old in previous.items():
+            if k not in ranks:
+                movements.append(Movement(chain, k, previous_tokens.get(k) or {"rank": old}, old, None))
+        return movements
+
+    def debounce(self, target: str, movement: Movement, kind: str, cooldown: float,
+                 now: Optional[float] = None) -> bool:
+        """冷却期内已提醒过同一代币的同一类变动时返回 False, 否则记下本次并返回 True"""
+        now = time.time() if now is None else now
+        name = f"{target}|{movement.chain}|{movement.key}|{kind}"
+        with self._lock:
+            last = self._alerted.get(name)
+            if last is not None and now - last < cooldown:
+                return False
+            self._alerted[name] = now
+            return True
+
+    def prune(self, max_age: float):
+        """丢弃超过 max_age 秒的提醒记录"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            self._alerted = {name: ts for name, ts in self._alerted.items() if ts >= cutoff}
+
+    def dump(self) -> dict:
+        """名次索引与提醒记录, 写入状态文件 (重启 / 切换主节点后不重复提醒)"""
+        with self._lock:
+            return {"ranks": {chain: dict(ranks) for chain, ranks in self._ranks.items()},
+                    "alerted": dict(self._alerted)}
+
+    def load(self, data: Optional[dict], tokens: Iterable[dict] = ()):
+        """从持久化状态恢复; tokens 为上一轮的排行项 (旧版状态文件没有名次索引时由它重建)"""
+        data = data or {}
+        by_chain: Dict[str, Dict[str, dict]] = {}
+        for token in tokens:
+            by_chain.setdefault(self.chain_of(token), {}).setdefault(self.key(token), token)
+        ranks = data.get('ranks')
+        if ranks is None:
+            ranks = {chain: {k: t.get('rank') for k, t in items.items()} for chain, items in by_chain.items()}
+        with self._lock:
+            self._ranks = {chain: dict(items) for chain, items in ranks.items()}
+            self._tokens = by_chain
+            self._alerted = dict(data.get('alerted') or {})
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"chains": {chain: len(ranks) for chain, ranks in self._ranks.items()},
+                    "alerted": len(self._alerted)}
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多渠道推送
+notify_targets 中每个目标用 type 选择渠道 (缺省为 telegram):
+
+    {"name": "TG 群", "type": "telegram", "bot_token": "...", "chat_id": "..."}
+    {"name": "交易机器人", "type": "webhook", "url": "https://...", "headers": {...}}
+    {"name": "Discord", "type": "discord", "webhook_url": "https://discord.com/api/webhooks/..."}
+    {"name": "飞书群", "type": "lark", "webhook_url": "https://open.feishu.cn/...", "secret": "..."}
+
+每个渠道共用一个带连接池的 requests.Session, 每个目标可单独配置 timeout (秒)。
+消息统一按 Telegram HTML 格式构建, 其他渠道自动转换为纯文本 / Markdown。
+
+推送与否只看 notify_method 是否为 none (关闭); 其他取值 (telegram / both 等旧配置) 都按
+notify_targets 中启用的目标推送, 渠道由各目标的 type 决定。
+"""
+
+import base64
+import hashlib
+import hmac
+import html
+import json
+import re
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from resilience import CLIENT, classify_exception, classify_status
+
+DEFAULT_TIMEOUT = 10
+
+# 目标配置中的凭据字段 (webhook 地址的路径本身就是密钥)
+SECRET_FIELDS = ('bot_token', 'url', 'webhook_url', 'secret')
+# 错误文本中可能出现的凭据: Telegram bot token、URL 路径 (requests 的错误里只带路径)
+_BOT_TOKEN = re.compile(r'bot\d+:[\w-]+')
+_URL_PATH = re.compile(r"(https?://[^/\s'\"]+)/[^\s'\")]*")
+_ERROR_URL = re.compile(r"(with url: )\S+")
+
+
+class DeliveryResult(NamedTuple):
+    ok: bool
+    status: int = 0
+    error: str = ''
+    retry_after: Optional[float] = None
+    kind: str = ''  # 失败类别 (见 resilience.py)
+
+
+# =============== 连接池 ===============
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def channel_session(channel: str) -> requests.Session:
+    """每个渠道一个 Session (独立连接池)"""
+    with _sessions_lock:
+        session = _sessions.get(channel)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[channel] = session
+        return session
+
+
+# =============== 消息格式转换 ===============
+
+_TAG = re.compile(r'<[^>]+>')
+
+
+def html_to_text(message: str) -> str:
+    return html.unescape(_TAG.sub('', message))
+
+
+def html_to_markdown(message: str) -> str:
+    message = re.sub(r'</?b>', '**', message)
+    message = re.sub(r'</?code>', '`', message)
+    return html_to_text(message)
+
+
+# =============== 渠道实现 ===============
+
+class Notifier:
+    """推送渠道基类"""
+    channel = ''
+
+    def __init__(self, target: dict):
+        self.target = target
+        self.timeout = target.get('timeout', DEFAULT_TIMEOUT)
+        self.session = channel_session(self.channel)
+
+    def send(self, message: str) -> DeliveryResult:
+        raise NotImplementedError
+
+    def breaker_key(self) -> str:
+        """熔断器标识: 同一凭据 (webhook 地址) 的目标共用一个熔断器, 不含密钥原文"""
+        url = self.target.get('webhook_url') or self.target.get('url') or ''
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+        return f"{self.channel}:{urlparse(url).netloc}#{digest}"
+
+    def rate_limit_key(self) -> str:
+        """429 退避的标识: 缺省与熔断器相同"""
+        return self.breaker_key()
+
+    def redact(self, text: str) -> str:
+        """去掉错误文本中的凭据 (错误会进入熔断器快照 / 发件箱 / 共享状态, 都可以通过 API 看到)"""
+        for field in SECRET_FIELDS:
+            value = str(self.target.get(field) or '')
+            if len(value) < 6:  # 过短的值原样替换会误伤正常文本, 由下面的通用规则处理
+                continue
+            text = text.replace(value, '***')
+            path = urlparse(value).path if field in ('url', 'webhook_url') else ''
+            if len(path) > 1:
+                text = text.replace(path, '/***')
+        text = _BOT_TOKEN.sub('bot***', text)
+        text = _URL_PATH.sub(r'\1/***', text)
+        return _ERROR_URL.sub(r'\1***', text)
+
+    def _post(self, url: str, payload: dict, headers: dict = None) -> DeliveryResult:
+        try:
+            response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            return DeliveryResult(False, 0, self.redact(str(e)), kind=classify_exception(e).kind)
+        if 200 <= response.status_code < 300:
+            if self._accepted(response):
+                return DeliveryResult(True, response.status_code)
+            return DeliveryResult(False, response.status_code, self.redact(response.text[:200]), kind=CLIENT)
+        retry_after = None
+        if response.status_code in (429, 503):
+            retry_after = _retry_after(response)
+        failure = classify_status(response.status_code, self.redact(response.text[:200]), retry_after)
+        return DeliveryResult(False, response.status_code, failure.error, failure.retry_after, failure.kind)
+
+    def _accepted(self, response: requests.Response) -> bool:
+        """HTTP 2xx 之外的业务层成功判断"""
+        return True
+
+
+class TelegramNotifier(Notifier):
+    channel = 'telegram'
+
+    def breaker_key(self) -> str:
+        # 按 bot 区分 (token 冒号前是 bot id, 不是密钥)
+        return f"telegram:bot{str(self.target.get('bot_token', '')).split(':')[0]}"
+
+    def rate_limit_key(self) -> str:
+        # Telegram 按会话限流 (群组 20 条/分钟): 一个会话的 429 不影响同一 bot 的其他会话
+        return f"{self.breaker_key()}:chat{self.target.get('chat_id')}"
+
+    def send(self, message: str) -> DeliveryResult:
+        api_base = self.target.get('api_base', 'https://api.telegram.org')
+        return self._post(f"{api_base}/bot{self.target.get('bot_token')}/sendMessage", {
+            "chat_id": self.target.get('chat_id'),
+            "text": message,
+            "parse_mode": "HTML",
+            "disable_web_page_preview": True
+        })
+
+
+class WebhookNotifier(Notifier):
+    """通用 Webhook: POST {"text", "html", "source"}"""
+    channel = 'webhook'
+
+    def send(self, message: str) -> DeliveryResult:
+        return self._post(self.target.get('url'), {
+            "text": html_to_text(message),
+            "html": message,
+            "source": "ntx-binance-monitor"
+        }, headers=self.target.get('headers'))
+
+
+class DiscordNotifier(Notifier):
+    channel = 'discord'
+
+    def send(self, message: str) -> DeliveryResult:
+        # Discord 单条消息上限 2000 字符
+        return self._post(self.target.get('webhook_url'), {"content": html_to_markdown(message)[:2000]})
+
+
+class LarkNotifier(Notifier):
+    """飞书 / Lark 自定义机器人, 配置 secret 时附带签名"""
+    channel = 'lark'
+
+    def send(self, message: str) -> DeliveryResult:
+        payload = {"msg_type": "text", "content": {"text": html_to_text(message)}}
+        secret = self.target.get('secret')
+        if secret:
+            timestamp = str(int(time.time()))
+            string_to_sign = f"{timestamp}\n{secret}".encode('utf-8')
+            digest = hmac.new(string_to_sign, b'', digestmod=hashlib.sha256).digest()
+            payload["timestamp"] = timestamp
+            payload["sign"] = base64.b64encode(digest).decode('utf-8')
+        return self._post(self.target.get('webhook_url'), payload)
+
+    def _accepted(self, response: requests.Response) -> bool:
+        # 飞书出错时仍返回 200, 错误码在响应体里
+        try:
+            body = response.json()
+        except ValueError:
+            return True
+        return body.get('code', body.get('StatusCode', 0)) == 0
+
+
+NOTIFIERS = {
+    'telegram': TelegramNotifier,
+    'webhook': WebhookNotifier,
+    'discord': DiscordNotifier,
+    'lark': LarkNotifier,
+    'feishu': LarkNotifier,
+}
+
+_cache: Dict[str, Notifier] = {}
+_cache_lock = threading.Lock()
+
+
+def get_notifier(target: dict) -> Notifier:
+    """按目标配置取渠道实例 (配置不变则复用)"""
+    key = json.dumps(target, sort_keys=True, ensure_ascii=False)
+    with _cache_lock:
+        notifier = _cache.get(key)
+        if notifier is None:
+            channel = target.get('type', 'telegram')
+            if channel not in NOTIFIERS:
+                raise ValueError(f"未知的推送渠道: {channel}")
+            notifier = _cache[key] = NOTIFIERS[channel](target)
+        return notifier
+
+
+def notify_enabled(cfg: dict) -> bool:
+    """notify_method 为 none 时不推送, 否则推送到启用的目标 (任意渠道)"""
+    return str(cfg.get('notify_method', 'telegram')).lower() not in ('none', 'off', 'false', '')
+
+
+def active_channels(cfg: dict) -> List[str]:
+    """启用的推送目标用到的渠道 (状态页展示)"""
+    if not notify_enabled(cfg):
+        return []
+    channels = set()
+    for target in cfg.get('notify_targets', []):
+        if target.get('enabled', True):
+            channel = target.get('type', 'telegram')
+            channels.add(NOTIFIERS[channel].channel if channel in NOTIFIERS else channel)
+    return sorted(channels)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """429 / 503 时的等待秒数: Retry-After 头或 Telegram 的 parameters.retry_after"""
+    value = response.headers.get('Retry-After')
+    if value is None:
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        parameters = body.get('parameters') if isinstance(body, dict) else None
+        value = parameters.get('retry_after') if isinstance(parameters, dict) else None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
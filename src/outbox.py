@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+持久化通知发件箱 (Outbox)
+每条 (代币, 推送目标) 投递记为一行, 状态为 pending / sent / failed。
+监控循环只负责写入, 后台线程负责发送与重试; 进程重启后继续发送未完成的投递。
+每个目标一条发送通道 (lane) 并发推送, 同一目标内按顺序并保持发送间隔, 慢目标不拖累其他目标。
+
+幂等: 主键是 (来源, 代币标识, 目标) 的哈希, 同一投递重复写入会被忽略, 已发送的不会再发。
+投递是至少一次语义 (不丢消息): 请求已发出、还没记下 sent 时进程崩溃 (或多节点时主节点被杀),
+重启后 / 新主节点会把这条再发一次; 每个目标同一时刻只有一条在途, 所以每个目标最多重复一条。
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+
+from resilience import POLICIES, Failure, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    key TEXT PRIMARY KEY,
+    token_key TEXT NOT NULL,
+    target TEXT NOT NULL,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+class SendResult(NamedTuple):
+    """send 回调的结果 (也可以直接返回 bool)
+
+    kind: 失败类别, 决定是否重试与退避时间 (见 resilience.py), 为空时按默认指数退避
+    retry_after: 服务端 / 熔断器要求的等待秒数
+    attempted: False 表示没有真正发送 (如熔断中), 不计入重试次数
+    """
+    ok: bool
+    error: str = ''
+    kind: str = ''
+    retry_after: Optional[float] = None
+    attempted: bool = True
+
+
+# config.json 的 outbox 中可以覆盖的参数
+OPTIONS = ('max_attempts', 'base_backoff', 'max_backoff', 'send_interval', 'max_lanes')
+
+
+def options_from(cfg: dict) -> dict:
+    """config.json 的 outbox 配置 -> Outbox 参数 (忽略未知项)"""
+    section = cfg.get('outbox') or {}
+    return {key: section[key] for key in OPTIONS if key in section}
+
+
+def delivery_key(token_key: str, target: str) -> str:
+    """幂等键"""
+    return hashlib.sha1(f"{token_key}\x00{target}".encode('utf-8')).hexdigest()
+
+
+class Outbox:
+    """SQLite 发件箱 + 后台投递线程
+
+    send(target_name, message) -> SendResult | bool 由调用方提供 (按目标名查配置并发送);
+    on_sent(key) 在投递成功后回调 (用于记录延迟 trace);
+    already_sent(key) 发送前检查是否已由其他节点发出 (多节点主备), 是则直接标记 sent。
+    """
+
+    def __init__(self, path: str, send: Callable[[str, str], Union[SendResult, bool]],
+                 on_sent: Optional[Callable[[str], None]] = None,
+                 max_attempts: int = 8, base_backoff: float = 5, max_backoff: float = 600,
+                 send_interval: float = 2, retention: float = 7 * 86400, max_lanes: int = 16,
+                 already_sent: Optional[Callable[[str], bool]] = None):
+        self.path = path
+        self.send = send
+        self.on_sent = on_sent
+        self.already_sent = already_sent
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.send_interval = send_interval
+        self.retention = retention
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_lanes, thread_name_prefix='outbox')
+        self._busy = set()  # 正在发送的目标
+        self._thread: Optional[threading.Thread] = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    # ---------- 写入 ----------
+
+    def enqueue(self, token_key: str, targets: List[str], message: str) -> List[str]:
+        """为每个目标写入一条待投递记录, 返回幂等键 (已存在的记录保持不变)"""
+        now = time.time()
+        keys = [delivery_key(token_key, target) for target in targets]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO outbox (key, token_key, target, message, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, token_key, target, message, now, now) for key, target in zip(keys, targets)]
+            )
+        self._wake.set()
+        return keys
+
+    def adopt(self, rows: List[list]):
+        """接管其他节点未完成的投递 (pending_rows 的结果), 已存在的记录保持不变"""
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO outbox (key, token_key, target, message, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, token_key, target, message, created_at, time.time())
+                 for key, token_key, target, message, created_at in rows]
+            )
+        self._wake.set()
+
+    # ---------- 投递 ----------
+
+    def _due(self, limit: int = 100) -> List[tuple]:
+        """到期的投递, 跳过正在发送的目标"""
+        with self._lock:
+            busy = list(self._busy)
+            placeholders = ','.join('?' * len(busy))
+            return self._conn.execute(
+                "SELECT key, target, message, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? "
+                f"AND target NOT IN ({placeholders}) ORDER BY created_at LIMIT ?",
+                [time.time()] + busy + [limit]
+            ).fetchall()
+
+    def _mark_sent(self, key: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1 WHERE key = ?",
+                (time.time(), key)
+            )
+
+    def _mark_failed(self, key: str, attempts: int, result: SendResult):
+        error = result.error
+        if result.attempted:
+            attempts += 1
+        policy = POLICIES.get(result.kind)
+        if attempts >= self.max_attempts or (policy is not None and not policy.retry):
+            status, next_at = 'failed', time.time()
+        else:
+            status = 'pending'
+            if result.kind or result.retry_after is not None:
+                delay = backoff_delay(Failure(result.kind, retry_after=result.retry_after), max(attempts, 1))
+            else:
+                delay = self.base_backoff * 2 ** (attempts - 1)
+            next_at = time.time() + min(self.max_backoff, delay)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ? WHERE key = ?",
+                (status, attempts, error[:500], next_at, key)
+            )
+
+    def drain_once(self) -> int:
+        """按目标分组派发到期的投递, 返回派发条数"""
+        lanes: Dict[str, List[tuple]] = {}
+        for row in self._due():
+            lanes.setdefault(row[1], []).append(row)
+        for target, rows in lanes.items():
+            with self._lock:
+                self._busy.add(target)
+            self._pool.submit(self._send_lane, target, rows)
+        return sum(len(rows) for rows in lanes.values())
+
+    def _send_lane(self, target: str, rows: List[tuple]):
+        """顺序发送同一目标的一批投递"""
+        try:
+            for key, _, message, attempts in rows:
+                if self.already_sent and self.already_sent(key):
+                    self._mark_sent(key)
+                    continue
+                try:
+                    result = self.send(target, message)
+                    if not isinstance(result, SendResult):
+                        result = SendResult(bool(result), '' if result else 'send returned False')
+                except Exception as e:
+                    result = SendResult(False, str(e))
+                if result.ok:
+                    # 先回调 (多节点时写入后端的已投递记录) 再标记本地: 两步之间崩溃时,
+                    # 重启后由 already_sent 补记, 不会重发
+                    if self.on_sent:
+                        self.on_sent(key)
+                    self._mark_sent(key)
+                else:
+                    self._mark_failed(key, attempts, result)
+                if result.attempted:
+                    time.sleep(self.send_interval)  # 同一目标保持发送间隔, 避免 429 频率限制
+        finally:
+            with self._lock:
+                self._busy.discard(target)
+            self._wake.set()
+
+    def prune(self):
+        """清理超过保留期的已发送 / 已失败记录"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM outbox WHERE status IN ('sent', 'failed') AND created_at < ?",
+                (time.time() - self.retention,)
+            )
+
+    def run(self):
+        logger.info("通知发件箱已启动")
+        last_prune = 0.0
+        while True:
+            try:
+                self._wake.clear()
+                if not self.drain_once():
+                    self._wake.wait(1)
+                if time.time() - last_prune > 3600:
+                    self.prune()
+                    last_prune = time.time()
+            except Exception as e:
+                logger.error(f"发件箱投递异常: {e}")
+                time.sleep(5)
+
+    def start(self):
+        """启动后台投递线程 (已启动时忽略)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+
+    # ---------- 查询 ----------
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def pending_rows(self, limit: int = 10000) -> List[list]:
+        """未完成的投递 (key, token_key, target, message, created_at), 供其他节点接管"""
+        with self._lock:
+            return [list(row) for row in self._conn.execute(
+                "SELECT key, token_key, target, message, created_at FROM outbox WHERE status = 'pending' "
+                "ORDER BY created_at LIMIT ?", (limit,)
+            )]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def recent(self, status: Optional[str] = None, limit: int = 20) -> List[dict]:
+        query = "SELECT key, token_key, target, status, attempts, last_error, created_at, sent_at FROM outbox"
+        args: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, args + (limit,)).fetchall()
+        columns = ("key", "token_key", "target", "status", "attempts", "last_error", "created_at", "sent_at")
+        return [dict(zip(columns, row)) for row in rows]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+紧凑的代币记录
+用 __slots__ 代替 dict 保存代币, 链 / 代号 / ID 等重复出现的字符串做 intern,
+每轮轮询得到的新对象与上一轮共用同一份字符串。
+
+记录提供 get / [] / keys 等只读字典接口, 原来按 dict 访问代币的代码无需改动;
+序列化时按列存储 (字段名只写一次), 读写状态文件都比逐个 dict 便宜。
+"""
+
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_intern = sys.intern
+
+
+class TokenRecord:
+    """代币记录基类, 子类声明 FIELDS 与需要 intern 的字段
+
+    digest 缓存变更检测用的内容哈希 (见 changes.py), 不参与序列化
+    """
+    __slots__ = ('extra', 'digest')
+
+    FIELDS: Tuple[str, ...] = ()
+    INTERNED: frozenset = frozenset()
+
+    # ---------- 构造 ----------
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TokenRecord':
+        record = cls.__new__(cls)
+        interned = cls.INTERNED
+        for field in cls.FIELDS:
+            value = data.get(field)
+            if field in interned and type(value) is str:
+                value = _intern(value)
+            object.__setattr__(record, field, value)
+        # 不在 FIELDS 中的字段 (如 alpha_fields 配置了 "*") 放进 extra
+        extra = None
+        if len(data) > len(cls.FIELDS) or any(k not in cls._field_set for k in data):
+            extra = {k: v for k, v in data.items() if k not in cls._field_set} or None
+        record.extra = extra
+        record.digest = None
+        return record
+
+    @classmethod
+    def from_row(cls, row: list) -> 'TokenRecord':
+        """按列存储的一行 -> 记录 (最后一列是 extra)"""
+        record = cls.__new__(cls)
+        interned = cls.INTERNED
+        for field, value in zip(cls.FIELDS, row):
+            if field in interned and type(value) is str:
+                value = _intern(value)
+            object.__setattr__(record, field, value)
+        record.extra = row[len(cls.FIELDS)] if len(row) > len(cls.FIELDS) else None
+        record.digest = None
+        return record
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    # ---------- 只读字典接口 ----------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._field_set:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self) -> List[str]:
+        keys = [f for f in self.FIELDS if getattr(self, f) is not None]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TokenRecord):
+            return type(self) is type(other) and self.to_row() == other.to_row()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    # ---------- 序列化 ----------
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {f: getattr(self, f) for f in self.FIELDS if getattr(self, f) is not None}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_row(self) -> list:
+        return [getattr(self, f) for f in self.FIELDS] + [self.extra]
+
+
+_MISSING = object()
+
+
+class AlphaToken(TokenRecord):
+    """币安 Alpha 代币 (字段即默认的解析投影)"""
+    FIELDS = (
+        'alphaId', 'name', 'symbol', 'chainId', 'contractAddress',
+        'listingTime', 'onlineTime', 'marketCap', 'price',
+        'offline', 'offsell', 'listingCex'
+    )
+    INTERNED = frozenset({'alphaId', 'symbol', 'chainId'})
+    __slots__ = FIELDS
+
+
+class MemeToken(TokenRecord):
+    """Meme Rush 排行项"""
+    FIELDS = ('rank', 'chain', 'raw_text', 'html_preview', 'timestamp')
+    INTERNED = frozenset({'chain'})
+    __slots__ = FIELDS
+
+
+# =============== 状态文件 ===============
+
+def pack_records(records: Iterable[TokenRecord], cls: type) -> dict:
+    """记录列表 -> 按列存储 {"fields": [...], "rows": [[...], ...]}"""
+    return {"fields": list(cls.FIELDS), "rows": [r.to_row() for r in records]}
+
+
+def unpack_records(data, cls: type) -> List[TokenRecord]:
+    """状态文件中的 tokens -> 记录列表 (兼容旧版的 dict 列表)"""
+    if not data:
+        return []
+    if isinstance(data, dict):
+        if data.get('fields') == list(cls.FIELDS):
+            return [cls.from_row(row) for row in data.get('rows', [])]
+        # 字段定义变了, 按名字对齐
+        fields = data.get('fields', [])
+        records = []
+        for row in data.get('rows', []):
+            item = dict(zip(fields, row))
+            if len(row) > len(fields) and row[len(fields)]:
+                item.update(row[len(fields)])
+            records.append(cls.from_dict(item))
+        return records
+    return [cls.from_dict(item) for item in data]
+
+
+def to_jsonable(value: Any) -> Optional[dict]:
+    """json.dump(default=...) 用: 记录 -> dict"""
+    if isinstance(value, TokenRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
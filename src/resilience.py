@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+错误分类、重试策略与熔断器
+上游接口与推送渠道的失败先分类, 再按类别决定是否重试、等多久:
+
+    timeout     请求超时              重试, 5s 起指数退避
+    network     连接失败 / 断开        重试, 5s 起
+    server      5xx / 业务错误码       重试, 10s 起
+    rate_limit  429                   按 Retry-After 等待, 没有则 30s 起
+    parse       响应无法解析           重试, 30s 起
+    auth        401 / 403             不重试, 立即熔断
+    client      其他 4xx              重试, 60s 起 (消息内容等问题, 很快耗尽次数)
+
+退避带随机抖动 (在 [delay/2, delay] 之间取值), 避免多个目标同时重试。
+每个上游接口 / 推送凭据 (bot token、webhook) 一个熔断器: 连续失败达到阈值后打开,
+打开期间直接跳过, 不占用监控循环与推送通道的时间; 冷却后放行一个探测请求 (半开),
+成功则关闭, 失败则以加倍的冷却时间重新打开。
+"""
+
+import random
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+import requests
+
+TIMEOUT = 'timeout'
+NETWORK = 'network'
+SERVER = 'server'
+RATE_LIMIT = 'rate_limit'
+PARSE = 'parse'
+AUTH = 'auth'
+CLIENT = 'client'
+CIRCUIT_OPEN = 'circuit_open'
+
+
+class Failure(NamedTuple):
+    kind: str
+    error: str = ''
+    status: int = 0
+    retry_after: Optional[float] = None
+
+
+class RetryPolicy(NamedTuple):
+    retry: bool
+    base: float
+    cap: float
+
+
+POLICIES: Dict[str, RetryPolicy] = {
+    TIMEOUT: RetryPolicy(True, 5, 120),
+    NETWORK: RetryPolicy(True, 5, 120),
+    SERVER: RetryPolicy(True, 10, 300),
+    RATE_LIMIT: RetryPolicy(True, 30, 600),
+    PARSE: RetryPolicy(True, 30, 600),
+    AUTH: RetryPolicy(False, 300, 3600),
+    CLIENT: RetryPolicy(True, 60, 600),
+    CIRCUIT_OPEN: RetryPolicy(True, 5, 600),
+}
+
+
+class UpstreamError(Exception):
+    """带分类的失败"""
+
+    def __init__(self, failure: Failure):
+        super().__init__(failure.error or failure.kind)
+        self.failure = failure
+
+
+# =============== 分类 ===============
+
+def classify_status(status: int, error: str = '', retry_after: Optional[float] = None) -> Failure:
+    if status == 429:
+        return Failure(RATE_LIMIT, error, status, retry_after)
+    if status in (401, 403):
+        return Failure(AUTH, error, status)
+    if status >= 500:
+        return Failure(SERVER, error, status, retry_after)
+    return Failure(CLIENT, error, status)
+
+
+def retry_after_header(headers) -> Optional[float]:
+    """Retry-After 头 (秒数形式), 没有或无法解析返回 None"""
+    try:
+        value = float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+    return value if value >= 0 else None
+
+
+def classify_exception(e: BaseException) -> Failure:
+    if isinstance(e, UpstreamError):
+        return e.failure
+    if isinstance(e, requests.exceptions.Timeout):
+        return Failure(TIMEOUT, str(e))
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        return classify_status(e.response.status_code, str(e))
+    if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+        return Failure(NETWORK, str(e))
+    if isinstance(e, ValueError):
+        # json.JSONDecodeError 与流式解析的格式错误都是 ValueError
+        return Failure(PARSE, str(e))
+    if isinstance(e, TimeoutError):
+        return Failure(TIMEOUT, str(e))
+    return Failure(NETWORK, str(e))
+
+
+def backoff_delay(failure: Failure, attempt: int, policies: Dict[str, RetryPolicy] = POLICIES) -> float:
+    """第 attempt 次 (从 1 开始) 失败后的等待秒数"""
+    if failure.retry_after is not None:
+        # 服务端给出的等待时间只加少量抖动, 不提前
+        return failure.retry_after + random.uniform(0, min(1.0, failure.retry_after * 0.1))
+    policy = policies.get(failure.kind, policies[NETWORK])
+    delay = min(policy.cap, policy.base * 2 ** max(attempt - 1, 0))
+    return random.uniform(delay / 2, delay)
+
+
+class RetryTracker:
+    """单个调用方的连续失败计数, 给出下次重试前的等待时间"""
+
+    def __init__(self, policies: Dict[str, RetryPolicy] = POLICIES):
+        self.policies = policies
+        self.attempts = 0
+        self.last_failure: Optional[Failure] = None
+        self.next_delay = 0.0
+
+    def failure(self, failure: Failure) -> float:
+        self.attempts += 1
+        self.last_failure = failure
+        self.next_delay = backoff_delay(failure, self.attempts, self.policies)
+        return self.next_delay
+
+    def success(self):
+        self.attempts = 0
+        self.last_failure = None
+        self.next_delay = 0.0
+
+
+# =============== 熔断器 ===============
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """连续失败 failure_threshold 次后打开, 冷却 reset_timeout 秒 (再次打开时加倍, 最长 max_reset)"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30,
+                 max_reset: float = 600):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset = max_reset
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_until = 0.0
+        self.last_failure: Optional[Failure] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """是否可以发请求 (不占用半开探测名额, 用于排序)"""
+        with self._lock:
+            return self.state == CLOSED or (not self._probing and time.time() >= self.opened_until)
+
+    def allow(self) -> bool:
+        """发请求前调用; 冷却结束后只放行一个探测请求"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self._probing or time.time() < self.opened_until:
+                return False
+            self.state = HALF_OPEN
+            self._probing = True
+            return True
+
+    def retry_in(self) -> float:
+        """距离可以再次请求的秒数"""
+        with self._lock:
+            if self.state == CLOSED:
+                return 0.0
+            return max(0.0, self.opened_until - time.time())
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.trips = 0
+            self._probing = False
+
+    def record_failure(self, failure: Failure):
+        with self._lock:
+            self.last_failure = failure
+            self._probing = False
+            if failure.kind == CLIENT:
+                # 请求本身的问题 (如消息内容), 不代表目标不可用
+                if self.state == HALF_OPEN:
+                    self.state = CLOSED
+                return
+            self.failures += 1
+            if failure.kind == RATE_LIMIT and failure.retry_after:
+                # 限流: 按服务端要求的时间暂停, 不加倍
+                self._open(failure.retry_after, escalate=False)
+            elif failure.kind == AUTH or self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open(self.reset_timeout * 2 ** self.trips, escalate=True)
+
+    def _open(self, duration: float, escalate: bool):
+        duration = min(duration, self.max_reset)
+        self.state = OPEN
+        self.opened_until = max(self.opened_until, time.time() + duration)
+        if escalate:
+            self.trips += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "trips": self.trips,
+                "retry_in": round(max(0.0, self.opened_until - time.time()), 1) if self.state != CLOSED else 0,
+                "last_failure": self.last_failure._asdict() if self.last_failure else None,
+            }
+
+
+class BreakerRegistry:
+    """按名字 (接口 URL / 推送凭据) 管理熔断器"""
+
+    def __init__(self, **options):
+        self.options = options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, **self.options)
+            return breaker
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            items = list(self._breakers.items())
+        return {name: breaker.snapshot() for name, breaker in items}
+
+    def degraded(self) -> bool:
+        """是否有未关闭的熔断器 (其 retry_in 随时间变化)"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return any(breaker.state != CLOSED for breaker in breakers)
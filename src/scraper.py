@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程外的 Selenium 抓取
+每个抓取进程独占一个 Chrome, 与主进程通过 stdin / stdout 上的 JSON Lines 收发任务与结果;
+Web 服务与监控循环不再和 WebDriver 共用 GIL 与内存, 卡死 / 崩溃的 Chrome 只影响它自己的进程:
+
+    - 并发上限: workers 个抓取进程, 任务在主进程的有界队列 (max_pending) 中排队, 满了直接拒绝
+    - 单任务硬超时: job_timeout 秒没有结果就杀掉整个进程组 (含 chromedriver / Chrome)
+    - 自动重启: 进程退出、超时被杀或启动失败后按退避重新启动; 每处理 recycle_after 个任务主动换新, 限制 Chrome 内存增长
+    - 主进程退出后抓取进程自行结束, 不留孤儿 Chrome
+
+抓取进程由本文件以 --worker 启动 (只导入本模块, 不加载 Flask 应用):
+
+    python3 src/scraper.py --worker --url <预热页面> [--no-headless] [--logs-dir logs]
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+from metrics import process_tree_rss
+
+logger = logging.getLogger(__name__)
+
+# 排行项的选择器 (需要根据实际页面结构调整)
+ROW_SELECTOR = "tr[data-token], .token-row, [class*='rank-item']"
+# 页面渲染完成的判断: 排行项或表格行中出现文本
+RENDERED_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0])).some(el => el.innerText.trim().length > 0);
+"""
+
+# config.json 的 scraper 中可以覆盖的参数
+OPTIONS = ('workers', 'job_timeout', 'start_timeout', 'max_pending', 'recycle_after')
+
+
+def options_from(cfg: dict) -> dict:
+    """config.json 的 scraper 配置 -> ScraperPool 参数 (忽略未知项)"""
+    section = cfg.get('scraper') or {}
+    return {key: section[key] for key in OPTIONS if key in section}
+
+
+class ScraperError(Exception):
+    """抓取失败 (超时 / 进程崩溃 / 队列已满 / 页面错误)"""
+
+
+# =============== 抓取进程 ===============
+
+def create_driver(headless: bool = True):
+    """启动 Chrome (selenium 只在抓取进程中导入)"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    options = Options()
+    if headless:
+        options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)')
+
+    service = Service(ChromeDriverManager().install())
+    return webdriver.Chrome(service=service, options=options)
+
+
+def scrape_rank(driver, url: str, chain: str, logs_dir: Optional[str] = None) -> List[dict]:
+    """打开排行榜页面并解析排行项 (最多 50 个)"""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    logger.info(f"访问页面: {url}")
+    driver.get(url)
+
+    # 等待排行榜渲染出内容 (最多 20 秒), 不再固定等待
+    try:
+        WebDriverWait(driver, 20, poll_frequency=0.25).until(
+            lambda d: d.execute_script(RENDERED_SCRIPT, f"{ROW_SELECTOR}, table tbody tr"))
+    except TimeoutException:
+        logger.warning("排行榜 20 秒内未渲染出内容, 按当前页面解析")
+
+    tokens = []
+
+    # 方案1: 尝试获取表格行
+    try:
+        rows = driver.find_elements(By.CSS_SELECTOR, ROW_SELECTOR)
+        logger.info(f"找到 {len(rows)} 个排行项")
+
+        for i, row in enumerate(rows[:50]):  # 只取前50
+            try:
+                text = row.text
+                if text:
+                    tokens.append({
+                        "rank": i + 1,
+                        "chain": chain,
+                        "raw_text": text,
+                        "timestamp": datetime.now(timezone.utc).isoformat()
+                    })
+            except Exception:
+                continue
+
+    except Exception as e:
+        logger.warning(f"方案1失败: {e}")
+
+    # 方案2: 如果方案1失败,获取整个页面文本分析
+    if not tokens:
+        try:
+            if logs_dir:
+                # 保存页面源码用于调试
+                with open(os.path.join(logs_dir, 'page_source.html'), 'w', encoding='utf-8') as f:
+                    f.write(driver.page_source)
+                logger.info("已保存页面源码到 logs/page_source.html")
+
+            script = """
+            return Array.from(document.querySelectorAll('table tbody tr, [class*="rank"], [class*="token-item"]'))
+                .slice(0, 50)
+                .map((el, i) => ({
+                    rank: i + 1,
+                    text: el.innerText,
+                    html: el.outerHTML.substring(0, 200)
+                }));
+            """
+            for item in driver.execute_script(script):
+                if item.get('text'):
+                    tokens.append({
+                        "rank": item['rank'],
+                        "chain": chain,
+                        "raw_text": item['text'],
+                        "html_preview": item.get('html', ''),
+                        "timestamp": datetime.now(timezone.utc).isoformat()
+                    })
+
+            logger.info(f"方案2找到 {len(tokens)} 个代币")
+
+        except Exception as e:
+            logger.error(f"方案2失败: {e}")
+
+    return tokens
+
+
+class _PipeHandler(logging.Handler):
+    """抓取进程的日志作为消息发给主进程, 由主进程写入统一的日志文件"""
+
+    def __init__(self, emit: Callable[[dict], None]):
+        super().__init__()
+        self._emit = emit
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self._emit({"type": "log", "level": record.levelno, "msg": record.getMessage()})
+        except Exception:
+            pass
+
+
+def _watch_parent(parent: int):
+    """主进程退出 (被 kill -9 等) 后结束本进程组, 连同 Chrome"""
+    while os.getppid() == parent:
+        time.sleep(1)
+    os.killpg(0, signal.SIGKILL)
+
+
+def worker_main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Selenium 抓取进程 (由 ScraperPool 启动)')
+    parser.add_argument('--worker', action='store_true')
+    parser.add_argument('--url', help='启动后预先打开的页面')
+    parser.add_argument('--no-headless', dest='headless', action='store_false')
+    parser.add_argument('--logs-dir')
+    args = parser.parse_args(argv)
+
+    # 协议独占原来的 stdout; selenium / webdriver_manager 的打印输出转到 stderr
+    out = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    os.dup2(2, 1)
+    write_lock = threading.Lock()
+
+    def emit(message: dict):
+        with write_lock:
+            out.write(json.dumps(message, ensure_ascii=False) + '\n')
+            out.flush()
+
+    root = logging.getLogger()
+    root.handlers[:] = [_PipeHandler(emit)]
+    root.setLevel(logging.INFO)
+    threading.Thread(target=_watch_parent, args=(os.getppid(),), daemon=True).start()
+
+    try:
+        driver = create_driver(args.headless)
+    except Exception as e:
+        emit({"type": "failed", "error": f"WebDriver 初始化失败: {e}"})
+        return 1
+    try:
+        if args.url:
+            try:
+                driver.get(args.url)
+            except Exception as e:
+                logger.warning(f"预热页面失败: {e}")
+        emit({"type": "ready"})
+
+        # stdin 关闭 (主进程退出) 或收到 stop 时结束
+        for line in iter(sys.stdin.readline, ''):
+            job = json.loads(line)
+            if job.get('type') == 'stop':
+                break
+            start = time.monotonic()
+            try:
+                tokens = scrape_rank(driver, job['url'], job['chain'], args.logs_dir)
+                emit({"type": "result", "id": job['id'], "tokens": tokens,
+                      "seconds": round(time.monotonic() - start, 3)})
+            except Exception as e:
+                emit({"type": "result", "id": job['id'], "error": f"抓取失败: {e}"})
+    finally:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    return 0
+
+
+# =============== 主进程: 抓取进程池 ===============
+
+class _Job:
+    __slots__ = ('payload', 'done', 'result', 'error', 'abandoned')
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.done = threading.Event()
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.abandoned = False  # 提交方已不再等待 (还在排队的直接跳过)
+
+    def finish(self, result: Optional[dict] = None, error: Optional[str] = None):
+        self.result, self.error = result, error
+        self.done.set()
+
+
+class _Worker:
+    """一个抓取进程及其监督线程的状态"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = 'stopped'  # starting / idle / busy / stopped
+        self.process: Optional[subprocess.Popen] = None
+        self.messages: 'queue.Queue[Optional[dict]]' = queue.Queue()
+        self.jobs = 0           # 本进程已处理的任务
+        self.total_jobs = 0
+        self.restarts = 0
+        self.started = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "pid": self.process.pid if self.process and self.state != 'stopped' else None,
+            "state": self.state,
+            "jobs": self.total_jobs,
+            "restarts": self.restarts,
+            "uptime": round(time.time() - self.started, 1) if self.state != 'stopped' else None
+        }
+
+
+class ScraperPool:
+    """监督 workers 个抓取进程
+
+    command: 返回抓取进程命令行的函数 (每次启动时调用, 可读取最新配置)
+    on_ready: 第一个抓取进程就绪时回调一次
+    """
+
+    def __init__(self, command: Callable[[], List[str]], workers: int = 1, job_timeout: float = 60,
+                 start_timeout: float = 180, max_pending: int = 4, recycle_after: int = 200,
+                 on_ready: Optional[Callable[[], None]] = None):
+        self.command = command
+        self.job_timeout = job_timeout
+        self.start_timeout = start_timeout
+        self.recycle_after = recycle_after
+        self.on_ready = on_ready
+        self._workers = [_Worker(f"scraper-{i + 1}") for i in range(max(1, workers))]
+        self._queue: 'queue.Queue[_Job]' = queue.Queue(maxsize=max(1, max_pending))
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._ready_once = False
+        self.timeouts = 0
+        self.crashes = 0
+
+    # ---------- 对外接口 ----------
+
+    def start(self):
+        """启动监督线程 (重复调用不会启动多次)"""
+        with self._cond:
+            if self._threads:
+                return
+            self._stopped.clear()
+            for worker in self._workers:
+                thread = threading.Thread(target=self._supervise, args=(worker,), daemon=True, name=worker.name)
+                self._threads.append(thread)
+                thread.start()
+
+    def stop(self, timeout: float = 10):
+        """停止全部抓取进程 (空闲的请求其关闭 Chrome 后退出, 仍在抓取 / 启动中的杀掉进程组)"""
+        self._stopped.set()
+        with self._cond:
+            threads, self._threads = self._threads, []
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout + 2
+        for thread in threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        for worker in self._workers:
+            self._retire(worker)
+
+    @property
+    def ready(self) -> bool:
+        """是否有已就绪的抓取进程"""
+        return any(w.state in ('idle', 'busy') for w in self._workers)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.ready or self._stopped.is_set(), timeout) and self.ready
+
+    def submit(self, payload: dict, timeout: Optional[float] = None) -> dict:
+        """提交一个抓取任务并等待结果; 失败时抛出 ScraperError
+
+        timeout 为排队 + 执行的总等待时间, 缺省为 job_timeout + start_timeout (覆盖一次进程重启)
+        """
+        job = _Job({**payload, "id": next(self._ids)})
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise ScraperError(f"抓取队列已满 ({self._queue.maxsize} 个任务排队)")
+        if not job.done.wait(self.job_timeout + self.start_timeout if timeout is None else timeout):
+            job.abandoned = True
+            raise ScraperError("等待抓取结果超时")
+        if job.error:
+            raise ScraperError(job.error)
+        return job.result
+
+    def rss(self) -> int:
+        """全部抓取进程 (含 chromedriver / Chrome) 的常驻内存"""
+        return sum(process_tree_rss(w.process.pid) for w in self._workers
+                   if w.process and w.process.poll() is None)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "workers": [w.snapshot() for w in self._workers],
+            "pending": self._queue.qsize(),
+            "max_pending": self._queue.maxsize,
+            "job_timeout": self.job_timeout,
+            "timeouts": self.timeouts,
+            "crashes": self.crashes
+        }
+
+    # ---------- 监督线程 ----------
+
+    def _set_state(self, worker: _Worker, state: str):
+        with self._cond:
+            worker.state = state
+            self._cond.notify_all()
+
+    def _supervise(self, worker: _Worker):
+        delay = 5
+        while not self._stopped.is_set():
+            started = self._spawn(worker)
+            healthy = started and self._serve(worker)
+            self._retire(worker, 10 if healthy else 0)
+            if self._stopped.is_set():
+                break
+            worker.restarts += 1
+            if started:
+                delay = 5
+            else:
+                logger.warning(f"{worker.name} 启动失败, {delay}s 后重试")
+                self._stopped.wait(delay)
+                delay = min(delay * 2, 300)
+
+    def _spawn(self, worker: _Worker) -> bool:
+        """启动抓取进程并等待其就绪"""
+        self._set_state(worker, 'starting')
+        worker.messages = queue.Queue()
+        worker.jobs = 0
+        worker.started = time.time()
+        try:
+            # 独立进程组: 超时时连同 chromedriver / Chrome 一起杀掉
+            worker.process = subprocess.Popen(
+                self.command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                encoding='utf-8', bufsize=1, start_new_session=True)
+        except OSError as e:
+            logger.error(f"{worker.name} 无法启动: {e}")
+            return False
+        threading.Thread(target=self._read, args=(worker, worker.process, worker.messages), daemon=True,
+                         name=f"{worker.name}-reader").start()
+
+        message = self._next(worker, time.monotonic() + self.start_timeout)
+        if not message or message.get('type') != 'ready':
+            error = message.get('error') if message else f"{self.start_timeout}s 内未就绪"
+            logger.error(f"{worker.name} (pid={worker.process.pid}) 启动失败: {error}")
+            return False
+        logger.info(f"✓ {worker.name} 已就绪 (pid={worker.process.pid}, {time.time() - worker.started:.1f}s)")
+        self._set_state(worker, 'idle')
+        if not self._ready_once:
+            self._ready_once = True
+            if self.on_ready:
+                self.on_ready()
+        return True
+
+    def _serve(self, worker: _Worker) -> bool:
+        """逐个执行队列中的任务; 需要换新 / 停止时返回 True, 进程退出或超时 (需要杀掉) 时返回 False"""
+        while not self._stopped.is_set():
+            try:
+                job = self._queue.get(timeout=1)
+            except queue.Empty:
+                if worker.process.poll() is not None:
+                    self.crashes += 1
+                    logger.error(f"{worker.name} (pid={worker.process.pid}) 意外退出 ({worker.process.returncode})")
+                    return False
+                continue
+            if job.abandoned:
+                continue
+
+            self._set_state(worker, 'busy')
+            try:
+                worker.process.stdin.write(json.dumps(job.payload, ensure_ascii=False) + '\n')
+                worker.process.stdin.flush()
+            except (OSError, ValueError):
+                job.finish(error=f"{worker.name} 已退出")
+                self.crashes += 1
+                return False
+
+            deadline = time.monotonic() + self.job_timeout
+            while True:
+                message = self._next(worker, deadline)
+                if message is None or message.get('type') == 'eof':
+                    break
+                if message.get('type') == 'result' and message.get('id') == job.payload['id']:
+                    break
+            if message is None:
+                self.timeouts += 1
+                logger.error(f"{worker.name} (pid={worker.process.pid}) 抓取超过 {self.job_timeout}s, 终止进程")
+                job.finish(error=f"抓取超过 {self.job_timeout}s, 已终止抓取进程")
+                return False
+            if message.get('type') == 'eof':
+                self.crashes += 1
+                logger.error(f"{worker.name} (pid={worker.process.pid}) 抓取中退出")
+                job.finish(error=f"抓取进程退出 ({worker.process.poll()})")
+                return False
+
+            job.finish(result=message, error=message.get('error'))
+            worker.jobs += 1
+            worker.total_jobs += 1
+            self._set_state(worker, 'idle')
+            if self.recycle_after and worker.jobs >= self.recycle_after:
+                logger.info(f"{worker.name} 已处理 {worker.jobs} 个任务, 换新进程")
+                return True
+        return True
+
+    def _next(self, worker: _Worker, deadline: float) -> Optional[dict]:
+        """下一条非日志消息; 超过 deadline 返回 None
+
+        进程退出时返回 eof (Chrome 等子进程可能继承了管道, 不能只靠读到文件结尾判断)
+        """
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                return worker.messages.get(timeout=min(remaining, 1))
+            except queue.Empty:
+                if worker.process.poll() is not None:
+                    return {"type": "eof"}
+
+    @staticmethod
+    def _read(worker: _Worker, process: subprocess.Popen, messages: queue.Queue):
+        """读取抓取进程的输出: 日志直接写入本进程日志, 其余交给监督线程"""
+        prefix = f"[{worker.name} pid={process.pid}]"
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                logger.debug(f"{prefix} {line.rstrip()}")
+                continue
+            if message.get('type') == 'log':
+                logger.log(message.get('level', logging.INFO), f"{prefix} {message.get('msg')}")
+            else:
+                messages.put(message)
+        messages.put({"type": "eof"})
+
+    def _retire(self, worker: _Worker, timeout: float = 0):
+        """结束抓取进程: timeout > 0 时先请求其自行退出 (关闭 Chrome); 最后杀掉进程组中残留的进程"""
+        process = worker.process
+        self._set_state(worker, 'stopped')
+        if process is None:
+            return
+        if timeout > 0 and process.poll() is None:
+            try:
+                process.stdin.write(json.dumps({"type": "stop"}) + '\n')
+                process.stdin.flush()
+                process.wait(timeout)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                pass
+        # 进程本身已退出时, 它启动的 chromedriver / Chrome 仍可能留在进程组里
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        process.wait()
+        for pipe in (process.stdin, process.stdout):
+            try:
+                pipe.close()
+            except (OSError, ValueError):
+                pass
+
+
+if __name__ == "__main__":
+    sys.exit(worker_main())
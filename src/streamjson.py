@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式 JSON 解析
+边下载边解析形如 {"code": "...", "data": [{...}, {...}]} 的响应:
+逐个解出 data 数组中的元素并只保留需要的字段, 不在内存中构造整个响应。
+顶层的其他键 (code / message 等) 放在 meta 中, 先后顺序不限。
+"""
+
+import codecs
+import json
+import re
+from typing import Iterable, Iterator, Optional, Sequence
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class ArrayStream:
+    """遍历顶层对象中 key 对应数组的元素
+
+    chunks: 字节块迭代器 (如 response.iter_content())
+    fields: 只保留的字段, None 表示保留全部
+    """
+
+    def __init__(self, chunks: Iterable[bytes], key: str = 'data', fields: Optional[Sequence[str]] = None):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._scan = json.JSONDecoder().scan_once
+        self.key = key
+        self.fields = tuple(fields) if fields else None
+        self.meta = {}
+        self.bytes_read = 0
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    # ---------- 缓冲区 ----------
+
+    def _more(self) -> bool:
+        """再读一块, 没有更多数据时返回 False"""
+        if self._eof:
+            return False
+        # 丢弃已消费的部分, 缓冲区只保留当前元素附近的数据
+        if self._pos > 65536:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self.bytes_read += len(chunk)
+            self._buf += self._decoder.decode(chunk)
+            return True
+        self._buf += self._decoder.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        """跳过空白, 返回下一个字符 (数据结束返回 '')"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._more():
+                return ''
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise ValueError(f"JSON 格式错误: 位置 {self.bytes_read} 处应为 {char!r}")
+        self._pos += 1
+
+    def _value(self):
+        """解出一个完整的值; 数据不够时继续读取"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._scan(self._buf, self._pos)
+                # 数字等值可能被截断在块边界, 后面必须还有字符才算完整
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except (StopIteration, json.JSONDecodeError):
+                if self._eof:
+                    raise ValueError(f"JSON 格式错误: 位置 {self.bytes_read} 处数据不完整")
+            self._more()
+
+    # ---------- 遍历 ----------
+
+    def __iter__(self) -> Iterator[dict]:
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            name = self._value()
+            self._expect(':')
+            if name == self.key and self._peek() == '[':
+                self._pos += 1
+                yield from self._items()
+            else:
+                self.meta[name] = self._value()
+            char = self._peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"JSON 格式错误: 位置 {self.bytes_read} 处应为 ',' 或 '}}'")
+
+    def _items(self) -> Iterator[dict]:
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        fields = self.fields
+        while True:
+            item = self._value()
+            if fields is not None and isinstance(item, dict):
+                item = {f: item[f] for f in fields if f in item}
+            yield item
+            char = self._peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"JSON 格式错误: 位置 {self.bytes_read} 处应为 ',' 或 ']'")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+新币发现延迟追踪
+每个新发现的代币带一份 trace, 记录各阶段时间戳 (Unix 秒):
+
+    listed_at    上游给出的上线时间 (如果有)
+    fetch_start  本轮抓取开始
+    fetch_end    本轮抓取结束
+    detected     比对出新币
+    enriched     信息补充完成 (启用时)
+    enqueued     通知消息进入发送队列
+    acks         各推送目标的 Telegram 确认时间 {目标名: 时间}
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+# 上游可能携带的上线时间字段 (毫秒或秒)
+LISTING_TIME_FIELDS = ('listingTime', 'onlineTime', 'launchTime', 'createTime')
+
+# 统计的阶段: (名称, 起点, 终点)
+STAGES = (
+    ('fetch', 'fetch_start', 'fetch_end'),
+    ('detect', 'fetch_end', 'detected'),
+    ('enrich', 'detected', 'enriched'),
+    ('enqueue', 'detected', 'enqueued'),
+    ('deliver', 'enqueued', 'first_ack'),
+    ('end_to_end', 'fetch_start', 'first_ack'),
+    ('since_listing', 'listed_at', 'first_ack'),
+)
+
+
+def listing_time(token: dict) -> Optional[float]:
+    """从上游数据中取上线时间"""
+    for field in LISTING_TIME_FIELDS:
+        value = token.get(field)
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            return value / 1000 if value > 1e12 else value
+    return None
+
+
+def new_trace(token: dict, fetch_start: float, fetch_end: float) -> dict:
+    """为新发现的代币创建 trace"""
+    return {
+        "listed_at": listing_time(token),
+        "fetch_start": fetch_start,
+        "fetch_end": fetch_end,
+        "detected": time.time(),
+        "enqueued": None,
+        "acks": {}
+    }
+
+
+def mark(trace: Optional[dict], stage: str):
+    """记录阶段时间"""
+    if trace is not None:
+        trace[stage] = time.time()
+
+
+def ack(trace: Optional[dict], target: str):
+    """记录某个推送目标的确认时间"""
+    if trace is not None:
+        trace["acks"][target] = time.time()
+
+
+def stage_durations(trace: dict) -> Dict[str, float]:
+    """trace -> 各阶段耗时 (秒), 缺失的阶段跳过"""
+    points = dict(trace)
+    acks = trace.get("acks") or {}
+    points["first_ack"] = min(acks.values()) if acks else None
+    durations = {}
+    for name, start, end in STAGES:
+        if points.get(start) is not None and points.get(end) is not None:
+            durations[name] = points[end] - points[start]
+    for target, at in acks.items():
+        if trace.get("enqueued") is not None:
+            durations[f"ack:{target}"] = at - trace["enqueued"]
+    return durations
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩百分位, sorted_values 需已排序"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(rank, 1)) - 1]
+
+
+class LatencyTracker:
+    """保留最近 N 个 trace, 按阶段给出百分位 (version 在记录 / 恢复时递增)"""
+
+    def __init__(self, capacity: int = 500):
+        self._traces = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def record(self, key: str, trace: dict):
+        with self._lock:
+            self._traces.append({"token": key, **trace})
+            self.version += 1
+
+    def load(self, traces: List[dict]):
+        """从持久化状态恢复"""
+        with self._lock:
+            self._traces.clear()
+            self._traces.extend(traces or [])
+            self.version += 1
+
+    def recent(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            return list(self._traces)[-limit:]
+
+    def summary(self) -> Dict[str, dict]:
+        """{阶段: {count, p50, p90, p99, max}}"""
+        with self._lock:
+            traces = list(self._traces)
+        samples: Dict[str, List[float]] = {}
+        for trace in traces:
+            for name, value in stage_durations(trace).items():
+                samples.setdefault(name, []).append(value)
+        result = {}
+        for name, values in samples.items():
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 3),
+                "p90": round(percentile(values, 90), 3),
+                "p99": round(percentile(values, 99), 3),
+                "max": round(values[-1], 3)
+            }
+        return result
+
+
+# =============== 启动耗时 ===============
+
+_IMPORTED_AT = time.time()
+
+
+def process_start_time() -> float:
+    """本进程的启动时间 (Unix 秒); 读不到 /proc 时退回到本模块导入的时间"""
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            # 进程名可能含空格, 从最后一个 ')' 之后取字段; starttime 是第 22 个字段 (开机后的时钟滴答数)
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/stat', 'r') as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith('btime'))
+        return boot_time + int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, StopIteration):
+        return _IMPORTED_AT
+
+
+class StartupTimer:
+    """进程启动到各阶段的耗时, 每个阶段只记录第一次
+
+    snapshot       载入上次的状态, Web 可以提供数据
+    first_request  第一个 HTTP 请求
+    browser        浏览器启动并预热完成 (Meme)
+    first_poll     第一轮轮询成功
+    """
+
+    def __init__(self, on_mark: Callable[[str, float], None] = None):
+        self.started_at = process_start_time()
+        self.phases: Dict[str, float] = {}
+        self.on_mark = on_mark
+
+    def mark(self, phase: str) -> Optional[float]:
+        """记录阶段耗时 (秒), 已记录过的阶段返回 None"""
+        if phase in self.phases:
+            return None
+        elapsed = round(time.time() - self.started_at, 3)
+        self.phases.setdefault(phase, elapsed)
+        if self.on_mark:
+            self.on_mark(phase, elapsed)
+        return elapsed
+
+    def snapshot(self) -> dict:
+        return {"started_at": self.started_at, "phases": dict(self.phases)}
+
+    def describe(self) -> str:
+        return ', '.join(f"{phase} {seconds:.1f}s" for phase, seconds in self.phases.items())
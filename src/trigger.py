@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+"立即检查" 触发器
+/api/check_now 不再自己抓取, 而是唤醒监控循环提前开始下一轮并等待这一轮的结果:
+同一时刻的多次点击合并为一次抓取, 抓到的结果正常比对、推送与持久化
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CheckTrigger:
+    """唤醒监控循环的等待, 请求方等待覆盖其请求的那一轮完成
+
+    请求用递增的纳秒时间戳标识, 同时写入 path: 监控循环在其他进程 (gunicorn worker / sidecar)
+    时, 等待期间每 poll_interval 秒检查一次该文件。一轮开始时 begin() 取走已到达的全部请求,
+    完成后 complete(seq, result); 其他进程从共享状态里的 check_seq 得知完成。
+    本进程的一轮正在进行时, 新的请求直接等这一轮 (single-flight), 不再触发下一轮。
+    """
+
+    def __init__(self, path: str, poll_interval: float = 1):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._requested = 0
+        self._served = self._read()  # 上次运行遗留的请求不再触发
+        self._running: Optional[int] = None
+        self._result: Optional[dict] = None
+
+    def _read(self) -> int:
+        try:
+            with open(self.path, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _pending(self) -> int:
+        """本进程与其他进程的最新请求"""
+        return max(self._requested, self._read())
+
+    def request(self) -> int:
+        """请求立即检查, 返回请求号 (供 wait)"""
+        with self._cond:
+            if self._running is not None:
+                return self._running
+            seq = self._requested = max(time.time_ns(), self._requested + 1, self._served + 1)
+            self._cond.notify_all()
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(str(seq))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"写入检查请求失败: {e}")
+        return seq
+
+    def sleep(self, seconds: float) -> bool:
+        """等待下次检查; 期间 (或上一轮进行中) 有新请求时提前返回 True"""
+        deadline = time.monotonic() + seconds
+        with self._cond:
+            while self._pending() <= self._served:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, self.poll_interval))
+            return True
+
+    def begin(self) -> int:
+        """一轮开始: 返回这一轮的请求号 (不小于已到达的请求)"""
+        with self._cond:
+            self._running = max(self._pending(), self._served + 1)
+            return self._running
+
+    def complete(self, seq: int, result: dict):
+        """一轮完成 (或跟随者载入了该轮的共享状态), 唤醒请求号不大于 seq 的请求方"""
+        with self._cond:
+            if seq >= self._served:
+                self._served = seq
+                self._result = result
+            if self._running is not None and seq >= self._running:
+                self._running = None
+            self._cond.notify_all()
+
+    def wait(self, seq: int, timeout: float) -> Optional[dict]:
+        """等待覆盖 seq 的一轮完成, 返回其结果; 超时返回 None"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._served < seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._result
@@ -44,7 +44,10 @@ echo ""
 # 方式1: 前台运行(可以看到日志)
 python3 src/app.py
 
-# 方式2: 后台运行(取消注释以使用)
+# 方式2: 生产模式, 多 worker (取消注释以使用)
+# gunicorn -c gunicorn.conf.py app:app
+
+# 方式3: 后台运行(取消注释以使用)
 # nohup python3 src/app.py > logs/app.log 2>&1 &
 # echo -e "${GREEN}✓ 服务已在后台启动${NC}"
 # echo -e "${BLUE}📊 Web UI: http://localhost:5002${NC}"
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内容哈希变更检测: 新增 / 下架 / 关注字段变化, 非关注字段与未变化的代币不产生事件
+
+    python3 -m pytest tests/
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from changes import ChangeDetector, ChangeSet, describe  # noqa: E402
+from records import AlphaToken  # noqa: E402
+
+FIELDS = ('name', 'symbol', 'offline')
+
+
+def token(alpha_id: str, **fields) -> dict:
+    return {"alphaId": alpha_id, "name": f"Token {alpha_id}", "symbol": alpha_id, "offline": False,
+            "price": 1.0, **fields}
+
+
+def detector() -> ChangeDetector:
+    return ChangeDetector(key=lambda t: t.get('alphaId'), fields=FIELDS)
+
+
+def test_added_removed_modified():
+    previous = [token('A'), token('B'), token('C')]
+    current = [token('A'), token('C', offline=True), token('D')]
+    changes = detector().diff(previous, current)
+    assert [t['alphaId'] for t in changes.added] == ['D']
+    assert [t['alphaId'] for t in changes.removed] == ['B']
+    assert changes.modified == [(current[1], {"offline": {"old": False, "new": True}})]
+
+
+def test_unwatched_field_is_ignored():
+    changes = detector().diff([token('A')], [token('A', price=99.0)])
+    assert not changes
+    assert changes == ChangeSet([], [], [])
+
+
+def test_identical_lists_produce_nothing():
+    tokens = [token(str(i)) for i in range(100)]
+    assert not detector().diff(tokens, [dict(t) for t in tokens])
+
+
+def test_unhashable_values_are_compared():
+    d = ChangeDetector(key=lambda t: t['alphaId'], fields=('tags', 'meta'))
+    old = {"alphaId": "A", "tags": ["x"], "meta": {"k": 1}}
+    same = {"alphaId": "A", "tags": ["x"], "meta": {"k": 1}}
+    new = {"alphaId": "A", "tags": ["x", "y"], "meta": {"k": 1}}
+    assert not d.diff([old], [same])
+    assert d.diff([old], [new]).modified == [(new, {"tags": {"old": ["x"], "new": ["x", "y"]}})]
+
+
+def test_record_digest_is_cached():
+    d = detector()
+    record = AlphaToken.from_dict(token('A'))
+    assert record.digest is None
+    value = d.digest(record)
+    assert record.digest == value
+    # 缓存后不再重新计算: 直接修改字段不会改变缓存的哈希
+    record.name = 'renamed'
+    assert d.digest(record) == value
+
+
+def test_records_detect_field_changes():
+    previous = [AlphaToken.from_dict(token('A')), AlphaToken.from_dict(token('B'))]
+    current = [AlphaToken.from_dict(token('A', symbol='AA')), AlphaToken.from_dict(token('B', price=5.0))]
+    changes = detector().diff(previous, current)
+    assert [(t['alphaId'], diff) for t, diff in changes.modified] == [('A', {"symbol": {"old": "A", "new": "AA"}})]
+
+
+def test_duplicate_keys_keep_last_previous():
+    changes = detector().diff([token('A', name='old'), token('A', name='new')], [token('A', name='new')])
+    assert not changes
+
+
+def test_describe_uses_labels():
+    lines = describe({"symbol": {"old": "A", "new": "AA"}, "offline": {"old": False, "new": True}},
+                     {"symbol": "代号"})
+    assert lines == ["代号: A → AA", "offline: False → True"]
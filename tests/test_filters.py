@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+订阅过滤: 编译后的路由表按来源 / 链 / 代号 / 合约 / 数值区间把代币分配给目标
+
+    python3 -m pytest tests/
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from filters import Router, get_router, normalize_chain, referenced_fields, token_symbol  # noqa: E402
+
+BNB = {"symbol": "BNB", "chainId": "56", "contractAddress": "0xAAA", "marketCap": "5000000"}
+PEPE = {"symbol": "pepe", "chainId": "1", "contractAddress": "0xBBB", "marketCap": 20000}
+MEME = {"rank": 1, "chain": "bsc", "raw_text": "DOGE2\n$0.01\n+12%"}
+
+
+def route(targets, token, source='alpha'):
+    return Router(targets).targets_for(token, source)
+
+
+def test_target_without_filters_gets_everything():
+    targets = [{"name": "all"}]
+    assert route(targets, BNB) == ["all"]
+    assert route(targets, MEME, 'meme') == ["all"]
+
+
+def test_disabled_target_is_skipped():
+    assert route([{"name": "off", "enabled": False}, {"name": "on"}], BNB) == ["on"]
+
+
+def test_sources():
+    targets = [{"name": "alpha", "filters": {"sources": ["Alpha"]}},
+               {"name": "meme", "filters": {"sources": ["meme"]}}]
+    assert route(targets, BNB, 'alpha') == ["alpha"]
+    assert route(targets, MEME, 'meme') == ["meme"]
+
+
+def test_chain_aliases_are_case_insensitive():
+    assert normalize_chain("BSC") == normalize_chain("56") == normalize_chain(" bnb ") == "56"
+    targets = [{"name": "bsc", "filters": {"chains": ["BSC", "56"]}}, {"name": "eth", "filters": {"chains": ["eth"]}}]
+    assert route(targets, BNB) == ["bsc"]
+    assert route(targets, PEPE) == ["eth"]
+    # Meme 排行项用 chain 字段
+    assert route(targets, MEME, 'meme') == ["bsc"]
+
+
+def test_symbol_regex_uses_first_line_of_meme_text():
+    assert token_symbol(MEME) == "DOGE2"
+    targets = [{"name": "caps", "filters": {"symbol_regex": "^[A-Z0-9]{2,6}$"}}]
+    assert route(targets, BNB) == ["caps"]
+    assert route(targets, PEPE) == []
+    assert route(targets, MEME, 'meme') == ["caps"]
+
+
+def test_contract_allow_and_deny():
+    targets = [{"name": "allow", "filters": {"contract_allow": ["0xaaa"]}},
+               {"name": "deny", "filters": {"contract_deny": ["0XAAA"]}}]
+    assert route(targets, BNB) == ["allow"]
+    assert route(targets, PEPE) == ["deny"]
+    # 没有合约的代币不在白名单内, 也不会被黑名单误伤
+    assert route(targets, MEME, 'meme') == ["deny"]
+
+
+def test_ranges():
+    targets = [{"name": "big", "filters": {"ranges": {"marketCap": [1000000, None]}}},
+               {"name": "small", "filters": {"ranges": {"marketCap": [None, 100000]}}}]
+    assert route(targets, BNB) == ["big"]
+    assert route(targets, PEPE) == ["small"]
+    # 字段缺失或不是数值时不匹配
+    assert route(targets, {**BNB, "marketCap": None}) == []
+    assert route(targets, {**BNB, "marketCap": "n/a"}) == []
+
+
+def test_filters_combine_with_and():
+    targets = [{"name": "t", "filters": {"sources": ["alpha"], "chains": ["bsc"], "symbol_regex": "^B",
+                                         "ranges": {"marketCap": [1, None]}}}]
+    assert route(targets, BNB) == ["t"]
+    assert route(targets, {**BNB, "symbol": "XBNB"}) == []
+    assert route(targets, BNB, 'meme') == []
+
+
+def test_route_batch():
+    targets = [{"name": "bsc", "filters": {"chains": ["bsc"]}}, {"name": "all"}]
+    assert Router(targets).route([BNB, PEPE], 'alpha') == [["bsc", "all"], ["all"]]
+
+
+def test_name_falls_back_to_chat_id():
+    assert route([{"chat_id": -100}], BNB) == ["-100"]
+
+
+def test_referenced_fields():
+    targets = [{"filters": {"ranges": {"marketCap": [1, None], "price": [None, 2]}}},
+               {"filters": {"ranges": {"price": [0, 1]}}}, {}]
+    assert referenced_fields(targets) == ["marketCap", "price"]
+
+
+def test_get_router_reuses_until_config_changes():
+    targets = [{"name": "a"}]
+    router = get_router(targets)
+    assert get_router([{"name": "a"}]) is router
+    assert get_router([{"name": "b"}]) is not router
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+对冲请求: 超过对冲期限才向下一个接口追加请求, 失败立即转移, 只有超过自身期限的落败请求记失败
+
+    python3 -m pytest tests/
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from hedge import Cancelled, HedgedFetcher  # noqa: E402
+from resilience import CIRCUIT_OPEN, UpstreamError  # noqa: E402
+
+
+class Endpoints:
+    """按 url 配置延迟与结果的模拟接口, 记录调用与取消"""
+
+    def __init__(self, **spec):
+        self.spec = spec  # url -> (延迟秒数, 结果或异常)
+        self.calls = []
+        self.cancelled = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str, cancelled: threading.Event):
+        with self._lock:
+            self.calls.append(url)
+        delay, outcome = self.spec[url]
+        deadline = time.monotonic() + delay
+        while time.monotonic() < deadline:
+            if cancelled.is_set():
+                with self._lock:
+                    self.cancelled.append(url)
+                raise Cancelled()
+            time.sleep(0.002)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def fetcher(**options) -> HedgedFetcher:
+    return HedgedFetcher(**{"hedge_delay": 0.1, "min_hedge_delay": 0.01, **options})
+
+
+def failures(f: HedgedFetcher, url: str) -> int:
+    return f.breakers.get(url).failures
+
+
+def test_fast_primary_wins_without_hedge():
+    f = fetcher()
+    endpoints = Endpoints(primary=(0.01, 'P'), backup=(0.01, 'B'))
+    assert f.fetch(['primary', 'backup'], endpoints) == 'P'
+    assert endpoints.calls == ['primary']
+    assert f.hedged == 0
+
+
+def test_slow_primary_is_hedged_and_penalized():
+    f = fetcher()
+    endpoints = Endpoints(primary=(1.0, 'P'), backup=(0.02, 'B'))
+    start = time.monotonic()
+    assert f.fetch(['primary', 'backup'], endpoints) == 'B'
+    assert time.monotonic() - start < 0.5
+    assert f.hedged == 1
+    # 胜出时主接口已超过自身对冲期限: 记一次失败
+    assert failures(f, 'primary') == 1
+    assert failures(f, 'backup') == 0
+    time.sleep(0.05)
+    assert endpoints.cancelled == ['primary']
+
+
+def test_fresh_hedge_is_not_penalized_when_primary_wins():
+    f = fetcher()
+    # 主接口刚超过对冲期限就返回, 此时备用接口的请求才发出不久
+    endpoints = Endpoints(primary=(0.13, 'P'), backup=(1.0, 'B'))
+    assert f.fetch(['primary', 'backup'], endpoints) == 'P'
+    assert f.hedged == 1
+    assert failures(f, 'backup') == 0
+    assert failures(f, 'primary') == 0
+
+
+def test_failure_fails_over_immediately():
+    f = fetcher(hedge_delay=5)
+    endpoints = Endpoints(primary=(0.01, ConnectionError('refused')), backup=(0.01, 'B'))
+    start = time.monotonic()
+    assert f.fetch(['primary', 'backup'], endpoints) == 'B'
+    assert time.monotonic() - start < 1
+    assert endpoints.calls == ['primary', 'backup']
+    assert failures(f, 'primary') == 1
+
+
+def test_all_failing_raises_last_error():
+    f = fetcher()
+    endpoints = Endpoints(a=(0.01, ValueError('bad a')), b=(0.01, ValueError('bad b')))
+    with pytest.raises(ValueError, match='bad b'):
+        f.fetch(['a', 'b'], endpoints)
+
+
+def test_open_breakers_are_skipped():
+    f = fetcher()
+    endpoints = Endpoints(primary=(0.01, 'P'), backup=(0.01, 'B'))
+    f.breakers.get('primary')._open(60, escalate=False)
+    assert f.fetch(['primary', 'backup'], endpoints) == 'B'
+    assert endpoints.calls == ['backup']
+
+    f.breakers.get('backup')._open(60, escalate=False)
+    with pytest.raises(UpstreamError) as error:
+        f.fetch(['primary', 'backup'], endpoints)
+    assert error.value.failure.kind == CIRCUIT_OPEN
+
+
+def test_repeatedly_slow_endpoint_trips_its_breaker():
+    f = fetcher()
+    endpoints = Endpoints(primary=(1.0, 'P'), backup=(0.01, 'B'))
+    for _ in range(3):
+        assert f.fetch(['primary', 'backup'], endpoints) == 'B'
+    assert not f.breakers.get('primary').available()
+    assert f.order(['primary', 'backup']) == ['backup']
+
+
+def test_hedge_delay_follows_p95():
+    f = fetcher(hedge_delay=1.0, min_hedge_delay=0.05)
+    assert f.delay_for('x') == 1.0
+    for latency in (0.2, 0.2, 0.2, 0.2, 0.3):
+        f._record_success('x', latency)
+    assert f.delay_for('x') == pytest.approx(0.3, abs=0.05)
+    for _ in range(50):
+        f._record_success('x', 0.001)
+    assert f.delay_for('x') == 0.05
+
+
+def test_version_changes_with_results():
+    f = fetcher()
+    before = f.version()
+    f.fetch(['a'], Endpoints(a=(0, 'A')))
+    assert f.version() != before
+    assert f.snapshot()['a']['wins'] == 1
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+名次变动: 一次遍历得到变动、按阈值分类、冷却期内去抖, 持久化恢复后不重复提醒
+
+    python3 -m pytest tests/
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from movement import (  # noqa: E402
+    DROPPED, ENTERED_TOP, FELL, JUMPED, Movement, RankTracker, alert_rules, classify
+)
+
+RULES = {"top": 10, "jump": 15, "fall": 20, "dropped": True, "cooldown": 1800}
+
+
+def board(*symbols, chain=None):
+    """按顺序排名的排行项 (chain 为 None 时不带链字段)"""
+    tokens = [{"rank": i + 1, "symbol": s} for i, s in enumerate(symbols)]
+    if chain is not None:
+        for token in tokens:
+            token["chain"] = chain
+    return tokens
+
+
+def tracker() -> RankTracker:
+    return RankTracker(key=lambda t: t.get('symbol'), default_chain='bsc')
+
+
+def moves(movements):
+    return sorted((m.key, m.old, m.new) for m in movements)
+
+
+def test_first_round_is_baseline():
+    t = tracker()
+    assert t.update('bsc', board('A', 'B')) == []
+    assert t.stats() == {"chains": {"bsc": 2}, "alerted": 0}
+
+
+def test_movements():
+    t = tracker()
+    t.update('bsc', board('A', 'B', 'C'))
+    movements = t.update('bsc', board('C', 'A', 'D'))
+    assert moves(movements) == [('A', 1, 2), ('B', 2, None), ('C', 3, 1), ('D', None, 3)]
+    dropped = next(m for m in movements if m.key == 'B')
+    # 掉榜的代币带上一轮的排行项
+    assert dropped.token == {"rank": 2, "symbol": "B"}
+
+
+def test_chains_are_independent():
+    t = tracker()
+    t.update('bsc', board('A'))
+    t.update('sol', board('X'))
+    assert moves(t.update('bsc', board('B', 'A'))) == [('A', 1, 2), ('B', None, 1)]
+    assert t.update('sol', board('X')) == []
+
+
+def test_classify():
+    def kind(old, new):
+        return classify(Movement('bsc', 'A', {}, old, new), RULES)
+    assert kind(None, 5) == ENTERED_TOP
+    assert kind(12, 10) == ENTERED_TOP
+    assert kind(5, 3) is None          # 已在前 10 内
+    assert kind(None, 30) is None      # 新上榜但不在前列
+    assert kind(40, 25) == JUMPED
+    assert kind(40, 26) is None
+    assert kind(11, 31) == FELL
+    assert kind(3, None) == DROPPED
+    assert classify(Movement('bsc', 'A', {}, 3, None), {**RULES, "dropped": False}) is None
+
+
+def test_alert_rules_target_overrides_default():
+    cfg = {"rank_alerts": {"top": 10, "jump": 15}}
+    assert alert_rules(cfg, {})["top"] == 10
+    assert alert_rules(cfg, {"rank_alerts": {"top": 5}}) == {**RULES, "top": 5, "fall": 0, "dropped": False}
+    assert alert_rules(cfg, {"rank_alerts": False}) is None
+    assert alert_rules(cfg, {"rank_alerts": True})["jump"] == 15
+    assert alert_rules({}, {}) is None
+    assert alert_rules({}, {"rank_alerts": {"cooldown": 60}}) is None  # 没有任何阈值
+
+
+def test_debounce_per_target_and_kind():
+    t = tracker()
+    m = Movement('bsc', 'A', {}, 20, 3)
+    assert t.debounce('tg', m, ENTERED_TOP, 1800, now=1000)
+    assert not t.debounce('tg', m, ENTERED_TOP, 1800, now=2000)
+    assert t.debounce('tg', m, JUMPED, 1800, now=2000)
+    assert t.debounce('discord', m, ENTERED_TOP, 1800, now=2000)
+    assert t.debounce('tg', m, ENTERED_TOP, 1800, now=2800)
+
+
+def test_oscillating_token_alerts_once_per_cooldown():
+    t = tracker()
+    t.update('bsc', board(*[f"T{i}" for i in range(12)]))
+    fired = 0
+    for round_ in range(6):
+        # A 在第 11 与第 9 名之间来回
+        symbols = [f"T{i}" for i in range(12)]
+        symbols.insert(8 if round_ % 2 == 0 else 10, 'A')
+        for m in t.update('bsc', board(*symbols)):
+            if m.key == 'A' and classify(m, RULES) == ENTERED_TOP and t.debounce('tg', m, ENTERED_TOP, 1800):
+                fired += 1
+    assert fired == 1
+
+
+def test_prune_drops_old_alerts():
+    t = tracker()
+    m = Movement('bsc', 'A', {}, 20, 3)
+    t.debounce('tg', m, ENTERED_TOP, 1800, now=0)
+    t.debounce('tg', m, JUMPED, 1800)
+    t.prune(3600)
+    assert t.stats()["alerted"] == 1
+
+
+def test_dump_and_load_round_trip():
+    t = tracker()
+    t.update('bsc', board('A', 'B'))
+    t.debounce('tg', Movement('bsc', 'A', {}, 5, 1), JUMPED, 1800, now=100)
+    restored = tracker()
+    restored.load(t.dump())
+    assert restored.dump() == t.dump()
+    assert moves(restored.update('bsc', board('A', 'B'))) == []
+
+
+def test_load_rebuilds_ranks_under_default_chain():
+    # 旧版状态文件没有名次索引, 由上一轮的排行项重建; 没有 chain 字段的排行项归入 default_chain
+    t = tracker()
+    t.load(None, board('A', 'B'))
+    current = board('B', 'A')
+    # 重启后第一轮就与恢复的名次比对, 而不是当作该链的首轮重新建立基线
+    assert moves(t.update(t.chain_of(current[0]), current)) == [('A', 1, 2), ('B', 2, 1)]
+
+
+def test_load_keeps_dropped_token_details():
+    t = tracker()
+    t.load(None, board('A', 'B', chain='bsc'))
+    dropped = [m for m in t.update('bsc', board('A')) if m.new is None]
+    assert dropped == [Movement('bsc', 'B', {"rank": 2, "symbol": "B", "chain": "bsc"}, 2, None)]
+
+
+def test_duplicate_keys_keep_best_rank():
+    t = tracker()
+    t.update('bsc', board('A', 'B', 'A'))
+    assert t.dump()["ranks"]["bsc"] == {"A": 1, "B": 2}
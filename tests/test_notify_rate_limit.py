@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+429 / 503 的等待时间解析与限流退避的粒度
+
+    python3 -m pytest tests/
+"""
+
+import json
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from notifiers import _retry_after, get_notifier  # noqa: E402
+
+
+def response(status: int, body, headers: dict = None) -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    r._content = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    r.headers.update(headers or {})
+    return r
+
+
+def test_retry_after_header_wins():
+    assert _retry_after(response(429, {"parameters": {"retry_after": 9}}, {"Retry-After": "3"})) == 3
+
+
+def test_retry_after_from_telegram_body():
+    assert _retry_after(response(429, {"ok": False, "parameters": {"retry_after": 7}})) == 7
+
+
+@pytest.mark.parametrize("body", [[1, 2], "slow down", 42, None, {"parameters": [1]}, b"<html>busy</html>"])
+def test_retry_after_ignores_unexpected_bodies(body):
+    assert _retry_after(response(503, body)) is None
+
+
+def test_telegram_rate_limit_is_per_chat():
+    a = get_notifier({"type": "telegram", "bot_token": "123:abcdef", "chat_id": "1"})
+    b = get_notifier({"type": "telegram", "bot_token": "123:abcdef", "chat_id": "2"})
+    assert a.breaker_key() == b.breaker_key()
+    assert a.rate_limit_key() != b.rate_limit_key()
+
+
+def test_webhook_rate_limit_shares_breaker():
+    hook = get_notifier({"type": "webhook", "url": "https://example.com/hook/abcdef"})
+    assert hook.rate_limit_key() == hook.breaker_key()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+推送失败的错误文本不能带出凭据: 熔断器快照 (/api/breakers, /api/state) 与发件箱 (/api/outbox) 都对外可见
+
+    python3 -m pytest tests/
+"""
+
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from notifiers import get_notifier  # noqa: E402
+from outbox import Outbox, SendResult  # noqa: E402
+from resilience import BreakerRegistry, Failure  # noqa: E402
+
+SECRETS = ('SECRETTOKEN', 'SECRETHOOK', 'SECRETLARK', 'SECRETPATH')
+
+
+def refused_port() -> int:
+    """一个没有监听的本地端口 (连接被拒绝)"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def targets():
+    base = f"http://127.0.0.1:{refused_port()}"
+    return [
+        {"name": "tg", "type": "telegram", "bot_token": "123456:SECRETTOKEN", "chat_id": "1", "api_base": base},
+        {"name": "discord", "type": "discord", "webhook_url": f"{base}/api/webhooks/42/SECRETHOOK"},
+        {"name": "lark", "type": "lark", "webhook_url": f"{base}/open-apis/bot/v2/hook/SECRETLARK", "secret": "s"},
+        {"name": "hook", "type": "webhook", "url": f"{base}/hooks/SECRETPATH?key=SECRETPATH"},
+    ]
+
+
+def send(target: dict, breakers: BreakerRegistry) -> SendResult:
+    """与 app.send_notification 相同的失败路径: 错误写入熔断器并返回给发件箱"""
+    notifier = get_notifier(target)
+    result = notifier.send('<b>test</b>')
+    assert not result.ok
+    breakers.get(notifier.breaker_key()).record_failure(Failure(result.kind, result.error, result.status))
+    return SendResult(False, result.error, result.kind)
+
+
+def assert_clean(text: str):
+    for secret in SECRETS:
+        assert secret not in text, text
+
+
+def test_breaker_snapshot_has_no_secrets():
+    breakers = BreakerRegistry()
+    for target in targets():
+        send(target, breakers)
+    snapshot = breakers.snapshot()
+    assert len(snapshot) == 4
+    for state in snapshot.values():
+        assert state["last_failure"]["error"]
+        assert_clean(str(state))
+
+
+def test_outbox_rows_have_no_secrets(tmp_path):
+    by_name = {t["name"]: t for t in targets()}
+    breakers = BreakerRegistry()
+    outbox = Outbox(str(tmp_path / 'outbox.db'), send=lambda name, message: send(by_name[name], breakers),
+                    send_interval=0)
+    outbox.enqueue('token', list(by_name), 'message')
+    outbox.drain_once()
+    outbox._pool.shutdown(wait=True)
+    rows = outbox.recent()
+    assert len(rows) == 4
+    for row in rows:
+        assert row["last_error"]
+        assert_clean(str(row))
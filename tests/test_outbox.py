@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+发件箱: 幂等写入、按类别重试 / 放弃、跨节点已投递检查与重启后继续投递
+
+    python3 -m pytest tests/
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from outbox import Outbox, SendResult, delivery_key, options_from  # noqa: E402
+from resilience import AUTH, RATE_LIMIT  # noqa: E402
+
+
+class Channel:
+    """记录发送并按脚本返回结果的 send 回调"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.sent = []
+
+    def __call__(self, target: str, message: str):
+        self.sent.append((target, message))
+        result = self.results.pop(0) if self.results else True
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def make(tmp_path, channel, **options) -> Outbox:
+    options = {"send_interval": 0, "base_backoff": 0, **options}
+    return Outbox(str(tmp_path / 'outbox.db'), send=channel, **options)
+
+
+def drain(outbox: Outbox, rounds: int = 1):
+    """派发到期的投递并等待各发送通道结束"""
+    for _ in range(rounds):
+        outbox.drain_once()
+        deadline = time.monotonic() + 5
+        while outbox._busy:
+            assert time.monotonic() < deadline, "发送通道未结束"
+            time.sleep(0.005)
+
+
+def status(outbox: Outbox) -> dict:
+    return {row["target"]: (row["status"], row["attempts"]) for row in outbox.recent(limit=100)}
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    channel = Channel()
+    outbox = make(tmp_path, channel)
+    keys = outbox.enqueue('alpha:1', ['a', 'b'], 'hello')
+    assert keys == [delivery_key('alpha:1', 'a'), delivery_key('alpha:1', 'b')]
+    assert outbox.enqueue('alpha:1', ['a', 'b'], 'changed') == keys
+    assert outbox.pending_count() == 2
+    drain(outbox)
+    # 已发送的再次写入也不会重发
+    outbox.enqueue('alpha:1', ['a'], 'hello')
+    drain(outbox)
+    assert sorted(channel.sent) == [('a', 'hello'), ('b', 'hello')]
+    assert outbox.stats() == {'sent': 2}
+
+
+def test_failure_is_retried_until_sent(tmp_path):
+    channel = Channel(SendResult(False, 'boom'), RuntimeError('network down'), True)
+    outbox = make(tmp_path, channel)
+    outbox.enqueue('alpha:1', ['a'], 'hello')
+    drain(outbox)
+    assert status(outbox) == {'a': ('pending', 1)}
+    assert outbox.recent()[0]["last_error"] == 'boom'
+    drain(outbox, 2)
+    assert status(outbox) == {'a': ('sent', 3)}
+    assert len(channel.sent) == 3
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    outbox = make(tmp_path, Channel(*[False] * 10), max_attempts=3)
+    outbox.enqueue('alpha:1', ['a'], 'hello')
+    drain(outbox, 5)
+    assert status(outbox) == {'a': ('failed', 3)}
+
+
+def test_auth_failure_is_not_retried(tmp_path):
+    outbox = make(tmp_path, Channel(SendResult(False, 'Unauthorized', AUTH)))
+    outbox.enqueue('alpha:1', ['a'], 'hello')
+    drain(outbox, 3)
+    assert status(outbox) == {'a': ('failed', 1)}
+
+
+def test_retry_after_defers_next_attempt(tmp_path):
+    channel = Channel(SendResult(False, 'Too Many Requests', RATE_LIMIT, retry_after=60))
+    outbox = make(tmp_path, channel)
+    outbox.enqueue('alpha:1', ['a'], 'hello')
+    drain(outbox, 3)
+    assert len(channel.sent) == 1
+    row = outbox._conn.execute("SELECT next_attempt_at FROM outbox").fetchone()
+    assert row[0] >= time.time() + 59
+
+
+def test_not_attempted_does_not_count(tmp_path):
+    channel = Channel(SendResult(False, '熔断中', attempted=False), True)
+    outbox = make(tmp_path, channel, max_attempts=1)
+    outbox.enqueue('alpha:1', ['a'], 'hello')
+    drain(outbox, 2)
+    assert status(outbox) == {'a': ('sent', 1)}
+
+
+def test_already_sent_elsewhere_is_skipped(tmp_path):
+    channel = Channel()
+    sent_elsewhere = {delivery_key('alpha:1', 'a')}
+    outbox = make(tmp_path, channel, already_sent=sent_elsewhere.__contains__)
+    outbox.enqueue('alpha:1', ['a', 'b'], 'hello')
+    drain(outbox)
+    assert channel.sent == [('b', 'hello')]
+    assert status(outbox) == {'a': ('sent', 1), 'b': ('sent', 1)}
+
+
+def test_on_sent_runs_before_local_mark(tmp_path):
+    seen = []
+    outbox = None
+
+    def on_sent(key):
+        seen.append((key, outbox.stats().get('sent', 0)))
+
+    outbox = make(tmp_path, Channel(), on_sent=on_sent)
+    keys = outbox.enqueue('alpha:1', ['a'], 'hello')
+    drain(outbox)
+    assert seen == [(keys[0], 0)]
+
+
+def test_pending_survives_restart(tmp_path):
+    first = make(tmp_path, Channel(False))
+    first.enqueue('alpha:1', ['a'], 'hello')
+    drain(first)
+    first._pool.shutdown(wait=True)
+    first._conn.close()
+
+    channel = Channel()
+    second = make(tmp_path, channel)
+    drain(second)
+    assert channel.sent == [('a', 'hello')]
+    assert status(second) == {'a': ('sent', 2)}
+
+
+def test_adopt_pending_rows(tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    leader = make(tmp_path / 'a', Channel())
+    leader.enqueue('alpha:1', ['x', 'y'], 'hello')
+    rows = leader.pending_rows()
+    assert [row[2] for row in rows] == ['x', 'y']
+
+    channel = Channel()
+    standby = make(tmp_path / 'b', channel)
+    standby.adopt(rows)
+    standby.adopt(rows)
+    drain(standby)
+    assert sorted(channel.sent) == [('x', 'hello'), ('y', 'hello')]
+
+
+def test_prune_keeps_pending(tmp_path):
+    outbox = make(tmp_path, Channel(), retention=0)
+    outbox.enqueue('alpha:1', ['a'], 'hello')
+    drain(outbox)
+    outbox.enqueue('alpha:2', ['a'], 'later')
+    outbox._conn.execute("UPDATE outbox SET next_attempt_at = ? WHERE status = 'pending'", (time.time() + 3600,))
+    time.sleep(0.01)
+    outbox.prune()
+    assert outbox.stats() == {'pending': 1}
+
+
+@pytest.mark.parametrize("cfg, expected", [
+    ({}, {}),
+    ({"outbox": {"max_attempts": 3, "send_interval": 1, "unknown": 1}}, {"max_attempts": 3, "send_interval": 1}),
+])
+def test_options_from(cfg, expected):
+    assert options_from(cfg) == expected
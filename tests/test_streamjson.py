@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式解析: 任意块边界 (含 UTF-8 多字节字符与数字被截断) 下结果与 json.loads 一致
+
+    python3 -m pytest tests/
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from streamjson import ArrayStream  # noqa: E402
+
+DOC = {
+    "code": "000000",
+    "data": [
+        {"alphaId": "ALPHA_1", "name": "币安币", "symbol": "BNB", "price": 612.25, "extra": {"a": [1, 2]}},
+        {"alphaId": "ALPHA_2", "name": "Émoji 🚀", "symbol": "RKT", "price": -1e-7, "extra": None},
+        {"alphaId": "ALPHA_3", "name": "", "symbol": "Z", "price": 123456789, "extra": True},
+    ],
+    "message": None,
+    "total": 3,
+}
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def parse(data: bytes, size: int, fields=None):
+    stream = ArrayStream(chunked(data, size), 'data', fields)
+    return list(stream), stream
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1 << 20])
+def test_matches_json_loads_at_any_chunk_size(size):
+    raw = json.dumps(DOC, ensure_ascii=False).encode('utf-8')
+    items, stream = parse(raw, size)
+    assert items == DOC["data"]
+    assert stream.meta == {"code": "000000", "message": None, "total": 3}
+    assert stream.bytes_read == len(raw)
+
+
+def test_projection_keeps_only_requested_fields():
+    raw = json.dumps(DOC).encode('utf-8')
+    items, _ = parse(raw, 5, fields=['alphaId', 'symbol', 'missing'])
+    assert items == [{"alphaId": d["alphaId"], "symbol": d["symbol"]} for d in DOC["data"]]
+
+
+def test_meta_after_data_and_whitespace():
+    raw = b'\n{ "data" : [ {"a": 1} , {"a": 22} ] ,\r\n "code" : "000000" }\n'
+    items, stream = parse(raw, 4)
+    assert items == [{"a": 1}, {"a": 22}]
+    assert stream.meta == {"code": "000000"}
+
+
+def test_number_split_at_chunk_boundary():
+    # 数字值恰好落在块末尾时必须等到后续字符才算完整
+    items, stream = parse(b'{"data":[12345,6],"total":9876}', 13)
+    assert items == [12345, 6]
+    assert stream.meta["total"] == 9876
+
+
+@pytest.mark.parametrize("raw, expected", [(b'{}', []), (b'{"data": []}', []), (b'{"code": "1"}', [])])
+def test_empty(raw, expected):
+    items, _ = parse(raw, 1)
+    assert items == expected
+
+
+def test_non_array_key_goes_to_meta():
+    items, stream = parse(b'{"data": {"x": 1}}', 3)
+    assert items == []
+    assert stream.meta == {"data": {"x": 1}}
+
+
+@pytest.mark.parametrize("raw", [
+    b'[1, 2]',
+    b'{"data": [1 2]}',
+    b'{"data": [1, 2]',
+    b'{"data": [{"a": 1}',
+    b'{"data": [1], "code" "x"}',
+    b'',
+])
+def test_malformed_raises_value_error(raw):
+    with pytest.raises(ValueError):
+        parse(raw, 2)
+
+
+def test_consumed_buffer_is_trimmed():
+    items = [{"i": i, "pad": "x" * 100} for i in range(3000)]
+    raw = json.dumps({"data": items}).encode('utf-8')
+    stream = ArrayStream(chunked(raw, 4096), 'data', ['i'])
+    for item in stream:
+        assert len(stream._buf) < 65536 + 2 * 4096
+    assert item == {"i": 2999}